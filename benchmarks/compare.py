@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# coding: utf8
+"""
+    Compare two runs of the benchmark suite.
+
+    python -m benchmarks.compare baseline.json results.json [--threshold 0.1]
+
+    Exits with 1 if a benchmark lost more than threshold of its throughput.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import sys
+
+
+def _key(result):
+    return result['section'], result['name'], result['records']
+
+
+def compare(baseline, current, threshold):
+    """
+    Print the throughput ratio of every benchmark of both runs, return the regressions.
+    """
+    baseline_results = dict((_key(result), result) for result in baseline['results'])
+    regressions = []
+    for result in current['results']:
+        previous = baseline_results.get(_key(result))
+        if previous is None or not previous['records_per_second']:
+            continue
+        ratio = result['records_per_second'] / previous['records_per_second']
+        flag = ''
+        if ratio < 1 - threshold:
+            flag = '  REGRESSION'
+            regressions.append(result)
+        print('{section:<12} {name:<32} {records:>9} x{ratio:.2f}{flag}'.format(
+            section=result['section'], name=result['name'], records=result['records'],
+            ratio=ratio, flag=flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two benchmark results files.')
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='the throughput loss reported as a regression (default 0.1)')
+    options = parser.parse_args(argv)
+    with open(options.baseline) as baseline, open(options.current) as current:
+        regressions = compare(json.load(baseline), json.load(current), options.threshold)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
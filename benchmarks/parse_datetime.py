@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# coding: utf8
+"""
+    Benchmark of the datetime parsing of the entities (fast path vs isodate).
+
+    python -m benchmarks.parse_datetime [records]
+"""
+
+import datetime
+import sys
+import timeit
+
+import isodate
+
+import xee.entities as xee_entities
+
+
+def make_signals(count):
+    """
+    Build a list of signals dict, as decoded from the API.
+    """
+    begin = datetime.datetime(2016, 3, 1, tzinfo=isodate.UTC)
+    return [
+        {
+            'name': 'Odometer',
+            'value': 34512.1 + index,
+            'date': isodate.datetime_isoformat(begin + datetime.timedelta(milliseconds=1100 * index))
+        }
+        for index in range(count)
+    ]
+
+
+def main(count=100000):
+    signals = make_signals(count)
+    dates = [signal['date'] for signal in signals]
+    isodate_time = min(timeit.repeat(lambda: [isodate.parse_datetime(date) for date in dates],
+                                     number=1, repeat=3))
+    fast_time = min(timeit.repeat(lambda: [xee_entities.parse_datetime(date) for date in dates],
+                                  number=1, repeat=3))
+    signals_time = min(timeit.repeat(lambda: [xee_entities.parse_signal(signal)
+                                              for signal in signals], number=1, repeat=3))
+    print('{count} datetimes'.format(count=count))
+    print('  isodate.parse_datetime : {time:.3f}s'.format(time=isodate_time))
+    print('  parse_datetime         : {time:.3f}s (x{speedup:.1f})'.format(
+        time=fast_time, speedup=isodate_time / fast_time))
+    print('  parse_signal           : {time:.3f}s'.format(time=signals_time))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
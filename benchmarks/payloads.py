@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# coding: utf8
+"""
+    Deterministic synthetic payloads, shaped like the decoded responses of the Xee API v3.
+
+    The same count (and seed) always gives the same records, so runs can be compared.
+"""
+
+import datetime
+import json
+import math
+import random
+
+import isodate
+
+BEGIN = datetime.datetime(2016, 3, 1, tzinfo=isodate.UTC)
+
+SIGNAL_NAMES = ['Odometer', 'FuelLevel', 'VehiSpeed', 'EngineSpeed', 'BatteryVoltage',
+                'IgnitionSts', 'LockSts', 'HeadLightSts']
+
+
+def _date(seconds):
+    return isodate.datetime_isoformat(BEGIN + datetime.timedelta(seconds=seconds))
+
+
+def make_signals(count, names=None, seed=42):
+    """
+    Build signals dicts, the names taking turns every 1.1 second.
+    """
+    names = names or SIGNAL_NAMES
+    generator = random.Random(seed)
+    return [
+        {
+            'name': names[index % len(names)],
+            'value': round(generator.uniform(0, 100000), 3),
+            'date': _date(index * 1.1)
+        }
+        for index in range(count)
+    ]
+
+
+def make_locations(count, seed=42):
+    """
+    Build locations dicts, a random walk around Lille every second.
+    """
+    generator = random.Random(seed)
+    latitude, longitude, heading = 50.6292, 3.0573, 0.0
+    locations = []
+    for index in range(count):
+        heading = (heading + generator.uniform(-20, 20)) % 360
+        distance = generator.uniform(0, 30)
+        latitude += distance * math.cos(math.radians(heading)) / 111320.0
+        longitude += distance * math.sin(math.radians(heading)) / 71000.0
+        locations.append({
+            'latitude': round(latitude, 6),
+            'longitude': round(longitude, 6),
+            'altitude': round(generator.uniform(0, 200), 1),
+            'satellites': generator.randint(3, 12),
+            'heading': round(heading, 1),
+            'date': _date(index)
+        })
+    return locations
+
+
+def make_trips(count, seed=42):
+    """
+    Build trips dicts, one trip every two hours.
+    """
+    locations = make_locations(count * 2, seed)
+    return [
+        {
+            'id': '{index:024x}'.format(index=index),
+            'beginLocation': dict(locations[index * 2], date=_date(index * 7200)),
+            'endLocation': dict(locations[index * 2 + 1], date=_date(index * 7200 + 1800)),
+            'beginDate': _date(index * 7200),
+            'endDate': _date(index * 7200 + 1800),
+            'creationDate': _date(index * 7200),
+            'lastUpdateDate': _date(index * 7200 + 1800)
+        }
+        for index in range(count)
+    ]
+
+
+def make_status(signals=20, seed=42):
+    """
+    Build a status dict.
+    """
+    location = make_locations(1, seed)[0]
+    return {
+        'accelerometer': {'x': -144, 'y': -480, 'z': 9808, 'date': location['date']},
+        'location': location,
+        'signals': make_signals(signals, seed=seed)
+    }
+
+
+def make_user(user_id=42):
+    """
+    Build a user dict.
+    """
+    return {
+        'id': user_id,
+        'lastName': 'Doe',
+        'firstName': 'John',
+        'nickName': 'Johnny',
+        'gender': 'MALE',
+        'birthDate': '2016-01-11T00:00:00+00:00',
+        'licenseDeliveryDate': '2014-08-13T00:00:00+00:00',
+        'role': 'dev',
+        'isLocationEnabled': True
+    }
+
+
+def make_trip_stats():
+    """
+    Build the stats list of a trip.
+    """
+    return [{'type': 'MILEAGE', 'value': 5.800642496450446}, {'type': 'USED_TIME', 'value': 980}]
+
+
+def make_car(car_id):
+    """
+    Build a car dict.
+    """
+    return {
+        'id': car_id,
+        'name': 'Car {car_id}'.format(car_id=car_id),
+        'make': 'Mark',
+        'model': '42',
+        'year': 2016,
+        'numberPlate': 'AB-{car_id:03d}-CD'.format(car_id=car_id % 1000),
+        'deviceId': 'E{car_id:09d}'.format(car_id=car_id),
+        'cardbId': 210
+    }
+
+
+def encode(payload):
+    """
+    Encode a payload as the API sends it.
+    """
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
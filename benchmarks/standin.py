@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# coding: utf8
+"""
+    Minimal local HTTP stand-in of the Xee API: serves fixed bodies by path (the query is
+    ignored), with an optional latency per request.
+"""
+
+import socket
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class StandIn(object):
+    """
+        Serve bodies on 127.0.0.1, in a background thread.
+
+        with StandIn({'/v3/cars/1/status': body}) as server:
+            xee.host = server.url
+    """
+
+    def __init__(self, routes, latency=0.0):
+        self.routes = routes
+        self.latency = latency
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                BaseHTTPRequestHandler.setup(self)
+                # Headers and body are written separately, do not wait for the delayed ACK
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                if stand_in.latency:
+                    time.sleep(stand_in.latency)
+                body = stand_in.routes.get(self.path.split('?')[0])
+                status = 200
+                if body is None:
+                    status, body = 404, b'[{"type":"NOT_FOUND","message":"Not found","tip":""}]'
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _Server(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:{port}/v3'.format(port=self._server.server_address[1])
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# coding: utf8
+"""
+    Benchmark suite of the hot paths of the SDK, results written as JSON.
+
+    python -m benchmarks.suite [--sizes 1000,100000,1000000] [--output results.json]
+    python -m benchmarks.compare baseline.json results.json
+
+    - parse: throughput of the JSON decoding, of every xee.entities parser and of the resampling
+    - end_to_end: latency and throughput of the Xee.get_* methods against a local stand-in
+    - concurrency: requests per second of Xee.map for a growing number of workers
+    - simplify: throughput of the trajectory simplifications
+"""
+
+from __future__ import print_function
+
+import argparse
+import datetime
+import json
+import platform
+import sys
+import timeit
+
+import xee.columnar as xee_columnar
+import xee.decoding as xee_decoding
+import xee.entities as xee_entities
+import xee.resample as xee_resample
+import xee.simplify as xee_simplify
+from xee.sdk import Xee
+
+import benchmarks.payloads as payloads
+from benchmarks.standin import StandIn
+
+
+def _best(function, repeat):
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def _percentile(values, percentile):
+    values = sorted(values)
+    return values[max(0, int(round(percentile / 100.0 * len(values))) - 1)]
+
+
+def _result(section, name, records, seconds, **extra):
+    result = dict(section=section, name=name, records=records, seconds=seconds,
+                  records_per_second=records / seconds if seconds else None)
+    result.update(extra)
+    print('  {name:<32} {records:>9} records {seconds:>9.4f}s {rate:>12.0f}/s'.format(
+        name=name, records=records, seconds=seconds, rate=result['records_per_second'] or 0))
+    return result
+
+
+def bench_parse(sizes, repeat):
+    """
+    Measure the decoding and parsing throughput.
+    """
+    print('parse')
+    results = []
+    for size in sizes:
+        signals = payloads.make_signals(size)
+        locations = payloads.make_locations(size)
+        trips = payloads.make_trips(max(1, size // 10))
+        statuses = [payloads.make_status() for _ in range(max(1, size // 20))]
+        body = payloads.encode(signals)
+        parsed = [xee_entities.parse_signal(signal) for signal in signals]
+        frame = xee_columnar.SignalFrame.from_dicts(signals)
+        minute = datetime.timedelta(minutes=1)
+        cases = [
+            ('json.loads(signals)', size, lambda: json.loads(body.decode('utf-8'))),
+            ('parse_signal', size,
+             lambda: [xee_entities.parse_signal(signal) for signal in signals]),
+            ('parse_signal(lazy)', size,
+             lambda: [xee_entities.parse_signal(signal, True) for signal in signals]),
+            ('parse_location', size,
+             lambda: [xee_entities.parse_location(location) for location in locations]),
+            ('parse_trip', len(trips), lambda: [xee_entities.parse_trip(trip) for trip in trips]),
+            ('parse_status', len(statuses),
+             lambda: [xee_entities.parse_status(status) for status in statuses]),
+            ('SignalFrame.from_dicts', size, lambda: xee_columnar.SignalFrame.from_dicts(signals)),
+            ('LocationTrack.from_dicts', size,
+             lambda: xee_columnar.LocationTrack.from_dicts(locations)),
+            ('resample(signals)', size, lambda: xee_resample.resample(parsed, minute)),
+            ('resample(SignalFrame)', size, lambda: xee_resample.resample(frame, minute)),
+            ('iter_resample(signals)', size,
+             lambda: list(xee_resample.iter_resample(parsed, minute))),
+        ]
+        for decoder in xee_decoding.available_decoders():
+            cases.append(('decode[{decoder}](signals)'.format(decoder=decoder), size,
+                          lambda decode=xee_decoding.get_decoder(decoder): decode(body)))
+        for name, records, function in cases:
+            results.append(_result('parse', name, records, _best(function, repeat)))
+    return results
+
+
+def bench_end_to_end(sizes, calls, repeat):
+    """
+    Measure the Xee.get_* methods against the local stand-in.
+    """
+    print('end_to_end')
+    routes = {
+        '/v3/users/me': payloads.encode(payloads.make_user()),
+        '/v3/cars/1': payloads.encode(payloads.make_car(1)),
+        '/v3/cars/1/status': payloads.encode(payloads.make_status()),
+        '/v3/trips/abc/stats': payloads.encode(payloads.make_trip_stats()),
+    }
+    for size in sizes:
+        routes['/v3/cars/{size}/signals'.format(size=size)] = \
+            payloads.encode(payloads.make_signals(size))
+        routes['/v3/cars/{size}/locations'.format(size=size)] = \
+            payloads.encode(payloads.make_locations(size))
+        routes['/v3/cars/{size}/trips'.format(size=size)] = \
+            payloads.encode(payloads.make_trips(max(1, size // 10)))
+    results = []
+    with StandIn(routes) as server:
+        xee = Xee('bench', 'bench', 'bench')
+        xee.host = server.url
+        small = [
+            ('get_user', lambda: xee.get_user('token')),
+            ('get_car', lambda: xee.get_car(1, 'token')),
+            ('get_status', lambda: xee.get_status(1, 'token')),
+            ('get_trip_stats', lambda: xee.get_trip_stats('abc', 'token')),
+        ]
+        for name, function in small:
+            function()
+            latencies = [_best(function, 1) for _ in range(calls)]
+            results.append(_result('end_to_end', name, calls, sum(latencies),
+                                   p50=_percentile(latencies, 50),
+                                   p95=_percentile(latencies, 95),
+                                   p99=_percentile(latencies, 99)))
+        for size in sizes:
+            large = [
+                ('get_signals', size, lambda: xee.get_signals(size, 'token')),
+                ('get_signals(as_columns)', size,
+                 lambda: xee.get_signals(size, 'token', as_columns=True)),
+                ('get_locations', size, lambda: xee.get_locations(size, 'token')),
+                ('get_trips', max(1, size // 10), lambda: xee.get_trips(size, 'token')),
+            ]
+            for name, records, function in large:
+                results.append(_result('end_to_end', name, records, _best(function, repeat)))
+        xee.transport.close()
+    return results
+
+
+def bench_concurrency(workers, cars, latency):
+    """
+    Measure the requests per second of Xee.map with a growing number of workers.
+    """
+    print('concurrency ({latency}s server latency)'.format(latency=latency))
+    routes = dict(('/v3/cars/{car_id}/status'.format(car_id=car_id),
+                   payloads.encode(payloads.make_status(seed=car_id)))
+                  for car_id in range(cars))
+    results = []
+    with StandIn(routes, latency=latency) as server:
+        for max_workers in workers:
+            xee = Xee('bench', 'bench', 'bench', pool_maxsize=max_workers)
+            xee.host = server.url
+            args = [(car_id, 'token') for car_id in range(cars)]
+            seconds = _best(lambda: xee.map('get_status', args, max_workers=max_workers), 1)
+            results.append(_result('concurrency', 'get_status x{workers}'.format(
+                workers=max_workers), cars, seconds, workers=max_workers))
+            xee.transport.close()
+    return results
+
+
+def bench_simplify(sizes, repeat):
+    """
+    Measure the trajectory simplifications, of packed tracks and of Location lists.
+    """
+    print('simplify')
+    results = []
+    for size in sizes:
+        track = xee_columnar.LocationTrack.from_dicts(payloads.make_locations(size))
+        locations = list(track)
+        cases = [
+            ('douglas_peucker(10m)', lambda: xee_simplify.douglas_peucker(track, 10.0)),
+            ('douglas_peucker(10m, list)', lambda: xee_simplify.douglas_peucker(locations, 10.0)),
+            ('douglas_peucker(10m, sed)',
+             lambda: xee_simplify.douglas_peucker(track, 10.0, synchronized=True)),
+            ('visvalingam_whyatt(100m2)',
+             lambda: xee_simplify.visvalingam_whyatt(track, min_area=100.0)),
+        ]
+        for name, function in cases:
+            kept = len(function())
+            results.append(_result('simplify', name, size, _best(function, repeat), kept=kept))
+    return results
+
+
+def _ints(value):
+    return [int(item) for item in value.split(',') if item]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the hot paths of the Xee SDK.')
+    parser.add_argument('--sizes', type=_ints, default=[1000, 100000, 1000000],
+                        help='record counts of the parse benchmarks (default 1k,100k,1M)')
+    parser.add_argument('--e2e-sizes', type=_ints, default=[1000, 100000],
+                        help='record counts of the end-to-end benchmarks (default 1k,100k)')
+    parser.add_argument('--calls', type=int, default=200,
+                        help='calls per small endpoint for the latency percentiles')
+    parser.add_argument('--repeat', type=int, default=3, help='runs kept the best of')
+    parser.add_argument('--workers', type=_ints, default=[1, 2, 4, 8, 16, 32],
+                        help='worker counts of the concurrency benchmark')
+    parser.add_argument('--cars', type=int, default=256,
+                        help='statuses fetched by the concurrency benchmark')
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help='server latency (seconds) of the concurrency benchmark')
+    parser.add_argument('--simplify-sizes', type=_ints, default=[1000, 100000, 1000000],
+                        help='locations of the simplify benchmarks (default 1k,100k,1M)')
+    parser.add_argument('--only', choices=['parse', 'end_to_end', 'concurrency', 'simplify'],
+                        action='append', help='run only these sections')
+    parser.add_argument('--output', default='benchmark-results.json',
+                        help='the JSON results file (default benchmark-results.json)')
+    options = parser.parse_args(argv)
+    sections = options.only or ['parse', 'end_to_end', 'concurrency', 'simplify']
+    results = []
+    if 'parse' in sections:
+        results += bench_parse(options.sizes, options.repeat)
+    if 'end_to_end' in sections:
+        results += bench_end_to_end(options.e2e_sizes, options.calls, options.repeat)
+    if 'concurrency' in sections:
+        results += bench_concurrency(options.workers, options.cars, options.latency)
+    if 'simplify' in sections:
+        results += bench_simplify(options.simplify_sizes, options.repeat)
+    report = {
+        'meta': {
+            'date': datetime.datetime.utcnow().isoformat() + 'Z',
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'argv': sys.argv[1:] if argv is None else argv,
+        },
+        'results': results
+    }
+    with open(options.output, 'w') as output:
+        json.dump(report, output, indent=2, sort_keys=True)
+    print('results written to ' + options.output)
+
+
+if __name__ == '__main__':
+    main()
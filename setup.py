@@ -13,9 +13,13 @@ setup(
     description='SDK for Xee APIs (https://dev.xee.com)',
     long_description=open('README.md').read(),
     install_requires=[
+        'futures; python_version < "3"',
         'isodate',
         'requests'
     ],
+    extras_require={
+        'async': ['aiohttp']
+    },
     include_package_data=True,
     url='http://github.com/quentin7b/xee-sdk-python',
     classifiers=[
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# coding: utf8
+"""AsyncXee tests, imported by test_aio on Python 3.5+ only (async def is a SyntaxError on 2.7)"""
+import asyncio
+import unittest
+
+try:
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+except ImportError:
+    web = None
+
+from xee.aio import AsyncXee
+from xee.exceptions import APIException
+
+
+@unittest.skipIf(web is None, "aiohttp is not installed")
+class TestAsyncXee(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        self.loop.close()
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    async def _call(self, handlers, method, *args, **kwargs):
+        app = web.Application()
+        for path, handler in handlers.items():
+            app.router.add_route('*', path, handler)
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            async with AsyncXee('toto', 'tata', 'tut', max_concurrency=2) as xee:
+                xee.host = str(server.make_url('/v3'))
+                if isinstance(method, str):
+                    return await getattr(xee, method)(*args, **kwargs)
+                return await method(xee)
+        finally:
+            await server.close()
+
+    def test_get_car(self):
+        async def car(request):
+            self.assertEqual(request.headers['Authorization'], 'Bearer fake_access_token')
+            return web.json_response({
+                "id": 1337,
+                "name": "Mark-42",
+                "make": "Mark",
+                "model": "42",
+                "year": 2014,
+                "numberPlate": "M-42-TS",
+                "deviceId": "E133742015",
+                "cardbId": 210
+            })
+
+        car, err = self.run_async(self._call({'/v3/cars/1337': car}, 'get_car', 1337,
+                                             'fake_access_token'))
+        self.assertIsNone(err)
+        self.assertEqual(car.id, 1337)
+        self.assertEqual(car.number_plate, 'M-42-TS')
+
+    def test_get_signals_concurrently(self):
+        in_flight = []
+
+        async def signals(request):
+            in_flight.append(1)
+            self.assertLessEqual(len(in_flight), 2)
+            await asyncio.sleep(0.01)
+            in_flight.pop()
+            self.assertEqual(request.query['name'], 'Odometer')
+            return web.json_response([
+                {"name": "Odometer", "value": 34512.1, "date": "2016-03-01T02:24:27.116Z"}
+            ])
+
+        async def fetch_all(xee):
+            return await asyncio.gather(*[
+                xee.get_signals(car_id, 'fake_access_token', names=['Odometer'])
+                for car_id in range(10)])
+
+        results = self.run_async(self._call({'/v3/cars/{car_id}/signals': signals}, fetch_all))
+        self.assertEqual(len(results), 10)
+        for signals_list, err in results:
+            self.assertIsNone(err)
+            self.assertEqual(signals_list[0].value, 34512.1)
+
+    def test_coalesce_identical_requests(self):
+        calls = []
+
+        async def car(request):
+            calls.append(request.headers['Authorization'])
+            await asyncio.sleep(0.05)
+            return web.json_response({
+                "id": 1337,
+                "name": "Mark-42",
+                "make": "Mark",
+                "model": "42",
+                "year": 2014,
+                "numberPlate": "M-42-TS",
+                "deviceId": "E133742015",
+                "cardbId": 210
+            })
+
+        async def fetch_all(xee):
+            return await asyncio.gather(*[
+                xee.get_car(1337, token) for token in ['token_a'] * 5 + ['token_b']])
+
+        results = self.run_async(self._call({'/v3/cars/1337': car}, fetch_all))
+        self.assertEqual(sorted(calls), ['Bearer token_a', 'Bearer token_b'])
+        for car, err in results:
+            self.assertIsNone(err)
+            self.assertEqual(car.id, 1337)
+
+    def test_get_trip_stats_empty(self):
+        async def stats(request):
+            return web.Response(body=b'')
+
+        stats, err = self.run_async(self._call({'/v3/trips/abc/stats': stats}, 'get_trip_stats',
+                                               'abc', 'fake_access_token'))
+        self.assertListEqual(stats, [])
+
+    def test_get_user_403(self):
+        async def user(request):
+            return web.json_response([{
+                'type': 'AUTHORIZATION_ERROR',
+                'message': "Token does not have the required scope",
+                'tip': "Add the users_read scope to your app scopes and reconnect the user"
+            }], status=403)
+
+        user, err = self.run_async(self._call({'/v3/users/me': user}, 'get_user', 'oops'))
+        self.assertIsNone(user)
+        self.assertEqual(err, APIException(
+            'AUTHORIZATION_ERROR',
+            "Token does not have the required scope",
+            "Add the users_read scope to your app scopes and reconnect the user"))
+
+    def test_get_token_from_code(self):
+        async def access_token(request):
+            form = await request.post()
+            self.assertEqual(form['code'], 'fake_code')
+            return web.json_response({
+                "access_token": "fake_access_token",
+                "expires_at": 1382962374,
+                "expires_in": 3600,
+                "refresh_token": "fake_refresh_token",
+                "token_type": "bearer"
+            })
+
+        token, err = self.run_async(self._call({'/v3/auth/access_token': access_token},
+                                               'get_token_from_code', 'fake_code'))
+        self.assertEqual(token.access_token, 'fake_access_token')
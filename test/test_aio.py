@@ -0,0 +1,14 @@
+#!/usr/bin/env python
+# coding: utf8
+import sys
+import unittest
+
+if sys.version_info >= (3, 5):
+    # Imported as test.test_aio by pytest, as a top level test_aio by unittest discover
+    try:
+        from .aio_cases import TestAsyncXee  # noqa: F401 pylint: disable=unused-import
+    except ImportError:
+        from aio_cases import TestAsyncXee  # noqa: F401 pylint: disable=unused-import
+
+if __name__ == '__main__':
+    unittest.main()
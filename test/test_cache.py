@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# coding: utf8
+import threading
+import unittest
+
+from xee.cache import CachePolicy, ResponseCache
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Loader(object):
+    def __init__(self, size=100):
+        self.calls = 0
+        self.size = size
+        self.called = threading.Event()
+
+    def __call__(self, route, access_token):
+        self.calls += 1
+        self.called.set()
+        return {'route': route, 'call': self.calls}, self.size
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_forever_and_per_token(self):
+        cache = ResponseCache()
+        loader = Loader()
+        first = cache.fetch('get_trip', '/trips/a', 'token1', loader)
+        self.assertIs(cache.fetch('get_trip', '/trips/a', 'token1', loader), first)
+        cache.fetch('get_trip', '/trips/a', 'token2', loader)
+        self.assertEqual(loader.calls, 2)
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.size), (1, 2, 2))
+
+    def test_not_cached_endpoint(self):
+        cache = ResponseCache()
+        loader = Loader()
+        cache.fetch('get_signals', '/cars/1/signals', 'token', loader)
+        cache.fetch('get_signals', '/cars/1/signals', 'token', loader)
+        self.assertEqual(loader.calls, 2)
+
+    def test_ttl(self):
+        clock = FakeClock()
+        cache = ResponseCache(policies={'get_car': CachePolicy(10, 0)}, clock=clock)
+        loader = Loader()
+        cache.fetch('get_car', '/cars/1', 'token', loader)
+        clock.now += 9
+        cache.fetch('get_car', '/cars/1', 'token', loader)
+        self.assertEqual(loader.calls, 1)
+        clock.now += 2
+        self.assertEqual(cache.fetch('get_car', '/cars/1', 'token', loader)['call'], 2)
+
+    def test_stale_while_revalidate(self):
+        clock = FakeClock()
+        cache = ResponseCache(clock=clock)
+        loader = Loader()
+        cache.fetch('get_status', '/cars/1/status', 'token', loader)
+        loader.called.clear()
+        clock.now += 10
+        # Stale: served right away, refreshed in the background
+        self.assertEqual(cache.fetch('get_status', '/cars/1/status', 'token', loader)['call'], 1)
+        self.assertTrue(loader.called.wait(5))
+        self.assertEqual(cache.stats().stale_hits, 1)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_entries=2)
+        loader = Loader()
+        cache.fetch('get_trip', '/trips/a', 'token', loader)
+        cache.fetch('get_trip', '/trips/b', 'token', loader)
+        cache.fetch('get_trip', '/trips/a', 'token', loader)
+        cache.fetch('get_trip', '/trips/c', 'token', loader)
+        self.assertEqual(cache.stats().evictions, 1)
+        cache.fetch('get_trip', '/trips/a', 'token', loader)
+        self.assertEqual(loader.calls, 3)
+        cache.invalidate('token')
+        self.assertEqual(cache.stats().size, 0)
+
+    def test_max_bytes(self):
+        cache = ResponseCache(max_bytes=250)
+        loader = Loader()
+        cache.fetch('get_trip_signals', '/trips/a/signals', 'token', loader)
+        cache.fetch('get_trip_signals', '/trips/b/signals', 'token', loader)
+        self.assertEqual((cache.stats().size, cache.stats().bytes), (2, 200))
+        cache.fetch('get_trip_signals', '/trips/a/signals', 'token', loader)
+        cache.fetch('get_trip_signals', '/trips/c/signals', 'token', loader)
+        # b is the least recently used one
+        stats = cache.stats()
+        self.assertEqual((stats.size, stats.bytes, stats.evictions), (2, 200, 1))
+        cache.fetch('get_trip_signals', '/trips/b/signals', 'token', loader)
+        self.assertEqual(loader.calls, 4)
+        # Larger than the whole budget: returned, never kept
+        big = Loader(size=300)
+        cache.fetch('get_trip_signals', '/trips/d/signals', 'token', big)
+        cache.fetch('get_trip_signals', '/trips/d/signals', 'token', big)
+        self.assertEqual(big.calls, 2)
+        self.assertEqual(cache.stats().bytes, 200)
+        cache.invalidate('token')
+        self.assertEqual(cache.stats().bytes, 0)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# coding: utf8
+import math
+import unittest
+from datetime import datetime, timedelta
+
+import pytz
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from xee.columnar import LocationTrack, SignalFrame
+from xee.entities import Signal
+from xee.exceptions import ParseException
+
+begin = datetime(2016, 3, 1, 0, 0, 0, tzinfo=pytz.utc)
+
+
+def make_frame():
+    return SignalFrame.from_dicts([
+        {"name": "Odometer", "value": 12.5, "date": "2016-03-01T00:00:02Z"},
+        {"name": "FuelLevel", "value": 40, "date": "2016-03-01T00:00:01.500000+00:00"},
+        {"name": "Odometer", "value": 12.0, "date": "2016-03-01T00:00:00Z"},
+        {"name": "FuelLevel", "value": None, "date": "2016-03-01T00:00:03Z"},
+    ])
+
+
+class TestSignalFrame(unittest.TestCase):
+    def test_columns(self):
+        frame = make_frame()
+        self.assertEqual(len(frame), 4)
+        self.assertListEqual(frame.names, ['FuelLevel', 'Odometer'])
+        timestamps, values = frame.column('Odometer')
+        self.assertEqual(list(values), [12.0, 12.5])
+        self.assertEqual(timestamps.typecode, 'd')
+        self.assertTrue(math.isnan(frame.column('FuelLevel')[1][1]))
+
+    def test_iter_signals(self):
+        signals = list(make_frame())
+        self.assertEqual([signal.name for signal in signals],
+                         ['Odometer', 'FuelLevel', 'Odometer', 'FuelLevel'])
+        self.assertEqual(signals[1], Signal('FuelLevel', 40.0,
+                                            begin + timedelta(seconds=1, microseconds=500000)))
+
+    def test_iter_keeps_none(self):
+        signals = list(make_frame())
+        self.assertIsNone(signals[3].value)
+        self.assertIsInstance(signals[0].value, float)
+
+    def test_malformed(self):
+        for signal in [{"name": "LockSts", "value": "ON", "date": "2016-03-01T00:00:00Z"},
+                       {"name": "Odometer", "value": 12.0, "date": "yesterday"},
+                       {"name": "Odometer", "value": 12.0}]:
+            self.assertRaises(ParseException, SignalFrame.from_dicts, [signal])
+
+    def test_slice_and_select(self):
+        frame = make_frame().slice(begin + timedelta(seconds=1), begin + timedelta(seconds=3))
+        self.assertEqual([signal.value for signal in frame], [40.0, 12.5])
+        frame = make_frame().select(['Odometer', 'Unknown'])
+        self.assertListEqual(frame.names, ['Odometer'])
+
+    def test_from_signals(self):
+        frame = SignalFrame.from_signals(list(make_frame()))
+        self.assertEqual(list(frame.column('Odometer')[1]), [12.0, 12.5])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_to_numpy_zero_copy(self):
+        frame = make_frame()
+        timestamps, values = frame.to_numpy('Odometer')
+        self.assertEqual(values.sum(), 24.5)
+        frame.column('Odometer')[1][0] = 1.0
+        self.assertEqual(values[0], 1.0)
+
+
+def make_track():
+    # Lille -> Paris -> Lyon, an hour between each
+    return LocationTrack.from_dicts([
+        {"latitude": 48.8566, "longitude": 2.3522, "altitude": 35.0, "satellites": 7,
+         "heading": 180, "date": "2016-03-01T01:00:00Z"},
+        {"latitude": 50.6292, "longitude": 3.0573, "altitude": 31.8, "satellites": 4,
+         "heading": 167, "date": "2016-03-01T00:00:00Z"},
+        {"latitude": 45.7640, "longitude": 4.8357, "altitude": None, "satellites": None,
+         "heading": None, "date": "2016-03-01T02:00:00Z"},
+    ])
+
+
+class TestLocationTrack(unittest.TestCase):
+    def test_columns(self):
+        track = make_track()
+        self.assertEqual(len(track), 3)
+        self.assertEqual(list(track.column('latitudes')), [50.6292, 48.8566, 45.7640])
+        self.assertEqual(list(track.column('satellites')), [4, 7, -1])
+        locations = list(track)
+        self.assertEqual(locations[0].date, begin)
+        self.assertIsNone(locations[2].satellites)
+
+    def test_iter_keeps_none(self):
+        location = list(make_track())[2]
+        self.assertIsNone(location.altitude)
+        self.assertIsNone(location.heading)
+
+    def test_malformed(self):
+        location = {"latitude": 48.8566, "longitude": 2.3522, "altitude": 35.0,
+                    "satellites": 7, "heading": 180, "date": "2016-03-01T01:00:00Z"}
+        for field, value in [('latitude', 'north'), ('date', 'yesterday'), ('heading', None)]:
+            malformed = dict(location)
+            if value is None:
+                del malformed[field]
+            else:
+                malformed[field] = value
+            self.assertRaises(ParseException, LocationTrack.from_dicts, [malformed])
+
+    def test_geometry(self):
+        track = make_track()
+        distances = list(track.segment_distances())
+        self.assertAlmostEqual(distances[0] / 1000, 203.8, places=0)
+        self.assertAlmostEqual(distances[1] / 1000, 391.5, places=0)
+        self.assertAlmostEqual(track.distance(), sum(distances))
+        self.assertAlmostEqual(track.speeds()[0], distances[0] / 3600)
+        self.assertEqual(track.bounding_box(), (45.7640, 2.3522, 50.6292, 4.8357))
+        self.assertEqual(LocationTrack().distance(), 0)
+        self.assertIsNone(LocationTrack().bounding_box())
+
+    def test_slice(self):
+        track = make_track().slice(begin + timedelta(minutes=30))
+        self.assertEqual(list(track.column('latitudes')), [48.8566, 45.7640])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_pure_python_and_numpy_agree(self):
+        import xee.columnar as xee_columnar
+        track = make_track()
+        with_numpy = list(track.speeds())
+        xee_columnar.numpy = None
+        try:
+            without_numpy = list(track.speeds())
+        finally:
+            xee_columnar.numpy = numpy
+        for speed_numpy, speed_python in zip(with_numpy, without_numpy):
+            self.assertAlmostEqual(speed_numpy, speed_python)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# coding: utf8
+import unittest
+from datetime import datetime, timedelta
+
+import responses
+
+import xee.decoding as xee_decoding
+from xee.exceptions import APIException
+from xee.sdk import Xee
+from xee.utils import check_body
+
+
+class TestGetDecoder(unittest.TestCase):
+    def test_auto_is_the_fastest_installed(self):
+        names = xee_decoding.available_decoders()
+        self.assertEqual(names[-1], 'json')
+        self.assertIs(xee_decoding.get_decoder(), xee_decoding.get_decoder(names[0]))
+
+    def test_every_decoder_reads_bytes(self):
+        for name in xee_decoding.available_decoders():
+            decode = xee_decoding.get_decoder(name)
+            self.assertEqual(decode(u'[{"name":"Odometer","value":34.5}]'.encode('utf-8')),
+                             [{'name': 'Odometer', 'value': 34.5}])
+            self.assertRaises(ValueError, decode, b'')
+
+    def test_callable(self):
+        decode = xee_decoding.get_decoder(lambda body: body)
+        self.assertEqual(decode(b'[]'), b'[]')
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, xee_decoding.get_decoder, 'yaml')
+
+
+class TestCheckBody(unittest.TestCase):
+    def setUp(self):
+        self.decoded = []
+
+    def decode(self, body):
+        self.decoded.append(body)
+        return xee_decoding.get_decoder('json')(body)
+
+    def test_ok(self):
+        self.assertEqual(check_body(200, b'{"id":42}', self.decode), {'id': 42})
+        self.assertEqual(check_body(200, b'{"id":42}', self.decode, raw=True), b'{"id":42}')
+        self.assertEqual(self.decoded, [b'{"id":42}'])
+
+    def test_known_error_decoded(self):
+        body = b'[{"type":"NOT_FOUND","message":"Car not found","tip":"Check the id"}]'
+        with self.assertRaises(APIException) as context:
+            check_body(404, body, self.decode, raw=True)
+        self.assertEqual(context.exception.type, 'NOT_FOUND')
+
+    def test_unknown_error_not_decoded(self):
+        with self.assertRaises(Exception) as context:
+            check_body(502, b'<html>Bad Gateway</html>', self.decode)
+        self.assertEqual(str(context.exception), '<html>Bad Gateway</html>')
+        self.assertEqual(self.decoded, [])
+
+
+class TestRawResponses(unittest.TestCase):
+    def setUp(self):
+        self.xee = Xee('toto', 'tata', 'tut', json_decoder='json')
+
+    @responses.activate
+    def test_get_signals_raw(self):
+        body = b'[{"name":"Odometer","value":34.5,"date":"2016-03-01T02:24:20.000Z"}]'
+        responses.add(responses.GET, self.xee.host + '/cars/1/signals', body=body, status=200)
+        signals, err = self.xee.get_signals(1, 'oauth_token', raw=True)
+        self.assertIsNone(err)
+        self.assertEqual(signals, body)
+
+    @responses.activate
+    def test_get_locations_raw_error(self):
+        responses.add(responses.GET, self.xee.host + '/cars/1/locations', status=403,
+                      json=[{'type': 'AUTHORIZATION_ERROR', 'message': 'Forbidden', 'tip': ''}])
+        locations, err = self.xee.get_locations(1, 'oauth_token', raw=True)
+        self.assertIsNone(locations)
+        self.assertIsInstance(err, APIException)
+
+    def test_raw_not_windowed(self):
+        self.assertRaises(ValueError, self.xee.get_signals, 1, 'oauth_token', raw=True,
+                          begin=datetime(2016, 3, 1), window=timedelta(hours=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
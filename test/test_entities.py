@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# coding: utf8
+import unittest
+
+import isodate
+
+from xee.entities import parse_datetime, parse_status, parse_trip
+from xee.exceptions import ParseException
+
+
+class TestParseDatetime(unittest.TestCase):
+    def test_same_as_isodate(self):
+        for value in ['2016-01-11T00:00:00+00:00',
+                      '2016-03-01T02:24:27.116Z',
+                      '2016-03-01T02:24:27.116000+00:00',
+                      '2016-03-01T02:24:27.1234567+02:00',
+                      '2016-03-01T02:24:27.9Z',
+                      '2016-03-01T02:24:27-05:30',
+                      '2016-03-01T02:24:27-0530',
+                      '2016-03-01T02:24:27+02',
+                      '2016-03-01T02:24:27',
+                      '20160301T022427Z']:
+            expected = isodate.parse_datetime(value)
+            parsed = parse_datetime(value)
+            self.assertEqual(parsed, expected, value)
+            self.assertEqual(parsed.utcoffset(), expected.utcoffset(), value)
+            self.assertEqual(type(parsed.tzinfo), type(expected.tzinfo), value)
+
+    def test_invalid(self):
+        for value in ['2016-13-01T02:24:27Z', '2016-03-01T02:24:27.Z', 'not a date at all!!']:
+            self.assertRaises(ValueError, parse_datetime, value)
+
+
+class TestLazyEntities(unittest.TestCase):
+    trip = {
+        "id": "56b43a4f051f29071f14218d",
+        "beginLocation": {
+            "latitude": 50.6817,
+            "longitude": 3.08202,
+            "altitude": 2,
+            "heading": 0,
+            "satellites": 1,
+            "date": "2016-01-29T18:36:17Z"
+        },
+        "endLocation": {
+            "latitude": 50.6817,
+            "longitude": 3.08202,
+            "altitude": 2,
+            "heading": 0,
+            "satellites": 1,
+            "date": "2016-01-29T18:39:17Z"
+        },
+        "beginDate": "2016-01-29T18:39:17Z",
+        "endDate": "2016-01-29T19:15:15Z"
+    }
+
+    def test_lazy_trip(self):
+        lazy = parse_trip(self.trip, lazy=True)
+        self.assertEqual(lazy.id, "56b43a4f051f29071f14218d")
+        self.assertNotIn('begin_location', lazy.__dict__)
+        self.assertEqual(lazy.begin_location.date, isodate.parse_datetime("2016-01-29T18:36:17Z"))
+        self.assertIs(lazy.begin_location, lazy.begin_location)
+        self.assertEqual(lazy, parse_trip(self.trip))
+        self.assertEqual(lazy.materialize(), parse_trip(self.trip))
+
+    def test_lazy_status(self):
+        status = {
+            "signals": [
+                {"name": "Odometer", "value": 34512.1, "date": "2016-03-01T02:24:27.116Z"},
+                {"name": "FuelLevel", "value": "oops", "date": "not a date"}
+            ]
+        }
+        lazy = parse_status(status, lazy=True)
+        self.assertIsNone(lazy.location)
+        self.assertIsNone(lazy.accelerometer)
+        self.assertEqual(lazy.signals[0].value, 34512.1)
+        # Only the fields accessed are decoded
+        self.assertEqual(lazy.signals[1].name, 'FuelLevel')
+        self.assertRaises(ParseException, getattr, lazy.signals[1], 'date')
+        self.assertRaises(ParseException, getattr, parse_trip({}, lazy=True), 'id')
+
+    def test_lazy_compared_to_other_types(self):
+        lazy = parse_trip(self.trip, lazy=True)
+        self.assertFalse(lazy == None)  # noqa: E711 pylint: disable=singleton-comparison
+        self.assertTrue(lazy != 3)
+        self.assertNotIn(lazy, [None, 3])
+        self.assertIn(lazy, [None, parse_trip(self.trip)])
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# coding: utf8
+import time
+import unittest
+from datetime import datetime, timedelta
+
+import isodate
+import requests
+
+from xee.fakeserver import FakeXeeServer
+from xee.ratelimit import RateLimiter
+from xee.sdk import Xee
+
+end = datetime(2016, 3, 1, tzinfo=isodate.UTC)
+
+
+class TestFakeXeeServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FakeXeeServer(cars=3).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.server.error_rate = 0
+        self.server.throttle_rate = 0
+        self.server.slow_body = 0
+        self.xee = Xee('toto', 'tata', 'tut', host=self.server.url)
+
+    def tearDown(self):
+        self.xee.transport.close()
+
+    def test_deterministic_signals(self):
+        signals, err = self.xee.get_signals(1, 'token', begin=end - timedelta(minutes=1), end=end,
+                                            names=['Odometer', 'VehiSpeed'])
+        self.assertIsNone(err)
+        self.assertEqual(len(signals), 14)
+        self.assertEqual(set(signal.name for signal in signals), set(['Odometer', 'VehiSpeed']))
+        self.assertTrue(all(end - timedelta(minutes=1) <= signal.date <= end
+                            for signal in signals))
+        again, err = Xee('toto', 'tata', 'tut', host=self.server.url).get_signals(
+            1, 'token', begin=end - timedelta(minutes=1), end=end, names=['Odometer', 'VehiSpeed'])
+        self.assertListEqual(again, signals)
+        signals, err = self.xee.get_signals(1, 'token', limit=3)
+        self.assertEqual(len(signals), 3)
+
+    def test_resources(self):
+        cars, err = self.xee.get_cars('token')
+        self.assertEqual([car.id for car in cars], [1, 2, 3])
+        locations, err = self.xee.get_locations(2, 'token', begin=end - timedelta(minutes=1),
+                                                end=end)
+        self.assertEqual(len(locations), 13)
+        trips, err = self.xee.get_trips(2, 'token', begin=end - timedelta(days=1), end=end)
+        self.assertEqual(len(trips), 7)
+        trip, err = self.xee.get_trip(trips[0].id, 'token')
+        self.assertEqual(trip, trips[0])
+        duration, err = self.xee.get_trip_duration(trip.id, 'token')
+        self.assertEqual(duration.value, 1800)
+        used_time, err = self.xee.get_used_time(2, 'token', begin=end - timedelta(days=1), end=end,
+                                                initial_value=100)
+        self.assertEqual(used_time.value, 100 + 6 * 1800)
+        car, err = self.xee.get_car(42, 'token')
+        self.assertEqual(err.message, 'Car not found')
+
+    def test_auth(self):
+        token, err = self.xee.get_token_from_code('code')
+        self.assertEqual(token.expires_in, 3600)
+        response = requests.get(self.server.url + '/users/me')
+        self.assertEqual(response.status_code, 401)
+
+    def test_conditional(self):
+        self.xee.get_user('token')
+        self.xee.get_user('token')
+        self.assertFalse(self.xee.transport.last_changed())
+
+    def test_faults(self):
+        self.server.error_rate = 1
+        car, err = self.xee.get_car(1, 'token')
+        self.assertEqual(err.type, 'SERVER_ERROR')
+        self.server.error_rate = 0
+        self.server.throttle_rate = 1
+        throttled = Xee('toto', 'tata', 'tut', host=self.server.url,
+                        rate_limiter=RateLimiter(max_retries=1, sleep=lambda seconds: None))
+        car, err = throttled.get_car(1, 'token')
+        self.assertEqual(err.type, 'TOO_MANY_REQUESTS')
+        self.assertEqual(throttled.transport.rate_limiter.stats().throttled, 2)
+        self.server.throttle_rate = 0
+        self.server.slow_body = 0.2
+        started_at = time.time()
+        self.xee.get_car(2, 'token')
+        self.assertGreaterEqual(time.time() - started_at, 0.2)
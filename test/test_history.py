@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# coding: utf8
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+try:
+    from urllib.parse import parse_qs, urlparse
+except ImportError:
+    from urlparse import parse_qs, urlparse
+
+import isodate
+import pytz
+import responses
+
+from xee.history import HistoryCache, missing_intervals
+from xee.sdk import Xee
+
+xee = Xee('toto', 'tata', 'tut')
+host = xee.host
+begin = datetime(2016, 3, 1, 0, 0, 0, tzinfo=pytz.utc)
+
+
+def signals_callback(request):
+    # One Odometer and one FuelLevel signal per hour, both edges included
+    query = parse_qs(urlparse(request.url).query)
+    window_begin = isodate.parse_datetime(query['begin'][0])
+    window_end = isodate.parse_datetime(query['end'][0])
+    names = query['name'][0].split(',') if 'name' in query else ['Odometer', 'FuelLevel']
+    signals = []
+    for hour in range(48):
+        date = begin + timedelta(hours=hour)
+        if window_begin <= date <= window_end:
+            for name in names:
+                signals.append({"name": name, "value": float(hour),
+                                "date": isodate.datetime_isoformat(date)})
+    return 200, {}, json.dumps(signals)
+
+
+class TestMissingIntervals(unittest.TestCase):
+    def test_gaps(self):
+        self.assertEqual(missing_intervals([], 0, 10), [(0, 10)])
+        self.assertEqual(missing_intervals([(2, 4), (6, 8)], 0, 10),
+                         [(0, 2), (4, 6), (8, 10)])
+        self.assertEqual(missing_intervals([(0, 5)], 1, 4), [])
+
+
+class TestHistoryCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'history.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @responses.activate
+    def test_only_gaps_are_fetched(self):
+        responses.add_callback(responses.GET, host + "/cars/1337/signals",
+                               callback=signals_callback)
+        history = HistoryCache(xee, self.path)
+        signals, err = history.get_signals(1337, "fake_access_token", begin,
+                                           begin + timedelta(hours=10), names=['Odometer'])
+        self.assertEqual(len(signals), 11)
+        history.close()
+
+        # Across restarts, only [10h, 20h] is missing
+        history = HistoryCache(xee, self.path)
+        signals, err = history.get_signals(1337, "fake_access_token", begin + timedelta(hours=5),
+                                           begin + timedelta(hours=20), names=['Odometer'])
+        self.assertEqual([signal.value for signal in signals], [float(h) for h in range(5, 21)])
+        self.assertEqual(len(responses.calls), 2)
+        query = parse_qs(urlparse(responses.calls[1].request.url).query)
+        self.assertEqual(isodate.parse_datetime(query['begin'][0]), begin + timedelta(hours=10))
+
+        # Already covered
+        history.get_signals(1337, "fake_access_token", begin, begin + timedelta(hours=20),
+                            names=['Odometer'])
+        self.assertEqual(len(responses.calls), 2)
+
+        # Another name has its own intervals
+        signals, err = history.get_signals(1337, "fake_access_token", begin,
+                                           begin + timedelta(hours=1),
+                                           names=['Odometer', 'FuelLevel'])
+        self.assertEqual(len(responses.calls), 3)
+        self.assertEqual(len(signals), 4)
+        history.close()
+
+    @responses.activate
+    def test_locations_error(self):
+        responses.add(responses.GET, host + "/cars/1337/locations",
+                      json=[
+                          {
+                              'type': 'AUTHORIZATION_ERROR',
+                              'message': "Token does not have the required scope",
+                              'tip': "Add the vehicles_read scope to your app scopes"
+                          }
+                      ],
+                      status=403)
+        history = HistoryCache(xee, ':memory:')
+        locations, err = history.get_locations(1337, "fake_access_token", begin,
+                                               begin + timedelta(hours=1))
+        self.assertIsNone(locations)
+        self.assertEqual(err.type, 'AUTHORIZATION_ERROR')
+        history.close()
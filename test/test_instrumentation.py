@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# coding: utf8
+import unittest
+
+import requests
+import responses
+
+from xee.cache import ResponseCache
+from xee.instrumentation import Histogram, MetricsAggregator, RequestEvent, SpanHook
+from xee.sdk import Xee
+
+host = "https://cloud.xee.com/v3"
+
+signals = [
+    {"name": "Odometer", "value": 34512.1, "date": "2016-03-01T02:24:27.116Z"},
+    {"name": "FuelLevel", "value": 41, "date": "2016-03-01T02:24:27.116Z"}
+]
+
+
+def event(endpoint, total_time, error=None):
+    return RequestEvent(endpoint, host, 1456799067.0, 200, 0.01, total_time / 2, total_time,
+                        120, 0.001, 0.002, 3, False, error)
+
+
+class TestHistogram(unittest.TestCase):
+    def test_percentiles(self):
+        histogram = Histogram(lowest=0.001, growth=1.01)
+        self.assertIsNone(histogram.percentile(50))
+        for millisecond in range(1, 101):
+            histogram.add(millisecond / 1000.0)
+        for percentile, expected in [(50, 0.050), (95, 0.095), (99, 0.099), (100, 0.100)]:
+            self.assertGreaterEqual(histogram.percentile(percentile), expected * 0.9999)
+            self.assertLess(histogram.percentile(percentile), expected * 1.01)
+        histogram.add(0)
+        self.assertEqual(histogram.percentile(0), 0.001)
+
+
+class TestMetricsAggregator(unittest.TestCase):
+    def test_stats(self):
+        metrics = MetricsAggregator()
+        for total_time in [0.1, 0.2, 0.3, 0.4]:
+            metrics(event('get_status', total_time))
+        metrics(event('get_car', 1, error=Exception('Oops')))
+        stats = metrics.stats()
+        self.assertEqual(stats['get_status'].count, 4)
+        self.assertEqual(stats['get_status'].errors, 0)
+        self.assertAlmostEqual(stats['get_status'].mean, 0.25)
+        self.assertAlmostEqual(stats['get_status'].p50, 0.2, delta=0.01)
+        self.assertAlmostEqual(stats['get_status'].p99, 0.4, delta=0.02)
+        self.assertEqual(stats['get_status'].response_bytes, 480)
+        self.assertEqual(stats['get_status'].records, 12)
+        self.assertEqual(stats['get_car'].errors, 1)
+        metrics.reset()
+        self.assertDictEqual(metrics.stats(), {})
+
+
+class FakeSpan(object):
+    def __init__(self, name, start_time):
+        self.name = name
+        self.start_time = start_time
+        self.attributes = {}
+        self.end_time = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def end(self, end_time=None):
+        self.end_time = end_time
+
+
+class FakeTracer(object):
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, start_time=None):
+        self.spans.append(FakeSpan(name, start_time))
+        return self.spans[-1]
+
+
+class TestSpanHook(unittest.TestCase):
+    def test_span(self):
+        tracer = FakeTracer()
+        SpanHook(tracer)(event('get_status', 0.5, error=Exception('Oops')))
+        span = tracer.spans[0]
+        self.assertEqual(span.name, 'xee.get_status')
+        self.assertEqual(span.end_time - span.start_time, 500000000)
+        self.assertEqual(span.attributes['http.status_code'], 200)
+        self.assertEqual(span.attributes['error.message'], 'Oops')
+
+
+class TestHooks(unittest.TestCase):
+    @responses.activate
+    def test_get_signals_event(self):
+        responses.add(responses.GET, host + "/cars/1337/signals", json=signals, status=200)
+        events = []
+        client = Xee('toto', 'tata', 'tut', hooks=[events.append])
+        client.add_hook(lambda _: 1 / 0)
+        result, err = client.get_signals(1337, "fake_access_token")
+        self.assertEqual(len(result), 2)
+        self.assertEqual(len(events), 1)
+        request = events[0]
+        self.assertEqual(request.endpoint, 'get_signals')
+        self.assertEqual(request.route, host + "/cars/1337/signals")
+        self.assertEqual(request.status_code, 200)
+        self.assertEqual(request.response_bytes, len(responses.calls[0].response.content))
+        self.assertEqual(request.records, 2)
+        self.assertFalse(request.cached)
+        self.assertIsNone(request.error)
+        self.assertGreaterEqual(request.total_time, request.network_time + request.decode_time)
+        self.assertGreaterEqual(request.parse_time, 0)
+
+    @responses.activate
+    def test_error_and_cached_events(self):
+        responses.add(responses.GET, host + "/trips/abc", json=[{
+            "type": "PARAMETERS_ERROR", "message": "Trip not found", "tip": "Check the trip"
+        }], status=404)
+        responses.add(responses.GET, host + "/cars/1337", json={
+            "id": 1337, "name": "Mark-42", "make": "Mark", "model": "42", "year": 2014,
+            "numberPlate": "M-42-TS", "deviceId": "E133742015", "cardbId": 210
+        }, status=200)
+        metrics = MetricsAggregator()
+        client = Xee('toto', 'tata', 'tut', cache=ResponseCache(), hooks=[metrics])
+        events = []
+        client.add_hook(events.append)
+        client.get_trip('abc', "fake_access_token")
+        client.get_car(1337, "fake_access_token")
+        client.get_car(1337, "fake_access_token")
+        self.assertEqual(events[0].status_code, 404)
+        self.assertEqual(events[0].error.type, 'PARAMETERS_ERROR')
+        self.assertEqual(events[0].records, 0)
+        self.assertFalse(events[1].cached)
+        self.assertTrue(events[2].cached)
+        self.assertEqual(events[2].response_bytes, 0)
+        self.assertEqual(metrics.stats()['get_car'].count, 2)
+        self.assertEqual(metrics.stats()['get_trip'].errors, 1)
+
+    @responses.activate
+    def test_failed_request_not_cached(self):
+        responses.add(responses.GET, host + "/cars/1337",
+                      body=requests.ConnectionError('reset'))
+        client = Xee('toto', 'tata', 'tut', cache=ResponseCache())
+        events = []
+        client.add_hook(events.append)
+        with self.assertRaises(requests.ConnectionError):
+            client.get_car(1337, "fake_access_token")
+        self.assertFalse(events[0].cached)
+        self.assertIsNone(events[0].status_code)
+        self.assertIsInstance(events[0].error, requests.ConnectionError)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# coding: utf8
+import unittest
+
+import responses
+
+from xee.ratelimit import RateLimiter, TokenBucket, parse_retry_after
+from xee.sdk import Xee
+
+
+class FakeTime(object):
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_rate(self):
+        fake = FakeTime()
+        bucket = TokenBucket(2, burst=3, clock=fake.clock)
+        self.assertEqual([bucket.reserve() for _ in range(5)], [0, 0, 0, 0.5, 1.0])
+        fake.now += 10
+        self.assertEqual(bucket.reserve(), 0)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_per_token(self):
+        fake = FakeTime()
+        limiter = RateLimiter(per_token_rate=1, clock=fake.clock, sleep=fake.sleep)
+        limiter.acquire('a')
+        limiter.acquire('b')
+        self.assertEqual(fake.slept, [])
+        limiter.acquire('a')
+        self.assertEqual(fake.slept, [1.0])
+        stats = limiter.stats()
+        self.assertEqual(stats.requests, 3)
+        self.assertAlmostEqual(stats.average_delay, 1.0 / 3)
+
+    def test_backoff(self):
+        fake = FakeTime()
+        limiter = RateLimiter(rate=10, clock=fake.clock, sleep=fake.sleep)
+        limiter.backoff(5)
+        self.assertEqual(limiter.stats().rate, 5)
+        self.assertEqual(limiter.acquire('a'), 5)
+        limiter.success()
+        self.assertAlmostEqual(limiter.stats().rate, 5.1)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('120'), 120)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT',
+                                           clock=lambda: 1445412470), 10)
+        self.assertIsNone(parse_retry_after('soon'))
+
+
+class TestTransportRateLimit(unittest.TestCase):
+    @responses.activate
+    def test_retry_after_429(self):
+        fake = FakeTime()
+        limiter = RateLimiter(rate=100, clock=fake.clock, sleep=fake.sleep)
+        client = Xee('toto', 'tata', 'tut', rate_limiter=limiter)
+        responses.add(responses.GET, client.host + "/users/me/cars", body='Too many requests',
+                      headers={'Retry-After': '2'}, status=429)
+        responses.add(responses.GET, client.host + "/users/me/cars", json=[], status=200)
+        cars, err = client.get_cars("fake_access_token")
+        self.assertListEqual(cars, [])
+        self.assertEqual(fake.slept, [2.0])
+        self.assertEqual(limiter.stats().throttled, 1)
+
+    @responses.activate
+    def test_too_many_429(self):
+        fake = FakeTime()
+        limiter = RateLimiter(max_retries=1, clock=fake.clock, sleep=fake.sleep)
+        client = Xee('toto', 'tata', 'tut', rate_limiter=limiter)
+        responses.add(responses.GET, client.host + "/cars/1337", body='Too many requests',
+                      status=429)
+        car, err = client.get_car(1337, "fake_access_token")
+        self.assertIsNone(car)
+        self.assertEqual(err.type, 'TOO_MANY_REQUESTS')
+        self.assertEqual(len(responses.calls), 2)
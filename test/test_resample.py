@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# coding: utf8
+import unittest
+from datetime import datetime, timedelta
+
+import pytz
+
+import xee.resample as xee_resample
+from xee.columnar import SignalFrame
+from xee.entities import Signal, SignalBucket
+from xee.resample import iter_resample, resample
+
+begin = datetime(2016, 3, 1, 0, 0, 0, tzinfo=pytz.utc)
+minute = timedelta(minutes=1)
+
+
+def signal(name, value, seconds):
+    return Signal(name, value, begin + timedelta(seconds=seconds))
+
+
+def make_signals():
+    return [
+        signal('Odometer', 10.0, 0),
+        signal('FuelLevel', 40, 10),
+        signal('Odometer', 12.0, 30),
+        signal('Odometer', 11.0, 59),
+        signal('FuelLevel', None, 61),
+        signal('Odometer', 13.0, 70),
+        signal('FuelLevel', 38, 130),
+    ]
+
+
+class TestResample(unittest.TestCase):
+    def test_buckets(self):
+        buckets = resample(make_signals(), minute)
+        self.assertEqual(sorted(buckets), ['FuelLevel', 'Odometer'])
+        self.assertEqual(buckets['Odometer'], [
+            SignalBucket('Odometer', begin, begin + minute, 3, 10.0, 12.0, 11.0, 10.0, 11.0),
+            SignalBucket('Odometer', begin + minute, begin + 2 * minute, 1, 13.0, 13.0, 13.0,
+                         13.0, 13.0),
+        ])
+        self.assertEqual([bucket.begin for bucket in buckets['FuelLevel']],
+                         [begin, begin + 2 * minute])
+
+    def test_any_order(self):
+        signals = make_signals()
+        self.assertEqual(resample(list(reversed(signals)), minute), resample(signals, minute))
+
+    def test_names_and_origin(self):
+        buckets = resample(iter(make_signals()), 60, names=['Odometer'],
+                           origin=begin + timedelta(seconds=30))
+        self.assertEqual(list(buckets), ['Odometer'])
+        self.assertEqual([(bucket.count, bucket.first, bucket.last)
+                          for bucket in buckets['Odometer']], [(1, 10.0, 10.0), (3, 12.0, 13.0)])
+
+    def test_frame(self):
+        frame = SignalFrame.from_signals(make_signals())
+        numpy = xee_resample.numpy
+        try:
+            self.assertEqual(resample(frame, minute), resample(make_signals(), minute))
+            xee_resample.numpy = None
+            self.assertEqual(resample(frame, minute), resample(make_signals(), minute))
+        finally:
+            xee_resample.numpy = numpy
+
+    def test_invalid_period(self):
+        self.assertRaises(ValueError, resample, make_signals(), timedelta(0))
+
+
+class TestIterResample(unittest.TestCase):
+    def test_same_buckets(self):
+        buckets = {}
+        for bucket in iter_resample(make_signals(), minute):
+            buckets.setdefault(bucket.name, []).append(bucket)
+        self.assertEqual(buckets, resample(make_signals(), minute))
+
+    def test_yields_closed_buckets(self):
+        buckets = iter_resample(iter(make_signals()), minute, names=['Odometer'])
+        first = next(buckets)
+        self.assertEqual((first.begin, first.count), (begin, 3))
+
+    def test_not_in_time_order(self):
+        signals = [signal('Odometer', 1, 70), signal('Odometer', 2, 0)]
+        self.assertRaises(ValueError, list, iter_resample(signals, minute))
+
+
+if __name__ == '__main__':
+    unittest.main()
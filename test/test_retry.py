@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# coding: utf8
+import json
+import threading
+import time
+import unittest
+
+import requests
+import responses
+
+from xee.retry import HedgePolicy, RetryBudget, RetryPolicy
+from xee.sdk import Xee
+
+
+def car_json(car_id, name):
+    return {'id': car_id, 'name': name, 'make': 'Mark', 'model': '42', 'year': 2017,
+            'numberPlate': 'AB-123-CD', 'deviceId': 'E133715', 'cardbId': 2}
+
+
+def wait_calls(count):
+    # The losing requests must end within the test, responses would record them in the next one
+    deadline = time.time() + 5
+    while len(responses.calls) < count and time.time() < deadline:
+        time.sleep(0.01)
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_delay(self):
+        policy = RetryPolicy(backoff=0.5, max_backoff=3, jitter=lambda: 1.0)
+        self.assertEqual([policy.delay(attempt) for attempt in range(4)], [0.5, 1, 2, 3])
+        policy = RetryPolicy(backoff=0.5, jitter=lambda: 0.5)
+        self.assertEqual(policy.delay(1), 0.5)
+
+    def test_budget(self):
+        budget = RetryBudget(ratio=0.5, reserve=2)
+        policy = RetryPolicy(max_retries=5, budget=budget)
+        self.assertTrue(policy.should_retry(0))
+        self.assertTrue(policy.should_retry(1))
+        self.assertFalse(policy.should_retry(2))
+        policy.started()
+        policy.started()
+        self.assertTrue(policy.should_retry(0))
+        self.assertFalse(policy.should_retry(5))
+
+
+class TestHedgePolicy(unittest.TestCase):
+    def test_delay(self):
+        policy = HedgePolicy(percentile=90, min_samples=10, min_delay=0.002)
+        for latency in range(9):
+            policy.record('get_status', latency / 1000.0)
+        self.assertIsNone(policy.delay('get_status'))
+        policy.record('get_status', 1)
+        self.assertEqual(policy.delay('get_status'), 0.008)
+        self.assertIsNone(policy.delay('get_car'))
+        policy.record('get_car', 0)
+        self.assertIsNone(policy.delay('get_car'))
+
+
+class TestTransportRetry(unittest.TestCase):
+    def setUp(self):
+        self.slept = []
+        self.policy = RetryPolicy(max_retries=2, sleep=self.slept.append, jitter=lambda: 1.0)
+
+    @responses.activate
+    def test_retry_status(self):
+        client = Xee('toto', 'tata', 'tut', retry=self.policy)
+        responses.add(responses.GET, client.host + "/cars/1337", body='Unavailable', status=503)
+        responses.add(responses.GET, client.host + "/cars/1337", body='Unavailable', status=502)
+        responses.add(responses.GET, client.host + "/cars/1337",
+                      json=car_json(1337, 'Mark-42'), status=200)
+        car, err = client.get_car(1337, "fake_access_token")
+        self.assertIsNone(err)
+        self.assertEqual(car.id, 1337)
+        self.assertEqual(self.slept, [0.1, 0.2])
+
+    @responses.activate
+    def test_retry_connection_error(self):
+        client = Xee('toto', 'tata', 'tut', retry={'get_car': self.policy})
+        responses.add(responses.GET, client.host + "/cars/1337",
+                      body=requests.ConnectionError('reset'))
+        responses.add(responses.GET, client.host + "/cars/1337",
+                      json=car_json(1337, 'Mark-42'), status=200)
+        car, err = client.get_car(1337, "fake_access_token")
+        self.assertEqual(car.id, 1337)
+        responses.add(responses.GET, client.host + "/cars/1337/status",
+                      body=requests.ConnectionError('reset'))
+        # Only get_car is retried
+        with self.assertRaises(requests.ConnectionError):
+            client.get_status(1337, "fake_access_token")
+
+    @responses.activate
+    def test_retries_exhausted(self):
+        client = Xee('toto', 'tata', 'tut', retry=self.policy)
+        responses.add(responses.GET, client.host + "/cars/1337",
+                      json=[{'type': 'SERVER_ERROR', 'message': 'Oops', 'tip': 'Retry'}],
+                      status=500)
+        car, err = client.get_car(1337, "fake_access_token")
+        self.assertIsNone(car)
+        self.assertEqual(err.type, 'SERVER_ERROR')
+        self.assertEqual(len(responses.calls), 3)
+
+    @responses.activate
+    def test_hedge(self):
+        hedge = HedgePolicy(min_samples=1)
+        hedge.record('get_car', 0.01)
+        client = Xee('toto', 'tata', 'tut', hedge=hedge)
+        calls = []
+        lock = threading.Lock()
+        release = threading.Event()
+
+        def callback(_):
+            with lock:
+                calls.append(None)
+                first = len(calls) == 1
+            if first:
+                release.wait(5)
+                return 200, {}, json.dumps(car_json(1, 'slow'))
+            return 200, {}, json.dumps(car_json(2, 'fast'))
+
+        responses.add_callback(responses.GET, client.host + "/cars/1337", callback=callback)
+        started_at = time.time()
+        car, err = client.get_car(1337, "fake_access_token")
+        self.assertEqual(car.name, 'fast')
+        self.assertLess(time.time() - started_at, 0.4)
+        self.assertEqual(len(calls), 2)
+        release.set()
+        wait_calls(2)
+        client.transport.close()
+
+    @responses.activate
+    def test_hedge_more_callers_than_pool(self):
+        hedge = HedgePolicy(min_samples=1)
+        hedge.record('get_car', 0.01)
+        client = Xee('toto', 'tata', 'tut', hedge=hedge, pool_maxsize=2, hedge_workers=2)
+        attempts = {}
+        lock = threading.Lock()
+        release = threading.Event()
+
+        def callback(request):
+            with lock:
+                attempts[request.url] = attempts.get(request.url, 0) + 1
+                first = attempts[request.url] == 1
+            if first:
+                release.wait(5)
+                return 200, {}, json.dumps(car_json(1, 'slow'))
+            return 200, {}, json.dumps(car_json(2, 'fast'))
+
+        for car_id in range(8):
+            responses.add_callback(responses.GET, client.host + "/cars/{}".format(car_id),
+                                   callback=callback)
+        names = []
+
+        def get_car(car_id):
+            car, _ = client.get_car(car_id, "fake_access_token")
+            names.append(car.name)
+
+        threads = [threading.Thread(target=get_car, args=(car_id,)) for car_id in range(8)]
+        started_at = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLess(time.time() - started_at, 1)
+        self.assertEqual(names, ['fast'] * 8)
+        release.set()
+        wait_calls(16)
+        client.transport.close()
@@ -1,13 +1,25 @@
 #!/usr/bin/env python
 # coding: utf8
+import json
+import threading
+import time
 import unittest
 
+try:
+    from urllib.parse import parse_qs, urlparse
+except ImportError:
+    from urlparse import parse_qs, urlparse
+
+import isodate
 import responses
 import pytz
 
-from xee.exceptions import APIException
+from xee.cache import ResponseCache
+from xee.entities import LazySignal
+from xee.exceptions import APIException, AuthenticationException, ParseException
+from xee.fakeserver import FakeXeeServer
 from xee.sdk import Xee
-from datetime import datetime
+from datetime import datetime, timedelta
 
 xee = Xee('toto', 'tata', 'tut')
 host = xee.host
@@ -405,6 +417,42 @@ class TestTrips(unittest.TestCase):
         expected = []
         self.assertListEqual(trips, expected)
 
+    @responses.activate
+    def test_get_trips_include(self):
+        trip = {
+            "id": None,
+            "beginLocation": {"latitude": 50.6817, "longitude": 3.08202, "altitude": 2,
+                              "heading": 0, "satellites": 1, "date": "2016-01-29T18:36:17Z"},
+            "endLocation": {"latitude": 50.6817, "longitude": 3.08202, "altitude": 2,
+                            "heading": 0, "satellites": 1, "date": "2016-01-29T19:15:15Z"},
+            "beginDate": "2016-01-29T18:39:17Z",
+            "endDate": "2016-01-29T19:15:15Z"
+        }
+        responses.add(responses.GET, host + "/cars/1337/trips",
+                      json=[dict(trip, id='trip1'), dict(trip, id='trip2')], status=200)
+        responses.add(responses.GET, host + "/trips/trip1/stats/mileage",
+                      json={"type": "MILEAGE", "value": 5.8}, status=200)
+        responses.add(responses.GET, host + "/trips/trip2/stats/mileage",
+                      json=[{"type": "PARAMETERS_ERROR", "message": "Trip not found",
+                             "tip": "Please check that the trip exists"}], status=404)
+        responses.add(responses.GET, host + "/trips/trip1/stats/usedtime",
+                      json={"type": "USED_TIME", "value": 980}, status=200)
+        responses.add(responses.GET, host + "/trips/trip2/stats/usedtime",
+                      json={"type": "USED_TIME", "value": 60}, status=200)
+        bundles, err = xee.get_trips(1337, "fake_access_token", include=['mileage', 'duration'])
+        self.assertIsNone(err)
+        self.assertEqual([bundle.trip.id for bundle in bundles], ['trip1', 'trip2'])
+        self.assertEqual(bundles[0].mileage.value, 5.8)
+        self.assertEqual(bundles[0].duration.value, 980)
+        self.assertIsNone(bundles[0].signals)
+        self.assertDictEqual(bundles[0].errors, {})
+        self.assertIsNone(bundles[1].mileage)
+        self.assertEqual(bundles[1].duration.value, 60)
+        self.assertEqual(bundles[1].errors['mileage'].type, 'PARAMETERS_ERROR')
+        self.assertEqual(len(responses.calls), 5)
+        with self.assertRaises(ValueError):
+            xee.get_trips(1337, "fake_access_token", include=['weather'])
+
 
 class TestTripLocations(unittest.TestCase):
     @responses.activate
@@ -646,8 +694,22 @@ class TestErrors(unittest.TestCase):
     def test_400(self):
         return
 
+    @responses.activate
     def test_401(self):
-        return
+        responses.add(responses.GET, host + "/users/me",
+                      json=[
+                          {
+                              'type': 'AUTHENTICATION_ERROR',
+                              'message': "Token has expired",
+                              'tip': "Refresh the token"
+                          }
+                      ],
+                      status=401)
+        user, err = xee.get_user("expired")
+        self.assertIsNone(user)
+        self.assertIsInstance(err, AuthenticationException)
+        self.assertEqual(err, APIException('AUTHENTICATION_ERROR', "Token has expired",
+                                           "Refresh the token"))
 
     def test_403(self):
         return
@@ -657,3 +719,420 @@ class TestErrors(unittest.TestCase):
 
     def test_416(self):
         return
+
+
+class TestTransport(unittest.TestCase):
+    @responses.activate
+    def test_requests_share_the_session(self):
+        responses.add(responses.GET, host + "/users/me/cars", json=[], status=200)
+        responses.add(responses.POST, host + "/auth/access_token",
+                      json={
+                          "access_token": "fake_access_token",
+                          "expires_at": 1382962374,
+                          "expires_in": 3600,
+                          "refresh_token": "fake_refresh_token",
+                          "token_type": "bearer"
+                      },
+                      status=200)
+        client = Xee('toto', 'tata', 'tut')
+        session = client.transport.session
+        token, err = client.get_token_from_refresh_token("fake_refresh_token")
+        cars, err = client.get_cars(token.access_token)
+        self.assertListEqual(cars, [])
+        self.assertIs(client.transport.session, session)
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_transport_options(self):
+        responses.add(responses.GET, host + "/users/me/cars", json=[], status=200)
+        client = Xee('toto', 'tata', 'tut', connect_timeout=2, read_timeout=5, keep_alive=False)
+        self.assertEqual(client.transport.timeout, (2, 5))
+        client.get_cars("fake_access_token")
+        self.assertEqual(responses.calls[0].request.headers['Connection'], 'close')
+        self.assertEqual(responses.calls[0].request.headers['Authorization'],
+                         'Bearer fake_access_token')
+
+    def test_warm_up(self):
+        with FakeXeeServer() as server:
+            client = Xee('toto', 'tata', 'tut', host=server.url, warm_up=4)
+            self.assertEqual(server.connections, 4)
+            self.assertEqual(server.requests['/v3'], 4)
+            # The pooled connections are reused, up to the pool size
+            car, err = client.get_car(1, 'fake_access_token')
+            self.assertIsNone(err)
+            self.assertEqual(server.connections, 4)
+            self.assertEqual(client.transport.warm_up(50), 10)
+            self.assertEqual(server.connections, 10)
+            client.transport.close()
+
+    @responses.activate
+    def test_coalesce_identical_requests(self):
+        def status(request):
+            time.sleep(0.2)
+            return 200, {}, json.dumps({"signals": []})
+
+        responses.add_callback(responses.GET, host + "/cars/1337/status", callback=status)
+        client = Xee('toto', 'tata', 'tut')
+        results = []
+
+        def get_status(token):
+            results.append(client.get_status(1337, token))
+
+        threads = [threading.Thread(target=get_status, args=(token,))
+                   for token in ['token_a'] * 5 + ['token_b']]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # One request per token, every caller gets the status
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(len(results), 6)
+        for status, err in results:
+            self.assertIsNone(err)
+            self.assertListEqual(status.signals, [])
+
+
+class TestBatch(unittest.TestCase):
+    @responses.activate
+    def test_get_car_many(self):
+        for car_id in range(20):
+            responses.add(responses.GET, host + "/cars/{car_id}".format(car_id=car_id),
+                          json={
+                              "id": car_id,
+                              "name": "Mark-42",
+                              "make": "Mark",
+                              "model": "42",
+                              "year": 2014,
+                              "numberPlate": "M-42-TS",
+                              "deviceId": "E133742015",
+                              "cardbId": 210
+                          },
+                          status=200)
+        results = xee.batch(max_workers=4).get_car_many(range(20), "fake_access_token")
+        self.assertEqual([car.id for car, err in results], list(range(20)))
+
+    @responses.activate
+    def test_failures_do_not_abort_the_batch(self):
+        responses.add(responses.GET, host + "/trips/a/stats",
+                      json=[{"type": "USED_TIME", "value": 980}],
+                      status=200)
+        responses.add(responses.GET, host + "/trips/b/stats",
+                      json=[
+                          {
+                              'type': 'PARAMETERS_ERROR',
+                              'message': "Trip not found",
+                              'tip': "Please check that the trip exists, looks like it does not"
+                          }
+                      ],
+                      status=404)
+        responses.add(responses.GET, host + "/trips/c/stats",
+                      body=ConnectionError("connection reset"))
+        results = xee.map('get_trip_stats', [('a', "fake_access_token"),
+                                             ('b', "fake_access_token"),
+                                             ('c', "fake_access_token")], max_workers=2)
+        self.assertEqual(results[0][0][0].value, 980)
+        self.assertIsNone(results[1][0])
+        self.assertEqual(results[1][1].message, "Trip not found")
+        self.assertIsNone(results[2][0])
+        self.assertIsInstance(results[2][1], ConnectionError)
+
+    @responses.activate
+    def test_as_completed(self):
+        responses.add(responses.GET, host + "/trips/a/stats/usedtime",
+                      json={"type": "USED_TIME", "value": 980}, status=200)
+        responses.add(responses.GET, host + "/trips/b/stats/usedtime",
+                      json={"type": "USED_TIME", "value": 42}, status=200)
+        completed = dict(xee.batch().as_completed('get_trip_duration',
+                                                  [('a', "fake_access_token"),
+                                                   ('b', "fake_access_token")]))
+        self.assertEqual(completed[0][0].value, 980)
+        self.assertEqual(completed[1][0].value, 42)
+
+
+class TestWindows(unittest.TestCase):
+    begin = datetime(2016, 3, 1, 0, 0, 0, tzinfo=pytz.utc)
+
+    def _signals_callback(self, request):
+        # One signal per minute and per name, both edges included (as the API does)
+        query = parse_qs(urlparse(request.url).query)
+        begin = isodate.parse_datetime(query['begin'][0])
+        end = isodate.parse_datetime(query['end'][0])
+        names = query['name'][0].split(',') if 'name' in query else ['Odometer']
+        signals = []
+        date = self.begin + timedelta(minutes=-((self.begin - begin) // timedelta(minutes=1)))
+        while date <= end:
+            for name in names:
+                signals.append({"name": name, "value": 1.0,
+                                "date": isodate.datetime_isoformat(date)})
+            date += timedelta(minutes=1)
+        return 200, {}, json.dumps(signals)
+
+    @responses.activate
+    def test_get_signals_by_windows(self):
+        responses.add_callback(responses.GET, host + "/cars/1337/signals",
+                               callback=self._signals_callback)
+        signals, err = xee.get_signals(1337, "fake_access_token", begin=self.begin,
+                                       end=self.begin + timedelta(hours=2),
+                                       window=timedelta(minutes=30))
+        self.assertIsNone(err)
+        self.assertEqual(len(responses.calls), 4)
+        self.assertEqual(len(signals), 121)
+        self.assertEqual([signal.date for signal in signals],
+                         [self.begin + timedelta(minutes=minute) for minute in range(121)])
+
+    @responses.activate
+    def test_get_signals_by_windows_lazy(self):
+        responses.add_callback(responses.GET, host + "/cars/1337/signals",
+                               callback=self._signals_callback)
+        signals, err = xee.get_signals(1337, "fake_access_token", begin=self.begin,
+                                       end=self.begin + timedelta(hours=1),
+                                       window=timedelta(minutes=30), lazy=True)
+        self.assertIsNone(err)
+        self.assertEqual(len(signals), 61)
+        for signal in signals:
+            self.assertIsInstance(signal, LazySignal)
+
+    @responses.activate
+    def test_get_signals_by_names(self):
+        responses.add_callback(responses.GET, host + "/cars/1337/signals",
+                               callback=self._signals_callback)
+        signals, err = xee.get_signals(1337, "fake_access_token", begin=self.begin,
+                                       end=self.begin + timedelta(hours=1),
+                                       names=['Odometer', 'FuelLevel'],
+                                       window=timedelta(minutes=30), split_names=True)
+        self.assertEqual(len(responses.calls), 4)
+        for call in responses.calls:
+            self.assertEqual(len(parse_qs(urlparse(call.request.url).query)['name']), 1)
+        self.assertEqual(len(signals), 122)
+
+    @responses.activate
+    def test_get_signals_adaptive_windows(self):
+        responses.add_callback(responses.GET, host + "/cars/1337/signals",
+                               callback=self._signals_callback)
+        signals, err = xee.get_signals(1337, "fake_access_token", begin=self.begin,
+                                       end=self.begin + timedelta(hours=10),
+                                       window=timedelta(minutes=10), target_size=120)
+        self.assertEqual(len(signals), 601)
+        # The 10 minutes probe shows 1 signal per minute, next windows are about 2 hours
+        self.assertLess(len(responses.calls), 10)
+
+    def test_window_requires_begin(self):
+        self.assertRaises(ValueError, xee.get_locations, 1337, "fake_access_token",
+                          window=timedelta(minutes=30))
+
+    @responses.activate
+    def test_get_trips_by_windows_error(self):
+        responses.add(responses.GET, host + "/cars/1337/trips",
+                      json=[
+                          {
+                              'type': 'AUTHORIZATION_ERROR',
+                              'message': "Token does not have the required scope",
+                              'tip': "Add the vehicles_read scope to your app scopes"
+                          }
+                      ],
+                      status=403)
+        trips, err = xee.get_trips(1337, "fake_access_token", begin=self.begin,
+                                   end=self.begin + timedelta(days=2), window=timedelta(days=1))
+        self.assertIsNone(trips)
+        self.assertEqual(err.type, 'AUTHORIZATION_ERROR')
+
+
+class TestStreaming(unittest.TestCase):
+    @responses.activate
+    def test_iter_signals(self):
+        responses.add(responses.GET, host + "/cars/1337/signals",
+                      json=[
+                          {
+                              "name": "LockSts",
+                              "value": 0,
+                              "date": "2016-03-01T02:24:24.000000+00:00"
+                          },
+                          {
+                              "name": "Odometer",
+                              "value": 34512.1,
+                              "date": "2016-03-01T02:24:27.116000+00:00"
+                          }
+                      ],
+                      status=200)
+        signals, err = xee.iter_signals(1337, "fake_access_token", names=['LockSts', 'Odometer'])
+        self.assertIsNone(err)
+        signals = list(signals)
+        self.assertEqual(len(signals), 2)
+        self.assertEqual(signals[1].name, 'Odometer')
+        self.assertEqual(signals[1].date, datetime(2016, 3, 1, 2, 24, 27, 116000, tzinfo=pytz.utc))
+
+    @responses.activate
+    def test_iter_trip_locations(self):
+        responses.add(responses.GET, host + "/trips/56b43a4f051f29071f14218d/locations",
+                      json=[
+                          {
+                              "latitude": 50.67815,
+                              "longitude": 3.208155,
+                              "altitude": 31.8,
+                              "satellites": 4,
+                              "heading": 167,
+                              "date": "2016-03-01T02:24:20.000000+00:00"
+                          }
+                      ],
+                      status=200)
+        locations, err = xee.iter_trip_locations("56b43a4f051f29071f14218d", "fake_access_token")
+        self.assertEqual([location.latitude for location in locations], [50.67815])
+
+    @responses.activate
+    def test_iter_locations_error(self):
+        responses.add(responses.GET, host + "/cars/1337/locations",
+                      json=[
+                          {
+                              'type': 'AUTHORIZATION_ERROR',
+                              'message': "Token does not have the required scope",
+                              'tip': "Add the vehicles_read scope to your app scopes"
+                          }
+                      ],
+                      status=403)
+        locations, err = xee.iter_locations(1337, "fake_access_token")
+        self.assertIsNone(locations)
+        self.assertEqual(err.type, 'AUTHORIZATION_ERROR')
+
+
+class TestColumns(unittest.TestCase):
+    @responses.activate
+    def test_get_trip_signals_as_columns(self):
+        responses.add(responses.GET, host + "/trips/56b43a4f051f29071f14218d/signals",
+                      json=[
+                          {
+                              "name": "LockSts",
+                              "value": 0,
+                              "date": "2016-03-01T02:24:24.000000+00:00"
+                          },
+                          {
+                              "name": "Odometer",
+                              "value": 34512.1,
+                              "date": "2016-03-01T02:24:27.116000+00:00"
+                          }
+                      ],
+                      status=200)
+        frame, err = xee.get_trip_signals("56b43a4f051f29071f14218d", "fake_access_token",
+                                          as_columns=True)
+        self.assertListEqual(frame.names, ['LockSts', 'Odometer'])
+        self.assertEqual(list(frame.column('Odometer')[1]), [34512.1])
+
+    @responses.activate
+    def test_get_signals_as_columns_empty(self):
+        responses.add(responses.GET, host + "/cars/1337/signals", body='', status=200)
+        frame, err = xee.get_signals(1337, "fake_access_token", as_columns=True)
+        self.assertEqual(len(frame), 0)
+
+    @responses.activate
+    def test_get_signals_as_columns_malformed(self):
+        responses.add(responses.GET, host + "/cars/1337/signals", status=200,
+                      json=[{"name": "LockSts", "value": "ON",
+                             "date": "2016-03-01T02:24:24.000000+00:00"}])
+        frame, err = xee.get_signals(1337, "fake_access_token", as_columns=True)
+        self.assertIsNone(frame)
+        self.assertIsInstance(err, ParseException)
+
+    @responses.activate
+    def test_get_trip_locations_as_track(self):
+        responses.add(responses.GET, host + "/trips/56b43a4f051f29071f14218d/locations",
+                      json=[
+                          {
+                              "latitude": 50.67815,
+                              "longitude": 3.208155,
+                              "altitude": 31.8,
+                              "satellites": 4,
+                              "heading": 167,
+                              "date": "2016-03-01T02:24:20.000000+00:00"
+                          }
+                      ],
+                      status=200)
+        track, err = xee.get_trip_locations("56b43a4f051f29071f14218d", "fake_access_token",
+                                            as_track=True)
+        self.assertEqual(len(track), 1)
+        self.assertEqual(track.bounding_box(), (50.67815, 3.208155, 50.67815, 3.208155))
+
+    @responses.activate
+    def test_get_trip_locations_as_track_malformed(self):
+        responses.add(responses.GET, host + "/trips/56b43a4f051f29071f14218d/locations",
+                      json=[{"latitude": 50.67815, "longitude": 3.208155, "altitude": 31.8,
+                             "satellites": 4, "heading": 167, "date": "not a date"}],
+                      status=200)
+        track, err = xee.get_trip_locations("56b43a4f051f29071f14218d", "fake_access_token",
+                                            as_track=True)
+        self.assertIsNone(track)
+        self.assertIsInstance(err, ParseException)
+
+
+class TestCache(unittest.TestCase):
+    @responses.activate
+    def test_trip_stats_are_cached(self):
+        responses.add(responses.GET, host + "/trips/56b43a4f051f29071f14218d/stats/mileage",
+                      json={"type": "MILEAGE", "value": 5.800642496450446}, status=200)
+        client = Xee('toto', 'tata', 'tut', cache=ResponseCache())
+        for _ in range(3):
+            mileage, err = client.get_trip_mileage("56b43a4f051f29071f14218d",
+                                                   "fake_access_token")
+            self.assertEqual(mileage.value, 5.800642496450446)
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(client.cache.stats().hits, 2)
+        # Weighed by the raw body
+        self.assertEqual(client.cache.stats().bytes, len(responses.calls[0].response.content))
+
+
+class TestConditionalRequests(unittest.TestCase):
+    status = {
+        "signals": [
+            {
+                "name": "Odometer",
+                "value": 34512.1,
+                "date": "2016-03-01T02:24:27.116Z"
+            }
+        ]
+    }
+
+    @responses.activate
+    def test_poll_status(self):
+        responses.add(responses.GET, host + "/cars/1337/status", json=self.status,
+                      headers={'ETag': '"v1"'}, status=200)
+        responses.add(responses.GET, host + "/cars/1337/status", status=304)
+        responses.add(responses.GET, host + "/cars/1337/status", json=self.status,
+                      headers={'ETag': '"v2"'}, status=200)
+        client = Xee('toto', 'tata', 'tut')
+        first, changed, err = client.poll('get_status', 1337, "fake_access_token")
+        self.assertTrue(changed)
+        second, changed, err = client.poll('get_status', 1337, "fake_access_token")
+        self.assertFalse(changed)
+        self.assertIs(second, first)
+        self.assertEqual(responses.calls[1].request.headers['If-None-Match'], '"v1"')
+        third, changed, err = client.poll('get_status', 1337, "fake_access_token")
+        self.assertTrue(changed)
+        self.assertEqual(third.signals[0].value, 34512.1)
+
+    @responses.activate
+    def test_not_modified_get(self):
+        responses.add(responses.GET, host + "/users/me/cars", json=[],
+                      headers={'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'}, status=200)
+        responses.add(responses.GET, host + "/users/me/cars", status=304)
+        client = Xee('toto', 'tata', 'tut')
+        client.get_cars("fake_access_token")
+        cars, err = client.get_cars("fake_access_token")
+        self.assertListEqual(cars, [])
+        self.assertEqual(responses.calls[1].request.headers['If-Modified-Since'],
+                         'Wed, 21 Oct 2015 07:28:00 GMT')
+        # The size of the reused body, not of the empty 304
+        self.assertEqual(client.transport.last_size(), 2)
+
+    @responses.activate
+    def test_large_responses_not_remembered(self):
+        signals = [{"name": "Odometer", "value": 34512.1, "date": "2016-03-01T02:24:27.116Z"}]
+        for car_id in (1, 2, 3):
+            responses.add(responses.GET, host + "/cars/{car_id}/signals".format(car_id=car_id),
+                          json=signals * car_id, headers={'ETag': '"v1"'}, status=200)
+        size = len(json.dumps(signals))
+        client = Xee('toto', 'tata', 'tut', max_validated_size=2 * size + 10,
+                     max_validator_bytes=2 * size + 10)
+        for car_id in (3, 1, 2, 2, 1, 3):
+            client.get_signals(car_id, "fake_access_token")
+        # 3 is never remembered (too large), 1 and 2 evict each other (total size)
+        self.assertEqual([call.request.headers.get('If-None-Match') for call in responses.calls],
+                         [None, None, None, '"v1"', None, None])
+        self.assertEqual(client.transport._validator_bytes, size)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# coding: utf8
+import math
+import random
+import unittest
+from datetime import datetime, timedelta
+
+import pytz
+
+import xee.simplify as xee_simplify
+from xee.columnar import LocationTrack
+from xee.entities import Location
+from xee.simplify import douglas_peucker, visvalingam_whyatt
+
+begin = datetime(2016, 3, 1, 0, 0, 0, tzinfo=pytz.utc)
+
+# About one metre, in degrees of latitude
+METRE = 1 / 111195.0
+
+
+def location(north, east, seconds):
+    # north and east in metres from Lille
+    return Location(50.6292 + north * METRE,
+                    3.0573 + east * METRE / math.cos(math.radians(50.6292)),
+                    None, None, None, begin + timedelta(seconds=seconds))
+
+
+def make_corner():
+    # 100 m east then 100 m north, one location every 10 m (and 10 s)
+    return [location(0, east, east) for east in range(0, 100, 10)] + \
+        [location(north, 100, 100 + north) for north in range(0, 101, 10)]
+
+
+def make_walk(count, seed=42):
+    generator = random.Random(seed)
+    north, east, heading, locations = 0.0, 0.0, 0.0, []
+    for index in range(count):
+        heading += generator.uniform(-0.5, 0.5)
+        distance = generator.uniform(0, 30)
+        north += distance * math.cos(heading)
+        east += distance * math.sin(heading)
+        locations.append(location(north, east, index))
+    return locations
+
+
+class TestDouglasPeucker(unittest.TestCase):
+    def test_corner(self):
+        corner = make_corner()
+        simplified = douglas_peucker(corner, 1.0)
+        self.assertEqual(simplified, [corner[0], corner[10], corner[-1]])
+
+    def test_tolerance(self):
+        walk = make_walk(2000)
+        self.assertLess(len(douglas_peucker(walk, 50.0)), len(douglas_peucker(walk, 5.0)))
+        self.assertEqual(douglas_peucker(walk, 0.0), walk)
+        self.assertEqual(douglas_peucker(walk[:2], 5.0), walk[:2])
+
+    def test_synchronized(self):
+        # A straight line, but the car stops 30 s at 20 m
+        line = [location(0, 0, 0), location(0, 10, 10), location(0, 20, 20),
+                location(0, 20, 50), location(0, 30, 60), location(0, 40, 70)]
+        self.assertEqual(douglas_peucker(line, 1.0), [line[0], line[-1]])
+        kept = douglas_peucker(line, 1.0, synchronized=True)
+        self.assertIn(line[2], kept)
+        self.assertIn(line[3], kept)
+
+    def test_track(self):
+        walk = make_walk(1000)
+        track = douglas_peucker(LocationTrack.from_locations(walk), 10.0, synchronized=True)
+        self.assertIsInstance(track, LocationTrack)
+        self.assertEqual([location.date for location in track],
+                         [location.date for location in douglas_peucker(walk, 10.0, True)])
+
+    def test_without_numpy(self):
+        walk = make_walk(1000)
+        expected = douglas_peucker(walk, 10.0)
+        numpy = xee_simplify.numpy
+        try:
+            xee_simplify.numpy = None
+            self.assertEqual(douglas_peucker(walk, 10.0), expected)
+        finally:
+            xee_simplify.numpy = numpy
+
+
+class TestVisvalingamWhyatt(unittest.TestCase):
+    def test_max_points(self):
+        corner = make_corner()
+        self.assertEqual(visvalingam_whyatt(corner, max_points=3),
+                         [corner[0], corner[10], corner[-1]])
+
+    def test_min_area(self):
+        corner = make_corner()
+        self.assertEqual(visvalingam_whyatt(corner, min_area=1.0),
+                         [corner[0], corner[10], corner[-1]])
+        walk = make_walk(2000)
+        self.assertLess(len(visvalingam_whyatt(walk, min_area=500.0)),
+                        len(visvalingam_whyatt(walk, min_area=50.0)))
+
+    def test_track(self):
+        walk = make_walk(500)
+        track = visvalingam_whyatt(LocationTrack.from_locations(walk), max_points=100)
+        self.assertEqual(len(track), 100)
+        expected = visvalingam_whyatt(walk, max_points=100)
+        self.assertEqual([location.date for location in track],
+                         [location.date for location in expected])
+
+    def test_required(self):
+        self.assertRaises(ValueError, visvalingam_whyatt, make_corner())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# coding: utf8
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+import isodate
+
+from xee.entities import Signal, Trip
+from xee.sync import FileStateStore, IncrementalSync, MemoryStateStore
+
+
+class FakeXee(object):
+    def __init__(self):
+        self.signals = []
+        self.trips = []
+        self.periods = []
+
+    def get_signals(self, car_id, access_token, begin=None, end=None, names=None):
+        self.periods.append((begin, end))
+        return [signal for signal in self.signals if begin <= signal.date <= end
+                and (names is None or signal.name in names)], None
+
+    def get_trips(self, car_id, access_token, begin=None, end=None):
+        return [trip for trip in self.trips if begin <= trip.begin_date <= end], None
+
+
+def minutes_ago(minutes):
+    return datetime.now(isodate.UTC) - timedelta(minutes=minutes)
+
+
+class TestIncrementalSync(unittest.TestCase):
+    def setUp(self):
+        self.xee = FakeXee()
+        self.store = MemoryStateStore()
+        self.sync = IncrementalSync(self.xee, self.store, overlap=timedelta(minutes=10))
+
+    def test_sync_signals(self):
+        self.xee.signals = [Signal('Odometer', 1, minutes_ago(60)),
+                            Signal('Odometer', 2, minutes_ago(5))]
+        signals, err = self.sync.sync_signals(1337, 'token')
+        self.assertEqual([signal.value for signal in signals], [1, 2])
+        # A late upload within the overlap, and a new signal
+        self.xee.signals += [Signal('FuelLevel', 40, minutes_ago(7)),
+                             Signal('Odometer', 3, minutes_ago(1))]
+        signals, err = self.sync.sync_signals(1337, 'token')
+        self.assertEqual([signal.value for signal in signals], [40, 3])
+        begin, end = self.xee.periods[-1]
+        self.assertEqual(isodate.UTC, begin.tzinfo)
+        self.assertLess(abs((begin - minutes_ago(15)).total_seconds()), 5)
+        signals, err = self.sync.sync_signals(1337, 'token')
+        self.assertListEqual(signals, [])
+
+    def test_handler_failure_keeps_cursor(self):
+        self.xee.signals = [Signal('Odometer', 1, minutes_ago(60))]
+
+        def handler(signals):
+            raise IOError('disk full')
+
+        with self.assertRaises(IOError):
+            self.sync.sync_signals(1337, 'token', handler=handler)
+        self.assertIsNone(self.store.get('1337/signals'))
+        delivered = []
+        self.sync.sync_signals(1337, 'token', handler=delivered.extend)
+        self.assertEqual(len(delivered), 1)
+
+    def test_names_and_trips_cursors(self):
+        self.xee.signals = [Signal('Odometer', 1, minutes_ago(60))]
+        self.xee.trips = [Trip('t1', None, None, minutes_ago(60), minutes_ago(50))]
+        self.sync.sync_signals(1337, 'token', names=['Odometer'])
+        trips, err = self.sync.sync_trips(1337, 'token')
+        self.assertEqual([trip.id for trip in trips], ['t1'])
+        self.assertIsNotNone(self.store.get('1337/signals:Odometer'))
+        self.assertIsNotNone(self.store.get('1337/trips'))
+        self.assertIsNone(self.store.get('1337/signals'))
+
+
+class TestFileStateStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_persisted(self):
+        path = os.path.join(self.directory, 'state.json')
+        store = FileStateStore(path)
+        self.assertIsNone(store.get('1337/signals'))
+        store.set('1337/signals', {'date': 12.5, 'seen': [[12.5, 'Odometer']]})
+        self.assertEqual(FileStateStore(path).get('1337/signals'),
+                         {'date': 12.5, 'seen': [[12.5, 'Odometer']]})
+        self.assertEqual(os.listdir(self.directory), ['state.json'])
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# coding: utf8
+import threading
+import time
+import unittest
+
+from xee.entities import Token
+from xee.exceptions import AuthenticationException
+from xee.tokens import TokenSession
+
+
+class FakeXee(object):
+    def __init__(self):
+        self.refreshes = 0
+        self.revoked = set()
+        self.lock = threading.Lock()
+
+    def get_token_from_refresh_token(self, refresh_token):
+        time.sleep(0.05)
+        with self.lock:
+            self.refreshes += 1
+            count = self.refreshes
+        return Token('access' + str(count), 'refresh' + str(count), 3600,
+                     time.time() + 3600), None
+
+    def get_status(self, car_id, access_token):
+        if access_token in self.revoked:
+            return None, AuthenticationException('AUTHENTICATION_ERROR', 'Token expired', '')
+        return (car_id, access_token), None
+
+
+class TestTokenSession(unittest.TestCase):
+    def test_valid_token_is_used(self):
+        xee = FakeXee()
+        session = TokenSession(xee, Token('access0', 'refresh0', 3600, time.time() + 3600))
+        self.assertEqual(session.get_status(1337), ((1337, 'access0'), None))
+        self.assertEqual(xee.refreshes, 0)
+
+    def test_proactive_single_flight_refresh(self):
+        xee = FakeXee()
+        refreshed = []
+        session = TokenSession(xee, Token('access0', 'refresh0', 3600, time.time() + 30),
+                               on_refresh=refreshed.append)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(session.get_status(1)))
+                   for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(xee.refreshes, 1)
+        self.assertEqual(len(refreshed), 1)
+        self.assertEqual(set(results), {((1, 'access1'), None)})
+
+    def test_retry_after_401(self):
+        xee = FakeXee()
+        xee.revoked.add('access0')
+        session = TokenSession(xee, Token('access0', 'refresh0', 3600, time.time() + 3600))
+        self.assertEqual(session.call('get_status', 1337), ((1337, 'access1'), None))
+        self.assertEqual(session.token.access_token, 'access1')
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# coding: utf8
+import json
+import unittest
+
+from xee.utils import iter_json_array
+
+
+class TestIterJsonArray(unittest.TestCase):
+    items = [
+        {"name": "Odometer", "value": 34512.1, "date": "2016-03-01T02:24:27.116Z"},
+        {"name": "Ville d'été", "value": [1, 2, {"a": "]"}], "date": None},
+        12345,
+        "a string, with [brackets]",
+        True
+    ]
+
+    def test_one_chunk(self):
+        body = json.dumps(self.items).encode('utf-8')
+        self.assertListEqual(list(iter_json_array([body])), self.items)
+
+    def test_byte_per_byte(self):
+        body = json.dumps(self.items, ensure_ascii=False, indent=2).encode('utf-8')
+        chunks = [body[index:index + 1] for index in range(len(body))]
+        self.assertListEqual(list(iter_json_array(chunks)), self.items)
+
+    def test_number_cut_by_chunk(self):
+        self.assertListEqual(list(iter_json_array([b'[-5000000000.', b'0]'])), [-5000000000.0])
+        self.assertListEqual(list(iter_json_array([b'[1, 2e', b'3, 4.5E', b'-1]'])),
+                             [1, 2e3, 4.5e-1])
+        body = b'[12.5e+3, -0.25, 7]'
+        for index in range(len(body)):
+            self.assertListEqual(list(iter_json_array([body[:index], body[index:]])),
+                                 [12.5e+3, -0.25, 7])
+
+    def test_empty(self):
+        self.assertListEqual(list(iter_json_array([])), [])
+        self.assertListEqual(list(iter_json_array([b'[', b' ]'])), [])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, list, iter_json_array([b'{"a": 1}']))
+        self.assertRaises(ValueError, list, iter_json_array([b'[{"a": 1}, {"b"']))
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# coding: utf8
+import unittest
+from datetime import datetime
+
+import responses
+
+from xee.entities import Accelerometer, Location, Signal, Status
+from xee.sdk import Xee
+from xee.watch import StatusWatcher, diff_status
+
+host = "https://cloud.xee.com/v3"
+date = datetime(2016, 3, 1, 2, 24, 27)
+
+
+def status(speed, latitude, battery=12.1):
+    return Status(Location(latitude, 3.0, 10, 5, 90, date), Accelerometer(1, 2, 3, date),
+                  [Signal('VehiSpeed', speed, date), Signal('BatteryVoltage', battery, date)])
+
+
+class TestDiffStatus(unittest.TestCase):
+    def test_first_status(self):
+        signals, location, accelerometer = diff_status(None, status(0, 50.0))
+        self.assertEqual(len(signals), 2)
+        self.assertEqual(location.latitude, 50.0)
+        self.assertEqual(accelerometer.x, 1)
+
+    def test_changes(self):
+        signals, location, accelerometer = diff_status(status(0, 50.0), status(30, 50.1))
+        self.assertEqual(signals, [Signal('VehiSpeed', 30, date)])
+        self.assertEqual(location.latitude, 50.1)
+        self.assertIsNone(accelerometer)
+        self.assertEqual(diff_status(status(0, 50.0), status(0, 50.0)), ([], None, None))
+
+
+class FakeTransport(object):
+    def __init__(self):
+        self.changed = True
+
+    def reset_changed(self):
+        self.changed = False
+
+    def last_changed(self):
+        return self.changed
+
+
+class FakeXee(object):
+    def __init__(self, statuses, cached=()):
+        self.statuses = statuses
+        self.cached = cached
+        self.transport = FakeTransport()
+
+    def get_status(self, car_id, access_token):
+        if car_id not in self.cached:
+            # Sent, a cache hit leaves the flag as it is
+            self.transport.changed = True
+        return self.statuses[car_id].pop(0), None
+
+
+class TestStatusWatcher(unittest.TestCase):
+    def test_intervals(self):
+        xee = FakeXee({})
+        watcher = StatusWatcher(xee, [1], 'token', interval=10, min_interval=2, max_interval=40)
+        change = watcher._update(1, status(0, 50.0), None, True)
+        self.assertEqual(len(change.signals), 2)
+        self.assertEqual(watcher.intervals[1], 10)
+        self.assertIsNone(watcher._update(1, status(0, 50.0), None, True))
+        self.assertEqual(watcher.intervals[1], 20)
+        self.assertIsNone(watcher._update(1, status(0, 50.0), None, False))
+        self.assertIsNone(watcher._update(1, status(0, 50.0), None, True))
+        self.assertEqual(watcher.intervals[1], 40)
+        change = watcher._update(1, status(0, 50.0, battery=12.4), None, True)
+        self.assertEqual([signal.name for signal in change.signals], ['BatteryVoltage'])
+        self.assertEqual(watcher.intervals[1], 10)
+        change = watcher._update(1, status(20, 50.2, battery=12.4), None, True)
+        self.assertEqual(change.location.latitude, 50.2)
+        self.assertEqual(watcher.intervals[1], 2)
+        change = watcher._update(1, None, Exception('Oops'), True)
+        self.assertEqual(str(change.error), 'Oops')
+        self.assertEqual(watcher.intervals[1], 4)
+
+    def test_changed_flag_reset_per_poll(self):
+        xee = FakeXee({'a': [status(0, 50.0)], 'b': [status(0, 40.0)]}, cached=['b'])
+        watcher = StatusWatcher(xee, ['a', 'b'], 'token')
+        self.assertTrue(watcher._poll('a')[2])
+        self.assertFalse(watcher._poll('b')[2])
+
+    def test_iterate(self):
+        xee = FakeXee({
+            'a': [status(0, 50.0), status(0, 50.0), status(10, 50.1)],
+            'b': [status(0, 40.0), status(0, 40.0), status(0, 40.0)],
+        })
+        watcher = StatusWatcher(xee, ['a', 'b'], 'token', interval=0.01, max_interval=0.01)
+        changes = []
+        for change in watcher:
+            changes.append(change)
+            if len(changes) == 3:
+                watcher.stop()
+        self.assertEqual(sorted(change.car_id for change in changes[:2]), ['a', 'b'])
+        self.assertEqual(changes[2].car_id, 'a')
+        self.assertEqual(changes[2].signals, [Signal('VehiSpeed', 10, date)])
+
+    @responses.activate
+    def test_watch_status(self):
+        responses.add(responses.GET, host + "/cars/1337/status", json={
+            "signals": [{"name": "VehiSpeed", "value": 0, "date": "2016-03-01T02:24:27.116Z"}]
+        }, headers={'ETag': '"v1"'}, status=200)
+        responses.add(responses.GET, host + "/cars/1337/status", status=304)
+        client = Xee('toto', 'tata', 'tut')
+        watcher = client.watch_status([1337], "fake_access_token", interval=0.01)
+        changes = []
+        for change in watcher:
+            changes.append(change)
+            watcher.stop()
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(changes[0].signals[0].name, 'VehiSpeed')
@@ -6,3 +6,9 @@
 """
 
 from .sdk import Xee
+
+try:
+    from .aio import AsyncXee
+except SyntaxError:
+    # Python 2 has no async/await, AsyncXee is only available on Python 3.5+
+    pass
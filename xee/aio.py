@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+# coding: utf8
+"""This script contains the asyncio Xee python SDK (requires aiohttp)"""
+
+import asyncio
+import base64
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+import xee.decoding as xee_decoding
+import xee.entities as xee_entities
+import xee.exceptions as xee_exceptions
+import xee.utils as xee_utils
+
+
+class AsyncXee(object):
+    """
+        Asyncio SDK for Xee platform v3.0
+
+        Same endpoints and same (result, error) contract as Xee, every method is a coroutine.
+    """
+
+    def __init__(self, client_id, client_secret, redirect_uri, env='cloud', max_concurrency=100,
+                 connect_timeout=None, read_timeout=None, coalesce=True, host=None,
+                 json_decoder='auto'):
+        """
+        Initialize a new asyncio Xee SDK.
+
+        Parameters
+        ----------
+        client_id       :   str
+                            The client id of your app.
+        client_secret   :   str
+                            The client secret of your app.
+        redirect_uri    :   str
+                            The redirect uri of your app.
+        env             :   str, optional
+                            The environment you want for the requests.
+                            Can be 'cloud' or 'sandbox'.
+                            Default is 'cloud'.
+        max_concurrency :   int, optional
+                            The maximum number of requests in flight at the same time.
+                            Default is 100.
+        connect_timeout :   float, optional
+                            The timeout (in seconds) to establish a connection.
+                            Default is no timeout.
+        read_timeout    :   float, optional
+                            The timeout (in seconds) to wait for the response.
+                            Default is no timeout.
+        coalesce        :   bool, optional
+                            Send a single request for the concurrent identical GET
+                            (same route and token), every caller gets its response.
+                            Default is True.
+        host            :   str, optional
+                            The root (with the version) of the API, overrides env.
+                            Default is https://{env}.xee.com/v3.
+        json_decoder    :   str or callable, optional
+                            The decoder of the JSON bodies, see xee.decoding.get_decoder.
+                            Default is 'auto', the fastest installed one.
+
+        Raises
+        ------
+        ImportError
+            If aiohttp is not installed.
+
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncXee requires aiohttp, install it with `pip install aiohttp`")
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.redirect_uri = redirect_uri
+        self.host = host or 'https://{env}.xee.com/v3'.format(env=env)
+        self.max_concurrency = max_concurrency
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.coalesce = coalesce
+        self.decode = xee_decoding.get_decoder(json_decoder)
+        self._semaphore = None
+        self._session = None
+        self._in_flight = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _get_session(self):
+        # The session and the semaphore are bound to the running loop, create them lazily
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def close(self):
+        """
+        Close every pooled connection.
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get(self, route, access_token):
+        if not self.coalesce:
+            return await self._send(route, access_token)
+        key = (route, access_token)
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._send(route, access_token))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        # Shielded, a cancelled caller does not cancel the request of the others
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.cancelled():
+            # Retrieved, even when every caller was cancelled
+            future.exception()
+
+    async def _send(self, route, access_token):
+        session = self._get_session()
+        async with self._semaphore:
+            headers = {'Authorization': 'Bearer ' + access_token}
+            async with session.get(route, headers=headers) as response:
+                body = await response.read()
+                return xee_utils.check_body(response.status, body, self.decode)
+
+    async def _get_token(self, payload):
+        route = '{host}/auth/access_token'.format(host=self.host)
+        session = self._get_session()
+        credentials = '{id}:{secret}'.format(id=self.client_id, secret=self.client_secret)
+        headers = {'Authorization': 'Basic ' + base64.b64encode(credentials.encode()).decode()}
+        async with self._semaphore:
+            async with session.post(route, data=payload, headers=headers) as response:
+                body = await response.read()
+                if response.status == 200:
+                    return xee_entities.parse_token(self.decode(body)), None
+                else:
+                    return None, Exception(body.decode('utf-8', 'replace'))
+
+    async def _fetch_one(self, route, access_token, parser):
+        try:
+            response = await self._get(route, access_token)
+            return parser(response), None
+        except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
+            return None, err
+
+    async def _fetch_list(self, route, access_token, parser):
+        try:
+            response = await self._get(route, access_token)
+            return [parser(item) for item in response], None
+        except ValueError:
+            # Happens when the list is empty
+            return [], None
+        except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
+            return None, err
+
+    async def get_token_from_code(self, code):
+        """
+        Fetch a new token from an authorization code.
+
+        See Xee.get_token_from_code.
+        """
+        return await self._get_token({'grant_type': 'authorization_code', 'code': code})
+
+    async def get_token_from_refresh_token(self, refresh_token):
+        """
+        Fetch a new token from a refresh token.
+
+        See Xee.get_token_from_refresh_token.
+        """
+        return await self._get_token({'grant_type': 'refresh_token',
+                                      'refresh_token': refresh_token})
+
+    async def get_user(self, access_token):
+        """
+        Fetch info about the connected user.
+
+        See Xee.get_user.
+        """
+        route = '{host}/users/me'.format(host=self.host)
+        return await self._fetch_one(route, access_token, xee_entities.parse_user)
+
+    async def get_cars(self, access_token):
+        """
+        Fetch the cars of the connected user.
+
+        See Xee.get_cars.
+        """
+        route = '{host}/users/me/cars'.format(host=self.host)
+        return await self._fetch_list(route, access_token, xee_entities.parse_car)
+
+    async def get_car(self, car_id, access_token):
+        """
+        Fetch a specific car info.
+
+        See Xee.get_car.
+        """
+        route = '{host}/cars/{car_id}'.format(host=self.host, car_id=car_id)
+        return await self._fetch_one(route, access_token, xee_entities.parse_car)
+
+    async def get_status(self, car_id, access_token):
+        """
+        Fetch the status of a car.
+
+        See Xee.get_status.
+        """
+        route = '{host}/cars/{car_id}/status'.format(host=self.host, car_id=car_id)
+        return await self._fetch_one(route, access_token, xee_entities.parse_status)
+
+    async def get_signals(self, car_id, access_token, **options):
+        """
+        Fetch a list of signals for a specific car within a period.
+
+        See Xee.get_signals.
+        """
+        route = '{host}/cars/{car_id}/signals'.format(host=self.host, car_id=car_id)
+        route = xee_utils.add_params(route, xee_utils.signals_params(options))
+        return await self._fetch_list(route, access_token, xee_entities.parse_signal)
+
+    async def get_locations(self, car_id, access_token, **options):
+        """
+        Fetch a list of locations for a specific car within a period.
+
+        See Xee.get_locations.
+        """
+        route = '{host}/cars/{car_id}/locations'.format(host=self.host, car_id=car_id)
+        route = xee_utils.add_params(route, xee_utils.locations_params(options))
+        return await self._fetch_list(route, access_token, xee_entities.parse_location)
+
+    async def get_trips(self, car_id, access_token, begin=None, end=None):
+        """
+        Fetch a list of trips for a specific car within a period.
+
+        See Xee.get_trips.
+        """
+        route = '{host}/cars/{car_id}/trips'.format(host=self.host, car_id=car_id)
+        route = xee_utils.add_params(route, xee_utils.period_params(begin, end))
+        return await self._fetch_list(route, access_token, xee_entities.parse_trip)
+
+    async def get_used_time(self, car_id, access_token, **options):
+        """
+        Fetch the used time value for a specific car within a period.
+
+        See Xee.get_used_time.
+        """
+        route = '{host}/cars/{car_id}/stats/usedtime'.format(host=self.host, car_id=car_id)
+        route = xee_utils.add_params(route, xee_utils.stat_params(options, int))
+        return await self._fetch_one(route, access_token, xee_entities.parse_used_time)
+
+    async def get_mileage(self, car_id, access_token, **options):
+        """
+        Fetch the mileage value for a specific car within a period.
+
+        See Xee.get_mileage.
+        """
+        route = '{host}/cars/{car_id}/stats/mileage'.format(host=self.host, car_id=car_id)
+        route = xee_utils.add_params(route, xee_utils.stat_params(options, float))
+        return await self._fetch_one(route, access_token, xee_entities.parse_mileage)
+
+    async def get_trip(self, trip_id, access_token):
+        """
+        Fetch a specific trip from a car.
+
+        See Xee.get_trip.
+        """
+        route = '{host}/trips/{trip_id}'.format(host=self.host, trip_id=trip_id)
+        return await self._fetch_one(route, access_token, xee_entities.parse_trip)
+
+    async def get_trip_signals(self, trip_id, access_token, names=None):
+        """
+        Fetch a list of signals for a specific car during a trip.
+
+        See Xee.get_trip_signals.
+        """
+        route = '{host}/trips/{trip_id}/signals'.format(host=self.host, trip_id=trip_id)
+        route = xee_utils.add_params(route, xee_utils.names_params(names))
+        return await self._fetch_list(route, access_token, xee_entities.parse_signal)
+
+    async def get_trip_locations(self, trip_id, access_token):
+        """
+        Fetch a list of locations for a specific car during a trip.
+
+        See Xee.get_trip_locations.
+        """
+        route = '{host}/trips/{trip_id}/locations'.format(host=self.host, trip_id=trip_id)
+        return await self._fetch_list(route, access_token, xee_entities.parse_location)
+
+    async def get_trip_stats(self, trip_id, access_token):
+        """
+        Fetch a list of stats for a specific trip.
+
+        See Xee.get_trip_stats.
+        """
+        route = '{host}/trips/{trip_id}/stats'.format(host=self.host, trip_id=trip_id)
+        return await self._fetch_list(route, access_token, xee_entities.parse_trip_stat)
+
+    async def get_trip_mileage(self, trip_id, access_token):
+        """
+        Fetch trip mileage stat.
+
+        See Xee.get_trip_mileage.
+        """
+        route = '{host}/trips/{trip_id}/stats/mileage'.format(host=self.host, trip_id=trip_id)
+        return await self._fetch_one(route, access_token, xee_entities.parse_trip_stat)
+
+    async def get_trip_duration(self, trip_id, access_token):
+        """
+        Fetch trip duration stat.
+
+        See Xee.get_trip_duration.
+        """
+        route = '{host}/trips/{trip_id}/stats/usedtime'.format(host=self.host, trip_id=trip_id)
+        return await self._fetch_one(route, access_token, xee_entities.parse_trip_stat)
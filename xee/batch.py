@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# coding: utf8
+"""This script contains the batch executor for fleet-wide calls"""
+
+import concurrent.futures
+
+import xee.entities as xee_entities
+
+# The sub-resources a TripBundle can include, and the Xee method loading them
+TRIP_INCLUDES = {
+    'signals': 'get_trip_signals',
+    'locations': 'get_trip_locations',
+    'stats': 'get_trip_stats',
+    'mileage': 'get_trip_mileage',
+    'duration': 'get_trip_duration',
+}
+
+
+class Batch(object):
+    """
+        Run Xee endpoint methods on a worker pool with a bounded concurrency.
+
+        Every item keeps its own (result, error) tuple, a failing item never aborts the batch.
+    """
+
+    def __init__(self, xee, max_workers=10):
+        """
+        Initialize a new batch executor.
+
+        Parameters
+        ----------
+        xee         :   Xee
+                        The SDK to run the calls with.
+        max_workers :   int, optional
+                        The maximum number of calls running at the same time.
+                        Keep it below the transport pool size to reuse the connections.
+                        Default is 10.
+
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be a non 0 positive integer, "
+                             + str(max_workers) + " given")
+        self.xee = xee
+        self.max_workers = max_workers
+
+    def _call(self, method, args, options):
+        try:
+            return method(*args, **options)
+        except Exception as err:  # pylint: disable=broad-except
+            # A network error on one item must not abort the whole batch
+            return None, err
+
+    def _resolve(self, method):
+        if callable(method):
+            return method
+        return getattr(self.xee, method)
+
+    def as_completed(self, method, args_list, **options):
+        """
+        Run a method for every arguments and yield the results as they complete.
+
+        Parameters
+        ----------
+        method      :   str or callable
+                        The name of the Xee method to call (for example 'get_status'),
+                        or the callable itself.
+        args_list   :   iterable
+                        The positional arguments of every call (a tuple per call).
+        options     :   optional
+                        Keyword arguments given to every call.
+
+        Returns
+        -------
+        generator
+            Yields (index, (result, error)) in completion order,
+            index being the position of the arguments in args_list.
+
+        """
+        method = self._resolve(method)
+        args_iterator = enumerate(args_list)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {}
+
+            def submit_next():
+                for index, args in args_iterator:
+                    if not isinstance(args, tuple):
+                        args = (args,)
+                    pending[executor.submit(self._call, method, args, options)] = index
+                    return True
+                return False
+
+            # Only keep a window of calls in flight so huge inputs stay cheap in memory
+            for _ in range(self.max_workers * 2):
+                if not submit_next():
+                    break
+            while pending:
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    submit_next()
+                    yield index, future.result()
+
+    def map(self, method, args_list, **options):
+        """
+        Run a method for every arguments and return the results in the input order.
+
+        Parameters
+        ----------
+        method      :   str or callable
+                        The name of the Xee method to call (for example 'get_status'),
+                        or the callable itself.
+        args_list   :   iterable
+                        The positional arguments of every call (a tuple per call).
+        options     :   optional
+                        Keyword arguments given to every call.
+
+        Returns
+        -------
+        list
+            A list of (result, error) tuples, in the same order as args_list.
+
+        """
+        results = {}
+        for index, result in self.as_completed(method, args_list, **options):
+            results[index] = result
+        return [results[index] for index in range(len(results))]
+
+    def get_car_many(self, car_ids, access_token):
+        """
+        Fetch many cars info.
+
+        Returns
+        -------
+        list
+            A list of (Car, Error) tuples, in the same order as car_ids.
+
+        """
+        return self.map('get_car', [(car_id, access_token) for car_id in car_ids])
+
+    def get_status_many(self, car_ids, access_token):
+        """
+        Fetch the status of many cars.
+
+        Returns
+        -------
+        list
+            A list of (Status, Error) tuples, in the same order as car_ids.
+
+        """
+        return self.map('get_status', [(car_id, access_token) for car_id in car_ids])
+
+    def get_used_time_many(self, car_ids, access_token, **options):
+        """
+        Fetch the used time value of many cars within a period (see Xee.get_used_time).
+
+        Returns
+        -------
+        list
+            A list of (UsedTimeStat, Error) tuples, in the same order as car_ids.
+
+        """
+        return self.map('get_used_time', [(car_id, access_token) for car_id in car_ids],
+                        **options)
+
+    def get_mileage_many(self, car_ids, access_token, **options):
+        """
+        Fetch the mileage value of many cars within a period (see Xee.get_mileage).
+
+        Returns
+        -------
+        list
+            A list of (MileageStat, Error) tuples, in the same order as car_ids.
+
+        """
+        return self.map('get_mileage', [(car_id, access_token) for car_id in car_ids],
+                        **options)
+
+    def get_trip_many(self, trip_ids, access_token):
+        """
+        Fetch many trips.
+
+        Returns
+        -------
+        list
+            A list of (Trip, Error) tuples, in the same order as trip_ids.
+
+        """
+        return self.map('get_trip', [(trip_id, access_token) for trip_id in trip_ids])
+
+    def get_trip_stats_many(self, trip_ids, access_token):
+        """
+        Fetch the stats of many trips.
+
+        Returns
+        -------
+        list
+            A list of ([TripStat], Error) tuples, in the same order as trip_ids.
+
+        """
+        return self.map('get_trip_stats', [(trip_id, access_token) for trip_id in trip_ids])
+
+    def get_trip_mileage_many(self, trip_ids, access_token):
+        """
+        Fetch the mileage stat of many trips.
+
+        Returns
+        -------
+        list
+            A list of (TripStat, Error) tuples, in the same order as trip_ids.
+
+        """
+        return self.map('get_trip_mileage', [(trip_id, access_token) for trip_id in trip_ids])
+
+    def get_trip_duration_many(self, trip_ids, access_token):
+        """
+        Fetch the duration stat of many trips.
+
+        Returns
+        -------
+        list
+            A list of (TripStat, Error) tuples, in the same order as trip_ids.
+
+        """
+        return self.map('get_trip_duration', [(trip_id, access_token) for trip_id in trip_ids])
+
+    def get_trip_bundle_many(self, trips, access_token, include=None):
+        """
+        Fetch the sub-resources of many trips, all of them on the worker pool.
+
+        Parameters
+        ----------
+        trips           :   list
+                            The Trips to load the sub-resources of.
+        access_token    :   str
+                            the access token of the user.
+        include         :   list, optional
+                            The sub-resources to load: 'signals', 'locations', 'stats',
+                            'mileage' and / or 'duration'.
+                            Default is all of them.
+
+        Returns
+        -------
+        list
+            A list of TripBundle, in the same order as trips. The sub-resources not
+            included are None, the errors are given by sub-resource in errors.
+
+        Raises
+        ------
+        ValueError
+            If an unknown sub-resource is included.
+
+        """
+        include = sorted(TRIP_INCLUDES) if include is None else list(include)
+        for resource in include:
+            if resource not in TRIP_INCLUDES:
+                raise ValueError("include must be in " + str(sorted(TRIP_INCLUDES)) + ", "
+                                 + str(resource) + " given")
+        calls = [(trip_index, resource) for trip_index in range(len(trips))
+                 for resource in include]
+        loaded = [{} for _ in trips]
+        errors = [{} for _ in trips]
+
+        def load(trip_index, resource):
+            return getattr(self.xee, TRIP_INCLUDES[resource])(trips[trip_index].id, access_token)
+
+        for index, (result, err) in self.as_completed(load, calls):
+            trip_index, resource = calls[index]
+            if err is not None:
+                errors[trip_index][resource] = err
+            else:
+                loaded[trip_index][resource] = result
+        return [xee_entities.TripBundle(trip, errors=errors[trip_index],
+                                        **dict((resource, loaded[trip_index].get(resource))
+                                               for resource in TRIP_INCLUDES))
+                for trip_index, trip in enumerate(trips)]
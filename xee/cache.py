@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# coding: utf8
+"""This script contains the in-memory response cache of the SDK"""
+
+import collections
+import threading
+import time
+
+try:
+    monotonic = time.monotonic
+except AttributeError:
+    # Python 2, no monotonic clock in the standard library
+    monotonic = time.time
+
+CachePolicy = collections.namedtuple(
+    'CachePolicy',
+    [
+        'ttl',
+        'stale_while_revalidate'
+    ])
+
+# ttl None means forever (the resource never changes), 0 means not cached
+FOREVER = CachePolicy(None, 0)
+NO_CACHE = CachePolicy(0, 0)
+
+DEFAULT_POLICIES = {
+    'get_user': CachePolicy(300, 0),
+    'get_cars': CachePolicy(300, 0),
+    'get_car': CachePolicy(300, 0),
+    'get_status': CachePolicy(5, 30),
+    # Finished trips (and everything computed from them) never change
+    'get_trip': FOREVER,
+    'get_trip_signals': FOREVER,
+    'get_trip_locations': FOREVER,
+    'get_trip_stats': FOREVER,
+    'get_trip_mileage': FOREVER,
+    'get_trip_duration': FOREVER,
+}
+
+CacheStats = collections.namedtuple(
+    'CacheStats',
+    [
+        'hits',
+        'misses',
+        'stale_hits',
+        'evictions',
+        'size',
+        'bytes'
+    ])
+
+
+class ResponseCache(object):
+    """
+        Thread safe LRU cache of the decoded responses, with per endpoint TTL policies.
+
+        Entries are keyed by endpoint, route and access token so users never share data.
+        The cached responses are shared between callers and must not be mutated.
+        The memory is bounded by the number of entries and by the total size of the raw
+        bodies they were decoded from.
+    """
+
+    def __init__(self, max_entries=1024, policies=None, clock=monotonic, max_bytes=67108864):
+        """
+        Initialize a new cache.
+
+        Parameters
+        ----------
+        max_entries :   int, optional
+                        The maximum number of responses kept, the least recently used
+                        ones are evicted first.
+                        Default is 1024.
+        policies    :   dict, optional
+                        The CachePolicy by endpoint (Xee method name), merged over
+                        DEFAULT_POLICIES. The endpoints without policy are not cached.
+        clock       :   callable, optional
+                        The clock the ages are measured with, in seconds.
+                        Default is time.monotonic (time.time on Python 2).
+        max_bytes   :   int, optional
+                        The maximum total size (in bytes, of the raw bodies) of the kept
+                        responses, the least recently used ones are evicted first and a
+                        larger response is not kept at all.
+                        Default is 64 MiB.
+
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policies = dict(DEFAULT_POLICIES)
+        if policies is not None:
+            self.policies.update(policies)
+        self.clock = clock
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stale_hits = 0
+        self._evictions = 0
+
+    def fetch(self, endpoint, route, access_token, loader):
+        """
+        Get a response from the cache, or load it.
+
+        Parameters
+        ----------
+        endpoint        :   str
+                            The endpoint (Xee method name) the route belongs to.
+        route           :   str
+                            The route to call (fully).
+        access_token    :   str
+                            The access token of the user.
+        loader          :   callable
+                            loader(route, access_token) returning a tuple of the decoded
+                            response and the size (in bytes) of its raw body.
+
+        Returns
+        -------
+        dict
+            The decoded response, the errors of the loader are raised and never cached.
+
+        """
+        policy = self.policies.get(endpoint, NO_CACHE)
+        if policy.ttl == 0:
+            return loader(route, access_token)[0]
+        key = (endpoint, route, access_token)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                response, stored_at, _ = entry
+                age = now - stored_at
+                if policy.ttl is None or age < policy.ttl:
+                    self._touch(key)
+                    self._hits += 1
+                    return response
+                if age < policy.ttl + policy.stale_while_revalidate:
+                    self._touch(key)
+                    self._stale_hits += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        refresh = threading.Thread(target=self._refresh,
+                                                   args=(key, loader))
+                        refresh.daemon = True
+                        refresh.start()
+                    return response
+            self._misses += 1
+        response, size = loader(route, access_token)
+        self._store(key, response, size)
+        return response
+
+    def _touch(self, key):
+        # Move the entry to the most recently used end
+        self._entries[key] = self._entries.pop(key)
+
+    def _refresh(self, key, loader):
+        try:
+            response, size = loader(key[1], key[2])
+            self._store(key, response, size)
+        except Exception:  # pylint: disable=broad-except
+            # The stale entry expires by itself, the next call reports the error
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, key, response, size):
+        with self._lock:
+            self._drop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (response, self.clock(), size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2]
+                self._evictions += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def invalidate(self, access_token=None):
+        """
+        Drop cached responses.
+
+        Parameters
+        ----------
+        access_token    :   str, optional
+                            Only drop the responses of this access token.
+                            Default is every response.
+
+        """
+        with self._lock:
+            if access_token is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                for key in [key for key in self._entries if key[2] == access_token]:
+                    self._drop(key)
+
+    def stats(self):
+        """
+        Get the counters of the cache.
+
+        Returns
+        -------
+        tuple
+            A CacheStats namedtuple (hits, misses, stale_hits, evictions, size, bytes),
+            size is the number of entries and bytes the total size of their raw bodies.
+
+        """
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._stale_hits, self._evictions,
+                              len(self._entries), self._bytes)
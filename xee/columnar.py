@@ -0,0 +1,528 @@
+#!/usr/bin/env python
+# coding: utf8
+"""This script contains the columnar result types (compact arrays instead of namedtuples)"""
+
+import array
+import bisect
+import datetime
+import heapq
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import isodate
+
+import xee.entities as xee_entities
+import xee.exceptions as xee_exceptions
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=isodate.UTC)
+
+# Mean radius of the earth, in metres
+EARTH_RADIUS = 6371008.8
+
+
+def to_timestamp(date):
+    """
+    Convert an aware datetime to seconds since epoch.
+    """
+    return (date - EPOCH).total_seconds()
+
+
+def from_timestamp(timestamp):
+    """
+    Convert seconds since epoch to an aware (UTC) datetime.
+    """
+    return EPOCH + datetime.timedelta(seconds=timestamp)
+
+
+def _to_float(value):
+    if value is None:
+        return float('nan')
+    return float(value)
+
+
+def _from_float(value):
+    # NaN is only stored for None, JSON has no NaN
+    return None if value != value else value
+
+
+class SignalFrame(object):
+    """
+        Signals grouped by name, stored as compact columns.
+
+        Every name holds two array('d') columns sorted by time: the timestamps
+        (seconds since epoch, UTC) and the values (None becomes NaN). The values
+        are stored as floats: iterating the frame gives float values (or None),
+        not the original ints or bools.
+    """
+
+    def __init__(self, columns=None):
+        """
+        Initialize a new frame.
+
+        Parameters
+        ----------
+        columns :   dict, optional
+                    The columns by signal name, as (timestamps, values) arrays.
+                    Default is an empty frame.
+
+        """
+        self._columns = columns if columns is not None else {}
+
+    @classmethod
+    def from_dicts(cls, signals):
+        """
+        Build a frame from signals as decoded from the API.
+
+        Parameters
+        ----------
+        signals :   iterable
+                    The signals as dicts (name, value, date).
+
+        Returns
+        -------
+        SignalFrame
+            The frame, without any Signal namedtuple built.
+
+        Raises
+        ------
+        ParseException
+            If a signal misses a field, has an invalid date or a non numeric value.
+
+        """
+        try:
+            return cls._build((signal['name'], signal['value'],
+                               to_timestamp(xee_entities.parse_datetime(signal['date'])))
+                              for signal in signals)
+        except (KeyError, TypeError, ValueError) as err:
+            raise xee_exceptions.ParseException(err)
+
+    @classmethod
+    def from_signals(cls, signals):
+        """
+        Build a frame from Signal namedtuples.
+
+        Parameters
+        ----------
+        signals :   iterable
+                    The signals.
+
+        Returns
+        -------
+        SignalFrame
+            The frame.
+
+        """
+        return cls._build((signal.name, signal.value, to_timestamp(signal.date))
+                          for signal in signals)
+
+    @classmethod
+    def _build(cls, rows):
+        columns = {}
+        unsorted = set()
+        for name, value, timestamp in rows:
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = (array.array('d'), array.array('d'))
+            timestamps, values = column
+            if timestamps and timestamp < timestamps[-1]:
+                unsorted.add(name)
+            timestamps.append(timestamp)
+            values.append(_to_float(value))
+        for name in unsorted:
+            timestamps, values = columns[name]
+            order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+            columns[name] = (array.array('d', [timestamps[index] for index in order]),
+                             array.array('d', [values[index] for index in order]))
+        return cls(columns)
+
+    @property
+    def names(self):
+        """
+        The signal names of the frame, sorted.
+        """
+        return sorted(self._columns)
+
+    def __len__(self):
+        return sum(len(timestamps) for timestamps, _ in self._columns.values())
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def __iter__(self):
+        """
+        Iterate over the signals as Signal namedtuples, in time order.
+
+        The values are floats, None for the signals without value.
+        """
+        def iter_column(name):
+            timestamps, values = self._columns[name]
+            for index in range(len(timestamps)):
+                yield timestamps[index], name, values[index]
+
+        for timestamp, name, value in heapq.merge(*[iter_column(name) for name in self.names]):
+            yield xee_entities.Signal(name, _from_float(value), from_timestamp(timestamp))
+
+    def column(self, name):
+        """
+        Get the columns of a signal.
+
+        Parameters
+        ----------
+        name    :   str
+                    The signal name.
+
+        Returns
+        -------
+        tuple
+            A tuple containing the timestamps and values arrays.
+
+        Raises
+        ------
+        KeyError
+            If the frame has no such signal.
+
+        """
+        return self._columns[name]
+
+    def to_numpy(self, name):
+        """
+        Get the columns of a signal as NumPy arrays, without any copy.
+
+        Parameters
+        ----------
+        name    :   str
+                    The signal name.
+
+        Returns
+        -------
+        tuple
+            A tuple containing the timestamps and values float64 arrays,
+            views over the frame memory.
+
+        Raises
+        ------
+        ImportError
+            If NumPy is not installed.
+
+        """
+        if numpy is None:
+            raise ImportError("to_numpy requires numpy, install it with `pip install numpy`")
+        timestamps, values = self._columns[name]
+        return (numpy.frombuffer(timestamps, dtype=numpy.float64),
+                numpy.frombuffer(values, dtype=numpy.float64))
+
+    def select(self, names):
+        """
+        Keep only some signals.
+
+        Parameters
+        ----------
+        names   :   list
+                    The signal names to keep.
+
+        Returns
+        -------
+        SignalFrame
+            A new frame sharing the columns of this one.
+
+        """
+        return SignalFrame(dict((name, self._columns[name])
+                                for name in names if name in self._columns))
+
+    def slice(self, begin=None, end=None):
+        """
+        Keep only the signals within [begin, end).
+
+        Parameters
+        ----------
+        begin   :   datetime, optional
+                    The first datetime to keep.
+                    Default is no lower bound.
+        end     :   datetime, optional
+                    The datetime to stop before.
+                    Default is no upper bound.
+
+        Returns
+        -------
+        SignalFrame
+            A new frame.
+
+        """
+        columns = {}
+        for name, (timestamps, values) in self._columns.items():
+            first = 0 if begin is None else bisect.bisect_left(timestamps, to_timestamp(begin))
+            last = len(timestamps)
+            if end is not None:
+                last = bisect.bisect_left(timestamps, to_timestamp(end))
+            columns[name] = (timestamps[first:last], values[first:last])
+        return SignalFrame(columns)
+
+
+class LocationTrack(object):
+    """
+        Locations stored as packed columns, sorted by time.
+
+        Columns are array('d') for the timestamps (seconds since epoch, UTC), latitudes,
+        longitudes, altitudes and headings (None becomes NaN) and array('i') for the
+        satellites (None becomes -1). The geometry helpers use NumPy when installed.
+    """
+
+    FIELDS = ('timestamps', 'latitudes', 'longitudes', 'altitudes', 'headings', 'satellites')
+
+    def __init__(self, columns=None):
+        """
+        Initialize a new track.
+
+        Parameters
+        ----------
+        columns :   dict, optional
+                    The columns by field name (see LocationTrack.FIELDS).
+                    Default is an empty track.
+
+        """
+        if columns is None:
+            columns = dict((field, array.array('i' if field == 'satellites' else 'd'))
+                           for field in self.FIELDS)
+        self._columns = columns
+
+    @classmethod
+    def from_dicts(cls, locations):
+        """
+        Build a track from locations as decoded from the API.
+
+        Parameters
+        ----------
+        locations   :   iterable
+                        The locations as dicts.
+
+        Returns
+        -------
+        LocationTrack
+            The track, without any Location namedtuple built.
+
+        Raises
+        ------
+        ParseException
+            If a location misses a field, has an invalid date or a non numeric value.
+
+        """
+        try:
+            return cls._build((to_timestamp(xee_entities.parse_datetime(location['date'])),
+                               location['latitude'], location['longitude'],
+                               location['altitude'], location['heading'],
+                               location['satellites'])
+                              for location in locations)
+        except (KeyError, TypeError, ValueError) as err:
+            raise xee_exceptions.ParseException(err)
+
+    @classmethod
+    def from_locations(cls, locations):
+        """
+        Build a track from Location namedtuples.
+
+        Parameters
+        ----------
+        locations   :   iterable
+                        The locations.
+
+        Returns
+        -------
+        LocationTrack
+            The track.
+
+        """
+        return cls._build((to_timestamp(location.date), location.latitude, location.longitude,
+                           location.altitude, location.heading, location.satellites)
+                          for location in locations)
+
+    @classmethod
+    def _build(cls, rows):
+        track = cls()
+        columns = [track._columns[field] for field in cls.FIELDS]
+        is_sorted = True
+        for row in rows:
+            if is_sorted and columns[0] and row[0] < columns[0][-1]:
+                is_sorted = False
+            for index in range(5):
+                columns[index].append(_to_float(row[index]))
+            columns[5].append(-1 if row[5] is None else int(row[5]))
+        if not is_sorted:
+            order = sorted(range(len(columns[0])), key=columns[0].__getitem__)
+            for field, column in zip(cls.FIELDS, columns):
+                track._columns[field] = array.array(column.typecode,
+                                                    [column[index] for index in order])
+        return track
+
+    def __len__(self):
+        return len(self._columns['timestamps'])
+
+    def __iter__(self):
+        """
+        Iterate over the locations as Location namedtuples, in time order.
+
+        The coordinates are floats, None for the altitudes, headings and satellites
+        the API did not send.
+        """
+        columns = [self._columns[field] for field in self.FIELDS]
+        for timestamp, latitude, longitude, altitude, heading, satellites in zip(*columns):
+            yield xee_entities.Location(latitude, longitude, _from_float(altitude),
+                                        None if satellites < 0 else satellites,
+                                        _from_float(heading), from_timestamp(timestamp))
+
+    def column(self, field):
+        """
+        Get a column of the track.
+
+        Parameters
+        ----------
+        field   :   str
+                    The field name (see LocationTrack.FIELDS).
+
+        Returns
+        -------
+        array.array
+            The column.
+
+        """
+        return self._columns[field]
+
+    def to_numpy(self, field):
+        """
+        Get a column of the track as a NumPy array, without any copy.
+
+        Parameters
+        ----------
+        field   :   str
+                    The field name (see LocationTrack.FIELDS).
+
+        Returns
+        -------
+        numpy.ndarray
+            A view over the track memory.
+
+        Raises
+        ------
+        ImportError
+            If NumPy is not installed.
+
+        """
+        if numpy is None:
+            raise ImportError("to_numpy requires numpy, install it with `pip install numpy`")
+        column = self._columns[field]
+        return numpy.frombuffer(column, dtype=numpy.float64 if column.typecode == 'd'
+                                else numpy.intc)
+
+    def segment_distances(self):
+        """
+        Compute the haversine distance of every segment of the track.
+
+        Returns
+        -------
+        array.array or numpy.ndarray
+            The len(track) - 1 distances, in metres.
+
+        """
+        if len(self) < 2:
+            return array.array('d')
+        if numpy is not None:
+            latitudes = numpy.radians(self.to_numpy('latitudes'))
+            longitudes = numpy.radians(self.to_numpy('longitudes'))
+            sin_latitudes = numpy.sin(numpy.diff(latitudes) / 2)
+            sin_longitudes = numpy.sin(numpy.diff(longitudes) / 2)
+            hav = sin_latitudes ** 2 + numpy.cos(latitudes[:-1]) * numpy.cos(latitudes[1:]) \
+                * sin_longitudes ** 2
+            return 2 * EARTH_RADIUS * numpy.arcsin(numpy.sqrt(numpy.minimum(hav, 1.0)))
+        latitudes = [math.radians(latitude) for latitude in self._columns['latitudes']]
+        longitudes = [math.radians(longitude) for longitude in self._columns['longitudes']]
+        cos_latitudes = [math.cos(latitude) for latitude in latitudes]
+        distances = array.array('d')
+        for index in range(1, len(latitudes)):
+            sin_latitude = math.sin((latitudes[index] - latitudes[index - 1]) / 2)
+            sin_longitude = math.sin((longitudes[index] - longitudes[index - 1]) / 2)
+            hav = sin_latitude * sin_latitude + cos_latitudes[index - 1] \
+                * cos_latitudes[index] * sin_longitude * sin_longitude
+            distances.append(2 * EARTH_RADIUS * math.asin(math.sqrt(min(hav, 1.0))))
+        return distances
+
+    def distance(self):
+        """
+        Compute the total haversine distance of the track.
+
+        Returns
+        -------
+        float
+            The distance, in metres.
+
+        """
+        return float(sum(self.segment_distances()))
+
+    def speeds(self):
+        """
+        Compute the speed of every segment of the track.
+
+        Returns
+        -------
+        array.array or numpy.ndarray
+            The len(track) - 1 speeds, in metres per second
+            (NaN when two locations share the same date).
+
+        """
+        distances = self.segment_distances()
+        if numpy is not None and len(distances):
+            durations = numpy.diff(self.to_numpy('timestamps'))
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                return numpy.where(durations > 0, distances / durations, numpy.nan)
+        timestamps = self._columns['timestamps']
+        speeds = array.array('d')
+        for index, distance in enumerate(distances):
+            duration = timestamps[index + 1] - timestamps[index]
+            speeds.append(distance / duration if duration > 0 else float('nan'))
+        return speeds
+
+    def bounding_box(self):
+        """
+        Compute the bounding box of the track.
+
+        Returns
+        -------
+        tuple
+            A tuple containing min latitude, min longitude, max latitude, max longitude.
+            None if the track is empty.
+
+        """
+        if not len(self):
+            return None
+        latitudes = self._columns['latitudes']
+        longitudes = self._columns['longitudes']
+        return min(latitudes), min(longitudes), max(latitudes), max(longitudes)
+
+    def slice(self, begin=None, end=None):
+        """
+        Keep only the locations within [begin, end).
+
+        Parameters
+        ----------
+        begin   :   datetime, optional
+                    The first datetime to keep.
+                    Default is no lower bound.
+        end     :   datetime, optional
+                    The datetime to stop before.
+                    Default is no upper bound.
+
+        Returns
+        -------
+        LocationTrack
+            A new track.
+
+        """
+        timestamps = self._columns['timestamps']
+        first = 0 if begin is None else bisect.bisect_left(timestamps, to_timestamp(begin))
+        last = len(timestamps)
+        if end is not None:
+            last = bisect.bisect_left(timestamps, to_timestamp(end))
+        return LocationTrack(dict((field, column[first:last])
+                                  for field, column in self._columns.items()))
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# coding: utf8
+"""This script contains the JSON decoders the responses bodies are decoded with"""
+
+import json
+
+
+def _stdlib_loads(body):
+    if isinstance(body, bytes):
+        body = body.decode('utf-8')
+    return json.loads(body)
+
+
+def _strict(loads):
+    # The SDK relies on ValueError for the empty / invalid bodies, whatever the decoder
+    def decode(body):
+        try:
+            return loads(body)
+        except ValueError:
+            raise
+        except Exception as error:  # pylint: disable=broad-except
+            raise ValueError(str(error))
+    return decode
+
+
+def _load_orjson():
+    import orjson  # pylint: disable=import-error
+    return orjson.loads
+
+
+def _load_simdjson():
+    import simdjson  # pylint: disable=import-error
+    return _strict(simdjson.loads)
+
+
+def _load_ujson():
+    import ujson  # pylint: disable=import-error
+    return _strict(ujson.loads)
+
+
+DECODERS = (
+    ('orjson', _load_orjson),
+    ('simdjson', _load_simdjson),
+    ('ujson', _load_ujson),
+    ('json', lambda: _stdlib_loads),
+)
+
+_LOADED = {}
+
+
+def available_decoders():
+    """
+    List the JSON decoders that can be used here, fastest first.
+
+    Returns
+    -------
+    list
+        The names of the installed decoders, 'json' (stdlib) is always the last one.
+
+    """
+    return [name for name, _ in DECODERS if _load(name) is not None]
+
+
+def _load(name):
+    if name not in _LOADED:
+        loader = dict(DECODERS)[name]
+        try:
+            _LOADED[name] = loader()
+        except ImportError:
+            _LOADED[name] = None
+    return _LOADED[name]
+
+
+def get_decoder(decoder='auto'):
+    """
+    Get the function decoding a JSON body from its raw bytes.
+
+    Parameters
+    ----------
+    decoder :   str or callable, optional
+                'auto' for the fastest installed decoder (orjson, simdjson, ujson then
+                the stdlib json), the name of one of them, or a function decoding bytes.
+                Default is 'auto'.
+
+    Returns
+    -------
+    callable
+        The function decoding bytes to the JSON value, raising ValueError if invalid.
+
+    Raises
+    ------
+    ValueError
+        If the decoder is unknown or not installed.
+
+    """
+    if callable(decoder):
+        return decoder
+    if decoder == 'auto':
+        return _load(available_decoders()[0])
+    if decoder not in dict(DECODERS):
+        raise ValueError('Unknown JSON decoder {decoder}, use one of {names}'.format(
+            decoder=decoder, names=', '.join(name for name, _ in DECODERS)))
+    loads = _load(decoder)
+    if loads is None:
+        raise ValueError('The JSON decoder {decoder} is not installed'.format(decoder=decoder))
+    return loads
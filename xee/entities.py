@@ -3,6 +3,8 @@
 """This script contains the parsers for the 3rd version of the API"""
 
 import collections
+import datetime
+
 import isodate
 
 import xee.exceptions as xee_exceptions
@@ -105,10 +107,89 @@ TripStat = collections.namedtuple(
         'type',
         'value'
     ])
+TripBundle = collections.namedtuple(
+    'TripBundle',
+    [
+        'trip',
+        'signals',
+        'locations',
+        'stats',
+        'mileage',
+        'duration',
+        'errors'
+    ])
+SignalBucket = collections.namedtuple(
+    'SignalBucket',
+    [
+        'name',
+        'begin',
+        'end',
+        'count',
+        'min',
+        'max',
+        'mean',
+        'first',
+        'last'
+    ])
 
 
 # Parsers
 
+_TZINFOS = {}
+
+
+def parse_datetime(value):
+    """
+    Parse an ISO 8601 datetime, as returned by the API.
+
+    The format of the API (2016-01-11T00:00:00+00:00, 2016-03-01T02:24:27.116Z...)
+    is parsed by slicing, anything else falls back to isodate.
+
+    Parameters
+    ----------
+    value : str
+            The datetime as a string.
+
+    Returns
+    -------
+    datetime
+        The parsed datetime (with the same tzinfo isodate would give).
+
+    Raises
+    ------
+    ValueError
+        If the string is not an ISO 8601 datetime.
+
+    """
+    if len(value) < 20 or value[4] != '-' or value[7] != '-' or value[10] != 'T' \
+            or value[13] != ':' or value[16] != ':':
+        return isodate.parse_datetime(value)
+    microsecond = 0
+    index = 19
+    if value[19] == '.':
+        index = 20
+        while index < len(value) and '0' <= value[index] <= '9':
+            index += 1
+        fraction = value[20:index]
+        if not fraction:
+            return isodate.parse_datetime(value)
+        microsecond = int(fraction[:6].ljust(6, '0'))
+    tz_string = value[index:]
+    tzinfo = _TZINFOS.get(tz_string)
+    if tzinfo is None:
+        if tz_string != 'Z' and (len(tz_string) != 6 or tz_string[0] not in '+-'
+                                 or tz_string[3] != ':'):
+            return isodate.parse_datetime(value)
+        tzinfo = _TZINFOS[tz_string] = isodate.parse_tzinfo(tz_string)
+    try:
+        return datetime.datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                                 int(value[11:13]), int(value[14:16]), int(value[17:19]),
+                                 microsecond, tzinfo)
+    except ValueError:
+        # Not digits, let isodate tell what is wrong
+        return isodate.parse_datetime(value)
+
+
 def parse_token(token):
     """
     Parse a Token from a dict representation.
@@ -164,10 +245,10 @@ def parse_user(user):
     """
     birth_date = None
     if user['birthDate']:
-        birth_date = isodate.parse_datetime(user['birthDate'])
+        birth_date = parse_datetime(user['birthDate'])
     licence_delivery_date = None
     if user['licenseDeliveryDate']:
-        licence_delivery_date = isodate.parse_datetime(user['licenseDeliveryDate'])
+        licence_delivery_date = parse_datetime(user['licenseDeliveryDate'])
     try:
         return User(
             user['id'],
@@ -220,7 +301,7 @@ def parse_car(car):
         raise xee_exceptions.ParseException(err)
 
 
-def parse_signal(signal):
+def parse_signal(signal, lazy=False):
     """
     Parse a Signal from a a dict representation.
 
@@ -228,6 +309,9 @@ def parse_signal(signal):
     ----------
     signal  :   dict
                 The signal as a dict.
+    lazy    :   bool, optional
+                Return a lazy entity, the fields are decoded on first access.
+                Default is False.
 
     Returns
     -------
@@ -241,17 +325,19 @@ def parse_signal(signal):
         If the dict does not contains the correct data.
 
     """
+    if lazy:
+        return LazySignal(signal)
     try:
         return Signal(
             signal['name'],
             signal['value'],
-            isodate.parse_datetime(signal['date'])
+            parse_datetime(signal['date'])
         )
     except ValueError as err:
         raise xee_exceptions.ParseException(err)
 
 
-def parse_location(location):
+def parse_location(location, lazy=False):
     """
     Parse a Location from a a dict representation.
 
@@ -259,6 +345,9 @@ def parse_location(location):
     ----------
     location  : dict
                 The signal as a dict.
+    lazy    :   bool, optional
+                Return a lazy entity, the fields are decoded on first access.
+                Default is False.
 
     Returns
     -------
@@ -272,6 +361,8 @@ def parse_location(location):
         If the dict does not contains the correct data.
 
     """
+    if lazy:
+        return LazyLocation(location)
     try:
         return Location(
             location['latitude'],
@@ -279,13 +370,13 @@ def parse_location(location):
             location['altitude'],
             location['satellites'],
             location['heading'],
-            isodate.parse_datetime(location['date'])
+            parse_datetime(location['date'])
         )
     except ValueError as err:
         raise xee_exceptions.ParseException(err)
 
 
-def parse_status(status):
+def parse_status(status, lazy=False):
     """
     Parse a Status from a a dict representation.
 
@@ -293,6 +384,9 @@ def parse_status(status):
     ----------
     status  :   dict
                 The status as a dict.
+    lazy    :   bool, optional
+                Return a lazy entity, the fields are decoded on first access.
+                Default is False.
 
     Returns
     -------
@@ -306,28 +400,38 @@ def parse_status(status):
         If the dict does not contains the correct data.
 
     """
+    if lazy:
+        return LazyStatus(status)
     try:
-        accelerometer = None
-        if 'accelerometer' in status:
-            accelerometer_dict = status['accelerometer']
-            if accelerometer_dict:
-                accelerometer = Accelerometer(accelerometer_dict['x'], accelerometer_dict['y'],
-                                              accelerometer_dict['z'],
-                                              isodate.parse_datetime(accelerometer_dict['date']))
-        location = None
-        if 'location' in status:
-            location_dict = status['location']
-            if location_dict:
-                location = parse_location(location_dict)
         return Status(
-            location,
-            accelerometer,
+            _parse_status_location(status),
+            _parse_status_accelerometer(status),
             [parse_signal(signal) for signal in status['signals']]
         )
     except ValueError as err:
         raise xee_exceptions.ParseException(err)
 
 
+def _parse_status_accelerometer(status):
+    accelerometer = None
+    if 'accelerometer' in status:
+        accelerometer_dict = status['accelerometer']
+        if accelerometer_dict:
+            accelerometer = Accelerometer(accelerometer_dict['x'], accelerometer_dict['y'],
+                                          accelerometer_dict['z'],
+                                          parse_datetime(accelerometer_dict['date']))
+    return accelerometer
+
+
+def _parse_status_location(status):
+    location = None
+    if 'location' in status:
+        location_dict = status['location']
+        if location_dict:
+            location = parse_location(location_dict)
+    return location
+
+
 def parse_used_time(used_time):
     """
     Parse a UsedTimeStat from a a dict representation.
@@ -351,8 +455,8 @@ def parse_used_time(used_time):
     """
     try:
         return UsedTimeStat(
-            isodate.parse_datetime(used_time['beginDate']),
-            isodate.parse_datetime(used_time['endDate']),
+            parse_datetime(used_time['beginDate']),
+            parse_datetime(used_time['endDate']),
             used_time['type'],
             used_time['value'],
         )
@@ -383,8 +487,8 @@ def parse_mileage(mileage):
     """
     try:
         return MileageStat(
-            isodate.parse_datetime(mileage['beginDate']),
-            isodate.parse_datetime(mileage['endDate']),
+            parse_datetime(mileage['beginDate']),
+            parse_datetime(mileage['endDate']),
             mileage['type'],
             mileage['value'],
         )
@@ -392,7 +496,7 @@ def parse_mileage(mileage):
         raise xee_exceptions.ParseException(err)
 
 
-def parse_trip(trip):
+def parse_trip(trip, lazy=False):
     """
     Parse a trip from a a dict representation.
 
@@ -400,6 +504,9 @@ def parse_trip(trip):
     ----------
     trip  : dict
             The trip as a dict.
+    lazy    :   bool, optional
+                Return a lazy entity, the fields are decoded on first access.
+                Default is False.
 
     Returns
     -------
@@ -413,13 +520,15 @@ def parse_trip(trip):
         If the dict does not contains the correct data.
 
     """
+    if lazy:
+        return LazyTrip(trip)
     try:
         return Trip(
             trip['id'],
             parse_location(trip['beginLocation']),
             parse_location(trip['endLocation']),
-            isodate.parse_datetime(trip['beginDate']),
-            isodate.parse_datetime(trip['endDate'])
+            parse_datetime(trip['beginDate']),
+            parse_datetime(trip['endDate'])
         )
     except ValueError as err:
         raise xee_exceptions.ParseException(err)
@@ -453,3 +562,114 @@ def parse_trip_stat(trip_stat):
         )
     except ValueError as err:
         raise xee_exceptions.ParseException(err)
+
+
+# Lazy entities
+
+class _LazyField(object):
+    """
+        Decode a field on first access, then cache it in the instance.
+    """
+
+    def __init__(self, name, decode):
+        self.name = name
+        self.decode = decode
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            value = self.decode(instance.raw)
+        except (KeyError, TypeError, ValueError) as err:
+            raise xee_exceptions.ParseException(err)
+        # Non-data descriptor: the instance dict shadows it from now on
+        instance.__dict__[self.name] = value
+        return value
+
+
+class LazyEntity(object):
+    """
+        An entity keeping its raw dict, with the same fields as its namedtuple.
+
+        The fields are decoded on first access and cached, a field that can not be
+        decoded raises a ParseException on access.
+    """
+
+    entity = None
+    _fields = ()
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def __iter__(self):
+        return (getattr(self, field) for field in self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __getitem__(self, index):
+        return tuple(self)[index]
+
+    def __eq__(self, other):
+        if not isinstance(other, (tuple, LazyEntity)):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return '{name}({raw!r})'.format(name=type(self).__name__, raw=self.raw)
+
+    def _asdict(self):
+        return collections.OrderedDict(zip(self._fields, self))
+
+    def materialize(self):
+        """
+        Decode every field.
+
+        Returns
+        -------
+        tuple
+            The namedtuple of the entity.
+
+        """
+        return self.entity(*self)
+
+
+def _lazy_entity(name, entity, decoders):
+    attributes = {'entity': entity, '_fields': entity._fields}
+    for field in entity._fields:
+        attributes[field] = _LazyField(field, decoders[field])
+    return type(name, (LazyEntity,), attributes)
+
+
+LazySignal = _lazy_entity('LazySignal', Signal, {
+    'name': lambda raw: raw['name'],
+    'value': lambda raw: raw['value'],
+    'date': lambda raw: parse_datetime(raw['date'])
+})
+LazyLocation = _lazy_entity('LazyLocation', Location, {
+    'latitude': lambda raw: raw['latitude'],
+    'longitude': lambda raw: raw['longitude'],
+    'altitude': lambda raw: raw['altitude'],
+    'satellites': lambda raw: raw['satellites'],
+    'heading': lambda raw: raw['heading'],
+    'date': lambda raw: parse_datetime(raw['date'])
+})
+LazyStatus = _lazy_entity('LazyStatus', Status, {
+    'location': _parse_status_location,
+    'accelerometer': _parse_status_accelerometer,
+    'signals': lambda raw: [LazySignal(signal) for signal in raw['signals']]
+})
+LazyTrip = _lazy_entity('LazyTrip', Trip, {
+    'id': lambda raw: raw['id'],
+    'begin_location': lambda raw: parse_location(raw['beginLocation']),
+    'end_location': lambda raw: parse_location(raw['endLocation']),
+    'begin_date': lambda raw: parse_datetime(raw['beginDate']),
+    'end_date': lambda raw: parse_datetime(raw['endDate'])
+})
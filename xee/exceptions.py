@@ -9,7 +9,7 @@ class ParseException(Exception):
     """
 
     def __init__(self, parent):
-        super(ParseException, self).__init__(parent.message)
+        super(ParseException, self).__init__(str(parent))
 
 
 class APIException(Exception):
@@ -29,3 +29,9 @@ class APIException(Exception):
 
     def __eq__(self, other):
         return self.__dict__ == other.__dict__
+
+
+class AuthenticationException(APIException):
+    """
+        API Exception raised on a 401, the access token is invalid or expired.
+    """
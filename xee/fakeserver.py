@@ -0,0 +1,562 @@
+#!/usr/bin/env python
+# coding: utf8
+"""
+    This script contains a local fake of the Xee API v3, for load and latency testing.
+
+    python -m xee.fakeserver --port 8080 --latency 0.05 --error-rate 0.01
+
+    The data is synthetic and deterministic (a function of the car and the time), the
+    begin, end, limit and name parameters are honoured, and latency, errors, 429 and slow
+    bodies can be injected.
+"""
+
+from __future__ import print_function
+
+import argparse
+import collections
+import hashlib
+import json
+import math
+import random
+import re
+import socket
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    import urllib.parse as url_parser
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    import urlparse as url_parser
+
+import xee.columnar as xee_columnar
+import xee.entities as xee_entities
+
+SIGNAL_NAMES = ['BatteryVoltage', 'EngineSpeed', 'FuelLevel', 'Odometer', 'VehiSpeed']
+
+# Seconds between two signals of a name, between two locations
+SIGNAL_PERIOD = 10
+LOCATION_PERIOD = 5
+# Every car drives a trip of TRIP_DURATION seconds every TRIP_PERIOD seconds
+TRIP_PERIOD = 4 * 3600
+TRIP_DURATION = 1800
+
+
+def _format_date(timestamp):
+    date = xee_columnar.from_timestamp(timestamp)
+    return date.strftime('%Y-%m-%dT%H:%M:%S.') + '{ms:03d}Z'.format(ms=date.microsecond // 1000)
+
+
+def _error(type_, message, tip):
+    return [{'type': type_, 'message': message, 'tip': tip}]
+
+
+class FakeData(object):
+    """
+        The synthetic data of the fake API, computed from the car id and the time.
+    """
+
+    def __init__(self, cars=10):
+        self.car_ids = list(range(1, cars + 1))
+
+    def user(self):
+        return {
+            'id': 42, 'lastName': 'Doe', 'firstName': 'John', 'nickName': 'Johnny',
+            'gender': 'MALE', 'birthDate': '1990-01-11T00:00:00+00:00',
+            'licenseDeliveryDate': '2010-08-13T00:00:00+00:00', 'role': 'dev',
+            'isLocationEnabled': True
+        }
+
+    def car(self, car_id):
+        return {
+            'id': car_id, 'name': 'Car {car_id}'.format(car_id=car_id), 'make': 'Mark',
+            'model': '42', 'year': 2016, 'numberPlate': 'AB-{car_id:03d}-CD'.format(car_id=car_id),
+            'deviceId': 'E{car_id:09d}'.format(car_id=car_id), 'cardbId': 210
+        }
+
+    @staticmethod
+    def signal_value(car_id, name, timestamp):
+        phase = car_id * 0.7
+        if name == 'Odometer':
+            # About 30 km/h since 2016, on top of 10000 km per car id
+            return round(10000.0 * car_id + (timestamp - 1451606400) / 120.0, 1)
+        if name == 'FuelLevel':
+            return round(50 + 40 * math.sin(timestamp / 7200.0 + phase), 1)
+        speed = max(0.0, round(90 * math.sin(timestamp / 900.0 + phase), 1))
+        if name == 'VehiSpeed':
+            return speed
+        if name == 'EngineSpeed':
+            return round(speed * 30)
+        return round(12.5 + 0.3 * math.sin(timestamp / 600.0 + phase), 2)
+
+    @staticmethod
+    def location(car_id, timestamp):
+        angle = timestamp / 1800.0 + car_id
+        return {
+            'latitude': round(50.63 + 0.001 * car_id + 0.01 * math.cos(angle), 6),
+            'longitude': round(3.06 + 0.015 * math.sin(angle), 6),
+            'altitude': round(20 + 5 * math.sin(angle * 3), 1),
+            'satellites': 4 + int(timestamp // LOCATION_PERIOD) % 8,
+            'heading': round(math.degrees(angle) % 360, 1),
+            'date': _format_date(timestamp)
+        }
+
+    def signals(self, car_id, begin, end, names=None, limit=None):
+        """
+        The signals of a car within [begin, end] (timestamps), by date then name.
+        """
+        names = sorted(names or SIGNAL_NAMES)
+        signals = []
+        timestamp = math.ceil(begin / SIGNAL_PERIOD) * SIGNAL_PERIOD
+        while timestamp <= end:
+            for name in names:
+                if limit is not None and len(signals) >= limit:
+                    return signals
+                signals.append({'name': name, 'value': self.signal_value(car_id, name, timestamp),
+                                'date': _format_date(timestamp)})
+            timestamp += SIGNAL_PERIOD
+        return signals
+
+    def locations(self, car_id, begin, end, limit=None):
+        """
+        The locations of a car within [begin, end] (timestamps).
+        """
+        locations = []
+        timestamp = math.ceil(begin / LOCATION_PERIOD) * LOCATION_PERIOD
+        while timestamp <= end and (limit is None or len(locations) < limit):
+            locations.append(self.location(car_id, timestamp))
+            timestamp += LOCATION_PERIOD
+        return locations
+
+    def status(self, car_id, now):
+        signal_time = now // SIGNAL_PERIOD * SIGNAL_PERIOD
+        location = self.location(car_id, now // LOCATION_PERIOD * LOCATION_PERIOD)
+        return {
+            'accelerometer': {'x': -144, 'y': -480, 'z': 9808, 'date': location['date']},
+            'location': location,
+            'signals': self.signals(car_id, signal_time, signal_time)
+        }
+
+    @staticmethod
+    def trip_id(car_id, index):
+        return '{car_id:08x}{index:016x}'.format(car_id=car_id, index=index)
+
+    def parse_trip_id(self, trip_id):
+        """
+        The (car id, trip index) of a trip id, None for an unknown trip.
+        """
+        try:
+            car_id, index = int(trip_id[:8], 16), int(trip_id[8:], 16)
+        except ValueError:
+            return None
+        if len(trip_id) != 24 or car_id not in self.car_ids:
+            return None
+        return car_id, index
+
+    def trip(self, car_id, index):
+        begin = index * TRIP_PERIOD
+        end = begin + TRIP_DURATION
+        return {
+            'id': self.trip_id(car_id, index),
+            'beginLocation': self.location(car_id, begin),
+            'endLocation': self.location(car_id, end),
+            'beginDate': _format_date(begin),
+            'endDate': _format_date(end),
+            'creationDate': _format_date(begin),
+            'lastUpdateDate': _format_date(end)
+        }
+
+    def trips(self, car_id, begin, end):
+        """
+        The trips of a car beginning within [begin, end] (timestamps).
+        """
+        first = int(math.ceil(begin / TRIP_PERIOD))
+        return [self.trip(car_id, index) for index in range(first, int(end // TRIP_PERIOD) + 1)]
+
+    def trip_mileage(self, car_id, index):
+        begin = index * TRIP_PERIOD
+        return round(self.signal_value(car_id, 'Odometer', begin + TRIP_DURATION)
+                     - self.signal_value(car_id, 'Odometer', begin), 3)
+
+    def used_time(self, car_id, begin, end):
+        """
+        The seconds a car drove within [begin, end].
+        """
+        return sum(min(end, trip_begin + TRIP_DURATION) - max(begin, trip_begin)
+                   for trip_begin in self._trip_begins(begin, end))
+
+    def mileage(self, car_id, begin, end):
+        """
+        The distance driven by a car within [begin, end] (during its trips).
+        """
+        mileage = 0.0
+        for trip_begin in self._trip_begins(begin, end):
+            mileage += self.signal_value(car_id, 'Odometer', min(end, trip_begin + TRIP_DURATION)) \
+                - self.signal_value(car_id, 'Odometer', max(begin, trip_begin))
+        return round(mileage, 3)
+
+    @staticmethod
+    def _trip_begins(begin, end):
+        first = int((begin - TRIP_DURATION) // TRIP_PERIOD) + 1
+        return [index * TRIP_PERIOD for index in range(first, int(end // TRIP_PERIOD) + 1)
+                if index * TRIP_PERIOD + TRIP_DURATION > begin]
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class FakeXeeServer(object):
+    """
+        Local HTTP server faking the Xee API v3, running in a background thread.
+
+        with FakeXeeServer(latency=0.02, error_rate=0.01) as server:
+            xee = Xee(client_id, client_secret, redirect_uri, host=server.url)
+
+        The fault injection attributes (latency, latency_jitter, error_rate, throttle_rate,
+        retry_after, slow_body) can be changed while the server runs. The ETag of every
+        response is sent and a matching If-None-Match is answered by a 304 Not Modified.
+        The requests (by path) and the accepted connections are counted in requests and
+        connections.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, cars=10, latency=0.0, latency_jitter=0.0,
+                 error_rate=0.0, throttle_rate=0.0, retry_after=1, slow_body=0.0, seed=42):
+        """
+        Initialize a new fake server (not started).
+
+        Parameters
+        ----------
+        host            :   str, optional
+                            The interface to listen on.
+                            Default is 127.0.0.1.
+        port            :   int, optional
+                            The port to listen on, 0 picks a free one.
+                            Default is 0.
+        cars            :   int, optional
+                            The number of cars of the user (ids 1 to cars).
+                            Default is 10.
+        latency         :   float, optional
+                            The seconds waited before answering every request.
+                            Default is 0.
+        latency_jitter  :   float, optional
+                            A random number of seconds (up to this) added to the latency.
+                            Default is 0.
+        error_rate      :   float, optional
+                            The part of the requests answered by a 500.
+                            Default is 0.
+        throttle_rate   :   float, optional
+                            The part of the requests answered by a 429.
+                            Default is 0.
+        retry_after     :   int, optional
+                            The Retry-After (seconds) of the 429.
+                            Default is 1.
+        slow_body       :   float, optional
+                            The seconds spent sending every body (in 10 chunks).
+                            Default is 0.
+        seed            :   int, optional
+                            The seed of the random fault injection.
+                            Default is 42.
+
+        """
+        self.data = FakeData(cars)
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.slow_body = slow_body
+        self.requests = collections.Counter()
+        self.connections = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _handler(self))
+        self.url = 'http://{host}:{port}/v3'.format(host=host, port=self._server.server_address[1])
+        self._thread = None
+
+    def start(self):
+        """
+        Serve in a background thread.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving and close the socket.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def serve_forever(self):
+        """
+        Serve in the current thread, until interrupted.
+        """
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def _draw(self):
+        with self._lock:
+            return self._random.random(), self._random.random()
+
+    def respond(self, method, path, query, headers):
+        """
+        Compute the response of a request.
+
+        Returns
+        -------
+        tuple
+            A tuple containing the status code, the headers dict and the body (bytes).
+
+        """
+        with self._lock:
+            self.requests[path] += 1
+        delay = self.latency
+        fault, jitter = self._draw()
+        if self.latency_jitter:
+            delay += jitter * self.latency_jitter
+        if delay:
+            time.sleep(delay)
+        if fault < self.throttle_rate:
+            return 429, {'Retry-After': str(self.retry_after)}, json.dumps(_error(
+                'TOO_MANY_REQUESTS', 'Too many requests', 'Slow down')).encode('utf-8')
+        if fault < self.throttle_rate + self.error_rate:
+            return 500, {}, json.dumps(_error(
+                'SERVER_ERROR', 'Injected error', 'Retry later')).encode('utf-8')
+        if method == 'POST':
+            if path != '/v3/auth/access_token':
+                return self._json(404, _error('NOT_FOUND', 'Route not found', 'Check the route'))
+            now = int(time.time())
+            return self._json(200, {'access_token': 'fake_access_token_' + str(now),
+                                    'refresh_token': 'fake_refresh_token_' + str(now),
+                                    'expires_in': 3600, 'expires_at': now + 3600,
+                                    'token_type': 'bearer'})
+        if not headers.get('Authorization', '').startswith('Bearer '):
+            return self._json(401, _error('AUTHENTICATION_ERROR', 'Token not found',
+                                          'Add a Bearer token in the Authorization header'))
+        try:
+            status, payload = self._route(path, query)
+        except ValueError as err:
+            status, payload = 400, _error('PARAMETERS_ERROR', str(err), 'Check the parameters')
+        status, response_headers, body = self._json(status, payload)
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if status == 200:
+            response_headers['ETag'] = etag
+            if headers.get('If-None-Match') == etag:
+                return 304, response_headers, b''
+        return status, response_headers, body
+
+    @staticmethod
+    def _json(status, payload):
+        return status, {'Content-Type': 'application/json'}, \
+            json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+    def _route(self, path, query):
+        now = time.time()
+        for pattern, handler in _ROUTES:
+            match = re.match(pattern + '$', path)
+            if match is not None:
+                return handler(self, now, query, *match.groups())
+        return 404, _error('NOT_FOUND', 'Route not found', 'Check the route')
+
+
+def _period(query, now, default_begin):
+    end = query.get('end')
+    end = xee_columnar.to_timestamp(xee_entities.parse_datetime(end)) if end else now
+    begin = query.get('begin')
+    begin = xee_columnar.to_timestamp(xee_entities.parse_datetime(begin)) if begin \
+        else default_begin(end)
+    return begin, end
+
+
+def _last_hour(end):
+    return end - 3600
+
+
+def _month_start(end):
+    date = xee_columnar.from_timestamp(end)
+    return xee_columnar.to_timestamp(date.replace(day=1, hour=0, minute=0, second=0,
+                                                  microsecond=0))
+
+
+def _limit(query):
+    if 'limit' not in query:
+        return None
+    limit = int(query['limit'])
+    if limit <= 0:
+        raise ValueError('limit must be a positive integer')
+    return limit
+
+
+def _car(server, car_id):
+    car_id = int(car_id) if car_id.isdigit() else None
+    if car_id not in server.data.car_ids:
+        return None
+    return car_id
+
+
+_CAR_NOT_FOUND = (404, _error('PARAMETERS_ERROR', 'Car not found', 'Check the car id'))
+_TRIP_NOT_FOUND = (404, _error('PARAMETERS_ERROR', 'Trip not found', 'Check the trip id'))
+
+
+def _car_route(function):
+    def route(server, now, query, car_id):
+        car_id = _car(server, car_id)
+        if car_id is None:
+            return _CAR_NOT_FOUND
+        return 200, function(server.data, now, query, car_id)
+    return route
+
+
+def _trip_route(function):
+    def route(server, now, query, trip_id):
+        trip = server.data.parse_trip_id(trip_id)
+        if trip is None:
+            return _TRIP_NOT_FOUND
+        return 200, function(server.data, query, *trip)
+    return route
+
+
+def _trip_window(index):
+    return index * TRIP_PERIOD, index * TRIP_PERIOD + TRIP_DURATION
+
+
+def _stat(type_, begin, end, value):
+    return {'beginDate': _format_date(begin), 'endDate': _format_date(end), 'type': type_,
+            'value': value}
+
+
+def _used_time(data, now, query, car_id):
+    begin, end = _period(query, now, _month_start)
+    return _stat('USED_TIME', begin, end,
+                 int(query.get('initialValue', 0)) + int(data.used_time(car_id, begin, end)))
+
+
+def _mileage(data, now, query, car_id):
+    begin, end = _period(query, now, _month_start)
+    return _stat('MILEAGE', begin, end,
+                 float(query.get('initialValue', 0)) + data.mileage(car_id, begin, end))
+
+
+_ROUTES = [
+    ('/v3/users/me', lambda server, now, query: (200, server.data.user())),
+    ('/v3/users/me/cars', lambda server, now, query: (
+        200, [server.data.car(car_id) for car_id in server.data.car_ids])),
+    (r'/v3/cars/([^/]+)', _car_route(lambda data, now, query, car_id: data.car(car_id))),
+    (r'/v3/cars/([^/]+)/status', _car_route(
+        lambda data, now, query, car_id: data.status(car_id, now))),
+    (r'/v3/cars/([^/]+)/signals', _car_route(lambda data, now, query, car_id: data.signals(
+        car_id, *_period(query, now, _last_hour),
+        names=query['name'].split(',') if query.get('name') else None, limit=_limit(query)))),
+    (r'/v3/cars/([^/]+)/locations', _car_route(lambda data, now, query, car_id: data.locations(
+        car_id, *_period(query, now, _last_hour), limit=_limit(query)))),
+    (r'/v3/cars/([^/]+)/trips', _car_route(lambda data, now, query, car_id: data.trips(
+        car_id, *_period(query, now, _month_start)))),
+    (r'/v3/cars/([^/]+)/stats/usedtime', _car_route(_used_time)),
+    (r'/v3/cars/([^/]+)/stats/mileage', _car_route(_mileage)),
+    (r'/v3/trips/([^/]+)', _trip_route(
+        lambda data, query, car_id, index: data.trip(car_id, index))),
+    (r'/v3/trips/([^/]+)/signals', _trip_route(lambda data, query, car_id, index: data.signals(
+        car_id, *_trip_window(index),
+        names=query['name'].split(',') if query.get('name') else None))),
+    (r'/v3/trips/([^/]+)/locations', _trip_route(
+        lambda data, query, car_id, index: data.locations(car_id, *_trip_window(index)))),
+    (r'/v3/trips/([^/]+)/stats', _trip_route(lambda data, query, car_id, index: [
+        {'type': 'MILEAGE', 'value': data.trip_mileage(car_id, index)},
+        {'type': 'USED_TIME', 'value': TRIP_DURATION}])),
+    (r'/v3/trips/([^/]+)/stats/mileage', _trip_route(lambda data, query, car_id, index: {
+        'type': 'MILEAGE', 'value': data.trip_mileage(car_id, index)})),
+    (r'/v3/trips/([^/]+)/stats/usedtime', _trip_route(lambda data, query, car_id, index: {
+        'type': 'USED_TIME', 'value': TRIP_DURATION})),
+]
+
+
+def _handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            BaseHTTPRequestHandler.setup(self)
+            with server._lock:  # pylint: disable=protected-access
+                server.connections += 1
+            # Headers and body are written separately, do not wait for the delayed ACK
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def _respond(self, method):
+            if method == 'POST':
+                length = int(self.headers.get('Content-Length') or 0)
+                self.rfile.read(length)
+            parsed = url_parser.urlparse(self.path)
+            query = dict((key, values[-1]) for key, values
+                         in url_parser.parse_qs(parsed.query).items())
+            status, headers, body = server.respond(method, parsed.path, query, self.headers)
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if method == 'HEAD':
+                return
+            if server.slow_body and body:
+                chunk_size = max(1, len(body) // 10)
+                for start in range(0, len(body), chunk_size):
+                    time.sleep(server.slow_body / 10.0)
+                    self.wfile.write(body[start:start + chunk_size])
+                    self.wfile.flush()
+            else:
+                self.wfile.write(body)
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            self._respond('GET')
+
+        def do_POST(self):  # pylint: disable=invalid-name
+            self._respond('POST')
+
+        def do_HEAD(self):  # pylint: disable=invalid-name
+            self._respond('HEAD')
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve a local fake of the Xee API v3.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--cars', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--latency-jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--slow-body', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42)
+    options = parser.parse_args(argv)
+    server = FakeXeeServer(options.host, options.port, options.cars, options.latency,
+                           options.latency_jitter, options.error_rate, options.throttle_rate,
+                           options.retry_after, options.slow_body, options.seed)
+    print('Fake Xee API listening on ' + server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
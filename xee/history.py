@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+# coding: utf8
+"""This script contains the persistent, interval-aware cache of the historical data"""
+
+import datetime
+import sqlite3
+import threading
+
+import xee.columnar as xee_columnar
+import xee.entities as xee_entities
+
+# Signals fetched without names filter are recorded under this name
+ALL_NAMES = '*'
+
+_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS intervals ('
+    ' car_id TEXT NOT NULL, resource TEXT NOT NULL, name TEXT NOT NULL,'
+    ' begin REAL NOT NULL, end REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS intervals_key ON intervals (car_id, resource, name)',
+    'CREATE TABLE IF NOT EXISTS signals ('
+    ' car_id TEXT NOT NULL, name TEXT NOT NULL, date REAL NOT NULL, value,'
+    ' PRIMARY KEY (car_id, name, date))',
+    'CREATE TABLE IF NOT EXISTS locations ('
+    ' car_id TEXT NOT NULL, date REAL NOT NULL, latitude REAL, longitude REAL,'
+    ' altitude REAL, satellites INTEGER, heading REAL,'
+    ' PRIMARY KEY (car_id, date))',
+]
+
+
+def merge_intervals(intervals):
+    """
+    Merge overlapping (or touching) intervals.
+
+    Parameters
+    ----------
+    intervals   :   iterable
+                    The (begin, end) tuples.
+
+    Returns
+    -------
+    list
+        The merged (begin, end) tuples, sorted.
+
+    """
+    merged = []
+    for begin, end in sorted(intervals):
+        if merged and begin <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((begin, end))
+    return merged
+
+
+def missing_intervals(covered, begin, end):
+    """
+    Compute the parts of [begin, end] that are not covered.
+
+    Parameters
+    ----------
+    covered :   list
+                The merged (begin, end) tuples already covered, sorted.
+    begin   :   float
+                The beginning of the wanted range.
+    end     :   float
+                The end of the wanted range.
+
+    Returns
+    -------
+    list
+        The (begin, end) gaps, sorted.
+
+    """
+    gaps = []
+    cursor = begin
+    for covered_begin, covered_end in covered:
+        if covered_end < cursor:
+            continue
+        if covered_begin > end:
+            break
+        if covered_begin > cursor:
+            gaps.append((cursor, covered_begin))
+        cursor = max(cursor, covered_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class HistoryCache(object):
+    """
+        SQLite-backed cache of the signals and locations of the cars.
+
+        It records the time intervals already fetched (per car, resource and signal name)
+        and only asks the API for the missing gaps. Only the settled part of a range
+        (older than settle_delay) is recorded as fetched, recent data is always asked again.
+    """
+
+    def __init__(self, xee, path, settle_delay=datetime.timedelta(hours=1)):
+        """
+        Initialize a new history cache.
+
+        Parameters
+        ----------
+        xee             :   Xee
+                            The SDK to fetch the missing data with.
+        path            :   str
+                            The SQLite database file (':memory:' for a volatile one).
+        settle_delay    :   timedelta, optional
+                            The data more recent than now - settle_delay can still change,
+                            it is never recorded as fetched.
+                            Default is one hour.
+
+        """
+        self.xee = xee
+        self.settle_delay = settle_delay
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            for statement in _SCHEMA:
+                self._connection.execute(statement)
+
+    def close(self):
+        """
+        Close the database.
+        """
+        with self._lock:
+            self._connection.close()
+
+    def _covered(self, car_id, resource, name):
+        rows = self._connection.execute(
+            'SELECT begin, end FROM intervals WHERE car_id = ? AND resource = ? AND name = ?',
+            (str(car_id), resource, name))
+        return merge_intervals(rows.fetchall())
+
+    def _record_interval(self, car_id, resource, name, begin, end):
+        intervals = self._covered(car_id, resource, name) + [(begin, end)]
+        key = (str(car_id), resource, name)
+        self._connection.execute(
+            'DELETE FROM intervals WHERE car_id = ? AND resource = ? AND name = ?', key)
+        self._connection.executemany(
+            'INSERT INTO intervals (car_id, resource, name, begin, end) VALUES (?, ?, ?, ?, ?)',
+            [key + interval for interval in merge_intervals(intervals)])
+
+    def _settled_until(self):
+        now = datetime.datetime.now(xee_columnar.EPOCH.tzinfo)
+        return xee_columnar.to_timestamp(now - self.settle_delay)
+
+    def _fill(self, car_id, resource, names, begin, end, fetch, store):
+        """
+        Fetch and store the gaps of every name, return the first error.
+        """
+        settled_until = self._settled_until()
+        with self._lock:
+            gaps_by_name = {}
+            for name in names:
+                covered = self._covered(car_id, resource, name)
+                if name != ALL_NAMES:
+                    covered = merge_intervals(
+                        covered + self._covered(car_id, resource, ALL_NAMES))
+                gaps_by_name[name] = tuple(missing_intervals(covered, begin, end))
+        # The names missing the same gaps are fetched together
+        names_by_gaps = {}
+        for name, gaps in gaps_by_name.items():
+            if gaps:
+                names_by_gaps.setdefault(gaps, []).append(name)
+        for gaps, gap_names in names_by_gaps.items():
+            for gap_begin, gap_end in gaps:
+                records, err = fetch(xee_columnar.from_timestamp(gap_begin),
+                                     xee_columnar.from_timestamp(gap_end), gap_names)
+                if err is not None:
+                    return err
+                with self._lock, self._connection:
+                    store(records)
+                    if gap_begin < settled_until:
+                        for name in gap_names:
+                            self._record_interval(car_id, resource, name, gap_begin,
+                                                  min(gap_end, settled_until))
+        return None
+
+    def get_signals(self, car_id, access_token, begin, end, names=None):
+        """
+        Get the signals of a car within [begin, end], only fetching what is missing.
+
+        Parameters
+        ----------
+        car_id          :   str
+                            the id of the car you are looking for the signals.
+        access_token    :   str
+                            the access token of the user.
+        begin           :   datetime
+                            The first datetime of the interval.
+        end             :   datetime
+                            The last datetime of the interval.
+        names           :   list, optional
+                            The list if signals names you want to filter the result.
+                            Default value is all the signals available.
+
+        Returns
+        -------
+        tuple
+            A tuple containing [Signals], Error.
+            The error is None if everything went fine.
+
+        """
+        begin = xee_columnar.to_timestamp(begin)
+        end = xee_columnar.to_timestamp(end)
+
+        def fetch(gap_begin, gap_end, gap_names):
+            filter_names = None if gap_names == [ALL_NAMES] else gap_names
+            return self.xee.get_signals(car_id, access_token, begin=gap_begin, end=gap_end,
+                                        names=filter_names)
+
+        def store(signals):
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO signals (car_id, name, date, value) VALUES (?, ?, ?, ?)',
+                [(str(car_id), signal.name, xee_columnar.to_timestamp(signal.date),
+                  signal.value) for signal in signals])
+
+        err = self._fill(car_id, 'signals', names or [ALL_NAMES], begin, end, fetch, store)
+        if err is not None:
+            return None, err
+        query = 'SELECT name, value, date FROM signals WHERE car_id = ? AND date >= ? ' \
+                'AND date <= ?'
+        params = [str(car_id), begin, end]
+        if names:
+            query += ' AND name IN ({marks})'.format(marks=', '.join('?' * len(names)))
+            params.extend(names)
+        with self._lock:
+            rows = self._connection.execute(query + ' ORDER BY date, name', params).fetchall()
+        return [xee_entities.Signal(name, value, xee_columnar.from_timestamp(date))
+                for name, value, date in rows], None
+
+    def get_locations(self, car_id, access_token, begin, end):
+        """
+        Get the locations of a car within [begin, end], only fetching what is missing.
+
+        Parameters
+        ----------
+        car_id          :   str
+                            the id of the car you are looking for the locations.
+        access_token    :   str
+                            the access token of the user.
+        begin           :   datetime
+                            The first datetime of the interval.
+        end             :   datetime
+                            The last datetime of the interval.
+
+        Returns
+        -------
+        tuple
+            A tuple containing [Locations], Error.
+            The error is None if everything went fine.
+
+        """
+        begin = xee_columnar.to_timestamp(begin)
+        end = xee_columnar.to_timestamp(end)
+
+        def fetch(gap_begin, gap_end, _):
+            return self.xee.get_locations(car_id, access_token, begin=gap_begin, end=gap_end)
+
+        def store(locations):
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO locations (car_id, date, latitude, longitude, altitude,'
+                ' satellites, heading) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(str(car_id), xee_columnar.to_timestamp(location.date), location.latitude,
+                  location.longitude, location.altitude, location.satellites, location.heading)
+                 for location in locations])
+
+        err = self._fill(car_id, 'locations', [ALL_NAMES], begin, end, fetch, store)
+        if err is not None:
+            return None, err
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT latitude, longitude, altitude, satellites, heading, date FROM locations'
+                ' WHERE car_id = ? AND date >= ? AND date <= ? ORDER BY date',
+                (str(car_id), begin, end)).fetchall()
+        return [xee_entities.Location(latitude, longitude, altitude, satellites, heading,
+                                      xee_columnar.from_timestamp(date))
+                for latitude, longitude, altitude, satellites, heading, date in rows], None
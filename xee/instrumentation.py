@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# coding: utf8
+"""This script contains the instrumentation of the calls (events, metrics and spans)"""
+
+import collections
+import math
+import threading
+
+RequestTiming = collections.namedtuple(
+    'RequestTiming',
+    [
+        'status_code',
+        'ttfb',
+        'network_time',
+        'response_bytes',
+        'decode_time'
+    ])
+
+RequestEvent = collections.namedtuple(
+    'RequestEvent',
+    [
+        'endpoint',
+        'route',
+        'started_at',
+        'status_code',
+        'ttfb',
+        'network_time',
+        'total_time',
+        'response_bytes',
+        'decode_time',
+        'parse_time',
+        'records',
+        'cached',
+        'error'
+    ])
+
+EndpointStats = collections.namedtuple(
+    'EndpointStats',
+    [
+        'count',
+        'errors',
+        'p50',
+        'p95',
+        'p99',
+        'mean',
+        'response_bytes',
+        'records',
+        'decode_time',
+        'parse_time'
+    ])
+
+
+class Histogram(object):
+    """
+        Latency histogram with logarithmic buckets: constant memory, bounded relative error.
+
+        A value is counted in the bucket [lowest * growth ** i, lowest * growth ** (i + 1)),
+        the percentiles are the upper bound of their bucket (at most growth - 1 too high).
+    """
+
+    def __init__(self, lowest=0.0001, growth=1.05):
+        """
+        Initialize a new empty histogram.
+
+        Parameters
+        ----------
+        lowest  :   float, optional
+                    The upper bound of the first bucket (every smaller value is counted in it).
+                    Default is 0.1 millisecond.
+        growth  :   float, optional
+                    The ratio between the bounds of a bucket.
+                    Default is 1.05 (5% precision).
+
+        """
+        self.lowest = lowest
+        self.growth = growth
+        self.count = 0
+        self.total = 0.0
+        self._log_growth = math.log(growth)
+        self._buckets = collections.defaultdict(int)
+
+    def add(self, value):
+        """
+        Count a value.
+        """
+        index = 0
+        if value > self.lowest:
+            index = int(math.ceil(math.log(value / self.lowest) / self._log_growth))
+        self._buckets[index] += 1
+        self.count += 1
+        self.total += value
+
+    def percentile(self, percentile):
+        """
+        Compute a percentile of the values.
+
+        Parameters
+        ----------
+        percentile  :   float
+                        The percentile, between 0 and 100.
+
+        Returns
+        -------
+        float
+            The value, None if the histogram is empty.
+
+        """
+        if not self.count:
+            return None
+        rank = max(1, int(math.ceil(percentile / 100.0 * self.count)))
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                return self.lowest * self.growth ** index
+        return None
+
+
+class MetricsAggregator(object):
+    """
+        Hook aggregating the events by endpoint: latency histogram, errors, bytes, records
+        and the decoding and parsing times.
+
+        metrics = MetricsAggregator()
+        xee.add_hook(metrics)
+        print(metrics.stats()['get_signals'].p95)
+    """
+
+    def __init__(self, lowest=0.0001, growth=1.05):
+        """
+        Initialize a new aggregator.
+
+        Parameters
+        ----------
+        lowest  :   float, optional
+                    The upper bound (in seconds) of the first latency bucket.
+                    Default is 0.1 millisecond.
+        growth  :   float, optional
+                    The ratio between the bounds of a latency bucket.
+                    Default is 1.05.
+
+        """
+        self.lowest = lowest
+        self.growth = growth
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            endpoint = self._endpoints.get(event.endpoint)
+            if endpoint is None:
+                endpoint = self._endpoints[event.endpoint] = {
+                    'histogram': Histogram(self.lowest, self.growth), 'errors': 0,
+                    'response_bytes': 0, 'records': 0, 'decode_time': 0.0, 'parse_time': 0.0
+                }
+            endpoint['histogram'].add(event.total_time)
+            if event.error is not None:
+                endpoint['errors'] += 1
+            endpoint['response_bytes'] += event.response_bytes
+            endpoint['records'] += event.records
+            endpoint['decode_time'] += event.decode_time
+            endpoint['parse_time'] += event.parse_time
+
+    def stats(self):
+        """
+        Get the metrics of every endpoint.
+
+        Returns
+        -------
+        dict
+            The EndpointStats by endpoint: count, errors, p50 / p95 / p99 and mean latency
+            (seconds), total response bytes, total records and total decoding and parsing
+            times (seconds).
+
+        """
+        with self._lock:
+            stats = {}
+            for name, endpoint in self._endpoints.items():
+                histogram = endpoint['histogram']
+                stats[name] = EndpointStats(histogram.count, endpoint['errors'],
+                                            histogram.percentile(50), histogram.percentile(95),
+                                            histogram.percentile(99),
+                                            histogram.total / histogram.count,
+                                            endpoint['response_bytes'], endpoint['records'],
+                                            endpoint['decode_time'], endpoint['parse_time'])
+            return stats
+
+    def reset(self):
+        """
+        Forget every event.
+        """
+        with self._lock:
+            self._endpoints.clear()
+
+
+class SpanHook(object):
+    """
+        Hook recording every event as a span of an OpenTelemetry-style tracer.
+
+        The tracer only needs start_span(name, start_time=...) returning a span with
+        set_attribute(key, value) and end(end_time=...), the times being nanoseconds since
+        epoch (as opentelemetry.trace.Tracer does). The opentelemetry package is not required.
+
+        xee.add_hook(SpanHook(opentelemetry.trace.get_tracer('xee')))
+    """
+
+    def __init__(self, tracer, prefix='xee.'):
+        """
+        Initialize a new span hook.
+
+        Parameters
+        ----------
+        tracer  :   object
+                    The tracer to start the spans with.
+        prefix  :   str, optional
+                    The prefix of the span names (followed by the endpoint).
+                    Default is 'xee.'.
+
+        """
+        self.tracer = tracer
+        self.prefix = prefix
+
+    def __call__(self, event):
+        start_time = int(event.started_at * 1e9)
+        span = self.tracer.start_span(self.prefix + event.endpoint, start_time=start_time)
+        span.set_attribute('http.method', 'GET')
+        span.set_attribute('http.url', event.route)
+        if event.status_code is not None:
+            span.set_attribute('http.status_code', event.status_code)
+        span.set_attribute('xee.cached', event.cached)
+        span.set_attribute('xee.response_bytes', event.response_bytes)
+        span.set_attribute('xee.decode_time', event.decode_time)
+        span.set_attribute('xee.parse_time', event.parse_time)
+        span.set_attribute('xee.records', event.records)
+        if event.error is not None:
+            span.set_attribute('error', True)
+            span.set_attribute('error.message', str(event.error))
+        span.end(end_time=start_time + int(event.total_time * 1e9))
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# coding: utf8
+"""This script contains the client-side rate limiting of the transport"""
+
+import collections
+import email.utils
+import threading
+import time
+
+try:
+    monotonic = time.monotonic
+except AttributeError:
+    # Python 2, no monotonic clock in the standard library
+    monotonic = time.time
+
+RateLimitStats = collections.namedtuple(
+    'RateLimitStats',
+    [
+        'requests',
+        'throttled',
+        'throughput',
+        'average_delay',
+        'current_delay',
+        'rate'
+    ])
+
+
+def parse_retry_after(value, clock=time.time):
+    """
+    Parse a Retry-After header.
+
+    Parameters
+    ----------
+    value   :   str
+                The header, a number of seconds or a HTTP date.
+    clock   :   callable, optional
+                The wall clock (seconds since epoch) the HTTP dates are compared to.
+
+    Returns
+    -------
+    float
+        The number of seconds to wait, None if the header can not be parsed.
+
+    """
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        date = email.utils.parsedate_tz(value)
+        if date is None:
+            return None
+        return max(0.0, email.utils.mktime_tz(date) - clock())
+
+
+class TokenBucket(object):
+    """
+        Thread safe token bucket: rate tokens per second, up to burst tokens saved.
+    """
+
+    def __init__(self, rate, burst=None, clock=monotonic):
+        """
+        Initialize a new bucket (full).
+
+        Parameters
+        ----------
+        rate    :   float
+                    The number of tokens added per second.
+        burst   :   float, optional
+                    The maximum number of tokens saved.
+                    Default is rate (one second of requests).
+        clock   :   callable, optional
+                    The clock the refill is measured with, in seconds.
+                    Default is time.monotonic (time.time on Python 2).
+
+        """
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1))
+        self.clock = clock
+        self._tokens = self.burst
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token, possibly in the future.
+
+        Returns
+        -------
+        float
+            The number of seconds to wait before using the token.
+
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            # The tokens in debt are the requests queued before this one
+            return -self._tokens / self.rate
+
+
+class RateLimiter(object):
+    """
+        Client-side rate limiter, per client and per access token.
+
+        It follows the server pushback: a 429 pauses the whole client for Retry-After
+        seconds and halves the client rate, which then recovers on every success.
+    """
+
+    def __init__(self, rate=None, burst=None, per_token_rate=None, per_token_burst=None,
+                 min_rate=0.5, max_retries=3, default_retry_after=1.0, clock=monotonic,
+                 sleep=time.sleep):
+        """
+        Initialize a new rate limiter.
+
+        Parameters
+        ----------
+        rate                :   float, optional
+                                The maximum number of requests per second of the client.
+                                Default is no client limit.
+        burst               :   float, optional
+                                The number of requests the client can send at once.
+                                Default is rate.
+        per_token_rate      :   float, optional
+                                The maximum number of requests per second per access token.
+                                Default is no limit per token.
+        per_token_burst     :   float, optional
+                                The number of requests an access token can send at once.
+                                Default is per_token_rate.
+        min_rate            :   float, optional
+                                The client rate never goes below this after a 429.
+                                Default is 0.5.
+        max_retries         :   int, optional
+                                The number of retries of a request answered by a 429.
+                                Default is 3.
+        default_retry_after :   float, optional
+                                The pause (in seconds) when a 429 has no Retry-After.
+                                Default is 1.
+        clock               :   callable, optional
+                                The clock the delays are measured with, in seconds.
+                                Default is time.monotonic (time.time on Python 2).
+        sleep               :   callable, optional
+                                The function to wait with.
+
+        """
+        self.configured_rate = rate
+        self.per_token_rate = per_token_rate
+        self.per_token_burst = per_token_burst
+        self.min_rate = min_rate
+        self.max_retries = max_retries
+        self.default_retry_after = default_retry_after
+        self.clock = clock
+        self.sleep = sleep
+        self._bucket = TokenBucket(rate, burst, clock) if rate is not None else None
+        self._token_buckets = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+        self._requests = 0
+        self._throttled = 0
+        self._total_delay = 0.0
+        self._pending_until = 0.0
+        self._recent = collections.deque()
+
+    def _token_bucket(self, bearer):
+        with self._lock:
+            bucket = self._token_buckets.pop(bearer, None)
+            if bucket is None:
+                bucket = TokenBucket(self.per_token_rate, self.per_token_burst, self.clock)
+            self._token_buckets[bearer] = bucket
+            # Forget the idle tokens, a full bucket is the same as a new one
+            while len(self._token_buckets) > 10000:
+                self._token_buckets.popitem(last=False)
+            return bucket
+
+    def acquire(self, bearer=None):
+        """
+        Wait until a request can be sent.
+
+        Parameters
+        ----------
+        bearer  :   str, optional
+                    The access token of the request.
+
+        Returns
+        -------
+        float
+            The number of seconds waited.
+
+        """
+        delay = 0.0
+        if self._bucket is not None:
+            delay = self._bucket.reserve()
+        if bearer is not None and self.per_token_rate is not None:
+            delay = max(delay, self._token_bucket(bearer).reserve())
+        now = self.clock()
+        with self._lock:
+            delay = max(delay, self._blocked_until - now)
+            self._requests += 1
+            self._total_delay += delay
+            self._pending_until = max(self._pending_until, now + delay)
+            self._recent.append(now + delay)
+            while self._recent and self._recent[0] < now - 60:
+                self._recent.popleft()
+        if delay > 0:
+            self.sleep(delay)
+        return delay
+
+    def backoff(self, retry_after=None):
+        """
+        Slow the whole client down after a 429.
+
+        Parameters
+        ----------
+        retry_after :   float, optional
+                        The number of seconds asked by the server.
+                        Default is default_retry_after.
+
+        """
+        if retry_after is None:
+            retry_after = self.default_retry_after
+        with self._lock:
+            self._throttled += 1
+            self._blocked_until = max(self._blocked_until, self.clock() + retry_after)
+            if self._bucket is not None:
+                self._bucket.rate = max(self.min_rate, self._bucket.rate / 2)
+
+    def success(self):
+        """
+        Recover the client rate after a successful request.
+        """
+        if self._bucket is not None and self._bucket.rate < self.configured_rate:
+            with self._lock:
+                self._bucket.rate = min(self.configured_rate, self._bucket.rate + 0.1)
+
+    def stats(self):
+        """
+        Get the counters of the limiter.
+
+        Returns
+        -------
+        tuple
+            A RateLimitStats namedtuple: requests and throttled (429) counts,
+            throughput (requests per second over the last minute), average and
+            current queueing delay (seconds) and current client rate.
+
+        """
+        now = self.clock()
+        with self._lock:
+            recent = [sent_at for sent_at in self._recent if now - 60 <= sent_at <= now]
+            average = self._total_delay / self._requests if self._requests else 0.0
+            rate = self._bucket.rate if self._bucket is not None else None
+            return RateLimitStats(self._requests, self._throttled, len(recent) / 60.0, average,
+                                  max(0.0, self._pending_until - now), rate)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# coding: utf8
+"""This script contains the resampling of signals in tumbling time buckets"""
+
+import datetime
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import xee.columnar as xee_columnar
+import xee.entities as xee_entities
+
+# An accumulator is a list [count, min, max, sum, first timestamp, first, last timestamp, last]
+
+
+def _seconds(period):
+    seconds = period.total_seconds() if isinstance(period, datetime.timedelta) else float(period)
+    if seconds <= 0:
+        raise ValueError("period must be positive")
+    return seconds
+
+
+def _origin(origin):
+    return 0.0 if origin is None else xee_columnar.to_timestamp(origin)
+
+
+def _bucket(name, index, accumulator, origin, period):
+    begin = origin + index * period
+    count = accumulator[0]
+    return xee_entities.SignalBucket(name, xee_columnar.from_timestamp(begin),
+                                     xee_columnar.from_timestamp(begin + period), count,
+                                     accumulator[1], accumulator[2], accumulator[3] / count,
+                                     accumulator[5], accumulator[7])
+
+
+def _update(accumulator, timestamp, value):
+    accumulator[0] += 1
+    if value < accumulator[1]:
+        accumulator[1] = value
+    elif value > accumulator[2]:
+        accumulator[2] = value
+    accumulator[3] += value
+    if timestamp < accumulator[4]:
+        accumulator[4] = timestamp
+        accumulator[5] = value
+    if timestamp >= accumulator[6]:
+        accumulator[6] = timestamp
+        accumulator[7] = value
+
+
+def _rows(signals, names):
+    if isinstance(signals, xee_columnar.SignalFrame):
+        for name in signals.names:
+            if names is None or name in names:
+                timestamps, values = signals.column(name)
+                for timestamp, value in zip(timestamps, values):
+                    yield name, timestamp, value
+        return
+    to_timestamp = xee_columnar.to_timestamp
+    for signal in signals:
+        if names is None or signal.name in names:
+            yield signal.name, to_timestamp(signal.date), signal.value
+
+
+def resample(signals, period, names=None, origin=None):
+    """
+    Aggregate signals in tumbling time buckets, per signal name.
+
+    Every sample is read once, the memory holds one accumulator per non-empty bucket.
+    The samples without value (None or NaN) are ignored.
+
+    Parameters
+    ----------
+    signals :   iterable or SignalFrame
+                The signals (Signal or lazy entities, in any order), as returned by
+                get_signals / get_trip_signals (as_columns too) or iter_signals.
+    period  :   timedelta or float
+                The duration of the buckets (seconds if a float).
+    names   :   list, optional
+                The signal names to aggregate.
+                Default is every name.
+    origin  :   datetime, optional
+                The datetime the buckets are aligned on.
+                Default is the epoch, buckets start on round minutes, hours (UTC)...
+
+    Returns
+    -------
+    dict
+        The SignalBucket (name, begin, end, count, min, max, mean, first, last)
+        lists by signal name, sorted by begin.
+
+    Raises
+    ------
+    ValueError
+        If the period is not positive.
+
+    """
+    period = _seconds(period)
+    origin = _origin(origin)
+    names = None if names is None else set(names)
+    if numpy is not None and isinstance(signals, xee_columnar.SignalFrame):
+        return _resample_frame(signals, period, names, origin)
+    accumulators = {}
+    for name, timestamp, value in _rows(signals, names):
+        if value is None or value != value:
+            continue
+        key = (name, int((timestamp - origin) // period))
+        accumulator = accumulators.get(key)
+        if accumulator is None:
+            accumulators[key] = [1, value, value, value, timestamp, value, timestamp, value]
+        else:
+            _update(accumulator, timestamp, value)
+    buckets = {}
+    for name, index in sorted(accumulators):
+        buckets.setdefault(name, []).append(
+            _bucket(name, index, accumulators[name, index], origin, period))
+    return buckets
+
+
+def _resample_frame(frame, period, names, origin):
+    # Columns are sorted by time: a bucket is a contiguous run, reduced at once
+    buckets = {}
+    for name in frame.names:
+        if names is not None and name not in names:
+            continue
+        timestamps, values = frame.to_numpy(name)
+        kept = ~numpy.isnan(values)
+        timestamps, values = timestamps[kept], values[kept]
+        if not len(values):
+            continue
+        indices = ((timestamps - origin) // period).astype(numpy.int64)
+        starts = numpy.flatnonzero(numpy.concatenate(([True], indices[1:] != indices[:-1])))
+        ends = numpy.append(starts[1:], len(values))
+        counts = ends - starts
+        columns = zip(indices[starts].tolist(), counts.tolist(),
+                      numpy.minimum.reduceat(values, starts).tolist(),
+                      numpy.maximum.reduceat(values, starts).tolist(),
+                      numpy.add.reduceat(values, starts).tolist(),
+                      values[starts].tolist(), values[ends - 1].tolist())
+        buckets[name] = [
+            _bucket(name, index, [count, low, high, total, None, first, None, last],
+                    origin, period)
+            for index, count, low, high, total, first, last in columns
+        ]
+    return buckets
+
+
+def iter_resample(signals, period, names=None, origin=None):
+    """
+    Aggregate a stream of signals in tumbling time buckets, per signal name.
+
+    A bucket is yielded as soon as a later sample of the same name arrives, the memory
+    holds one open bucket per name whatever the length of the stream.
+    The samples without value (None or NaN) are ignored.
+
+    Parameters
+    ----------
+    signals :   iterable or SignalFrame
+                The signals, in time order per name (as streamed by iter_signals).
+    period  :   timedelta or float
+                The duration of the buckets (seconds if a float).
+    names   :   list, optional
+                The signal names to aggregate.
+                Default is every name.
+    origin  :   datetime, optional
+                The datetime the buckets are aligned on.
+                Default is the epoch, buckets start on round minutes, hours (UTC)...
+
+    Returns
+    -------
+    generator
+        Yields the SignalBucket (name, begin, end, count, min, max, mean, first, last),
+        in time order per name.
+
+    Raises
+    ------
+    ValueError
+        If the period is not positive, or a sample is older than the open bucket
+        of its name.
+
+    """
+    period = _seconds(period)
+    origin = _origin(origin)
+    names = None if names is None else set(names)
+    opened = {}
+    for name, timestamp, value in _rows(signals, names):
+        if value is None or value != value:
+            continue
+        index = int((timestamp - origin) // period)
+        current = opened.get(name)
+        if current is not None and current[0] == index:
+            _update(current[1], timestamp, value)
+            continue
+        if current is not None:
+            if index < current[0]:
+                raise ValueError("The {name} signals are not in time order".format(name=name))
+            yield _bucket(name, current[0], current[1], origin, period)
+        opened[name] = (index, [1, value, value, value, timestamp, value, timestamp, value])
+    for index, name, accumulator in sorted((index, name, accumulator)
+                                           for name, (index, accumulator) in opened.items()):
+        yield _bucket(name, index, accumulator, origin, period)
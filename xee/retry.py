@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# coding: utf8
+"""This script contains the retry and hedging policies of the GET requests"""
+
+import collections
+import math
+import random
+import threading
+import time
+
+try:
+    monotonic = time.monotonic
+except AttributeError:
+    # Python 2, no monotonic clock in the standard library
+    monotonic = time.time
+
+# The statuses worth a new attempt, the other errors would fail the same way
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class RetryBudget(object):
+    """
+        Thread safe cap on the retries, shared by every request of a client.
+
+        Every first attempt deposits ratio retries (up to reserve), every retry withdraws
+        one: a failing API is not hit by max_retries times more requests than usual.
+    """
+
+    def __init__(self, ratio=0.1, reserve=10):
+        """
+        Initialize a new (full) budget.
+
+        Parameters
+        ----------
+        ratio   :   float, optional
+                    The number of retries earned by every request.
+                    Default is 0.1 (one retry every 10 requests).
+        reserve :   float, optional
+                    The maximum number of retries saved.
+                    Default is 10.
+
+        """
+        self.ratio = ratio
+        self.reserve = reserve
+        self._balance = float(reserve)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """
+        Earn retries for a new request.
+        """
+        with self._lock:
+            self._balance = min(self.reserve, self._balance + self.ratio)
+
+    def withdraw(self):
+        """
+        Take a retry from the budget.
+
+        Returns
+        -------
+        bool
+            True if the retry can be done, False if the budget is exhausted.
+
+        """
+        with self._lock:
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+class RetryPolicy(object):
+    """
+        Retry of the idempotent GET requests, with exponential backoff and full jitter.
+
+        The connection errors, timeouts and statuses are retried (a Retry-After of the
+        response is waited for if longer than the backoff).
+    """
+
+    def __init__(self, max_retries=2, backoff=0.1, max_backoff=2.0, statuses=RETRY_STATUSES,
+                 budget=None, sleep=time.sleep, jitter=random.random):
+        """
+        Initialize a new retry policy.
+
+        Parameters
+        ----------
+        max_retries :   int, optional
+                        The maximum number of retries of a request.
+                        Default is 2.
+        backoff     :   float, optional
+                        The base delay (in seconds), doubled at every retry.
+                        Default is 0.1.
+        max_backoff :   float, optional
+                        The maximum delay (in seconds) between two attempts.
+                        Default is 2.
+        statuses    :   tuple, optional
+                        The HTTP statuses to retry.
+                        Default is RETRY_STATUSES (500, 502, 503, 504).
+        budget      :   RetryBudget, optional
+                        The budget the retries are taken from (share it between policies
+                        to cap the retries of the whole client).
+                        Default is no budget.
+        sleep       :   callable, optional
+                        The function to wait with.
+        jitter      :   callable, optional
+                        The function returning a random float in [0, 1).
+
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+        self.budget = budget
+        self.sleep = sleep
+        self.jitter = jitter
+
+    def delay(self, attempt):
+        """
+        Compute the delay before a retry.
+
+        Parameters
+        ----------
+        attempt :   int
+                    The number of the failed attempt, starting at 0.
+
+        Returns
+        -------
+        float
+            The number of seconds to wait, between 0 and backoff * 2 ** attempt.
+
+        """
+        return self.jitter() * min(self.max_backoff, self.backoff * 2 ** attempt)
+
+    def should_retry(self, attempt):
+        """
+        Tell if a failed attempt can be retried, taking the retry from the budget.
+
+        Parameters
+        ----------
+        attempt :   int
+                    The number of the failed attempt, starting at 0.
+
+        Returns
+        -------
+        bool
+            True if the request must be sent again.
+
+        """
+        if attempt >= self.max_retries:
+            return False
+        return self.budget is None or self.budget.withdraw()
+
+    def started(self):
+        """
+        Record a new request (not a retry) in the budget.
+        """
+        if self.budget is not None:
+            self.budget.deposit()
+
+
+class HedgePolicy(object):
+    """
+        Hedged requests: if a response is slower than the usual ones, a duplicate request
+        is sent and the first response wins.
+
+        The latencies are recorded per endpoint, the hedging delay is their percentile.
+    """
+
+    def __init__(self, percentile=95, min_samples=20, window=500, min_delay=0.0, max_hedges=1,
+                 clock=monotonic):
+        """
+        Initialize a new hedging policy.
+
+        Parameters
+        ----------
+        percentile  :   float, optional
+                        The latency percentile after which a duplicate is sent.
+                        Default is 95.
+        min_samples :   int, optional
+                        The number of latencies recorded before hedging.
+                        Default is 20.
+        window      :   int, optional
+                        The number of latest latencies the percentile is computed on.
+                        Default is 500.
+        min_delay   :   float, optional
+                        The minimum delay (in seconds) before a duplicate is sent.
+                        Default is 0.
+        max_hedges  :   int, optional
+                        The maximum number of duplicates of a request.
+                        Default is 1.
+        clock       :   callable, optional
+                        The clock the latencies are measured with, in seconds.
+                        Default is time.monotonic (time.time on Python 2).
+
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window = window
+        self.min_delay = min_delay
+        self.max_hedges = max_hedges
+        self.clock = clock
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, latency):
+        """
+        Record the latency of a response.
+
+        Parameters
+        ----------
+        endpoint    :   str
+                        The endpoint (Xee method name) of the request.
+        latency     :   float
+                        The duration (in seconds) of the request.
+
+        """
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None:
+                latencies = self._latencies[endpoint] = collections.deque(maxlen=self.window)
+            latencies.append(latency)
+
+    def delay(self, endpoint):
+        """
+        Compute the delay after which a duplicate request is sent.
+
+        Parameters
+        ----------
+        endpoint    :   str
+                        The endpoint (Xee method name) of the request.
+
+        Returns
+        -------
+        float
+            The number of seconds to wait for the response before hedging,
+            None if not enough latencies were recorded yet.
+
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(endpoint, ()))
+        if len(latencies) < self.min_samples:
+            return None
+        index = int(math.ceil(self.percentile / 100.0 * len(latencies))) - 1
+        return max(self.min_delay, latencies[max(0, index)])
@@ -7,12 +7,48 @@ try:
 except ImportError:
     import urllib as url_parser
 
-import isodate
-import requests
-
+import collections
+import datetime
+import functools
+import threading
+import time
+import timeit
+
+import xee.batch as xee_batch
+import xee.columnar as xee_columnar
 import xee.entities as xee_entities
 import xee.exceptions as xee_exceptions
+import xee.instrumentation as xee_instrumentation
+import xee.transport as xee_transport
 import xee.utils as xee_utils
+import xee.watch as xee_watch
+import xee.windows as xee_windows
+
+# The maximum number of results kept by Xee.poll
+POLLED_MAX_ENTRIES = 4096
+
+
+def _instrumented(method):
+    """
+    Send a RequestEvent to the hooks of the Xee instance after every call of the method.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **options):
+        if not self.hooks:
+            return method(self, *args, **options)
+        self._local.request = None
+        started_at = time.time()
+        started = timeit.default_timer()
+        try:
+            result, err = method(self, *args, **options)
+        except Exception as error:
+            self._emit(started_at, timeit.default_timer() - started, None, error)
+            raise
+        self._emit(started_at, timeit.default_timer() - started, result, err)
+        return result, err
+
+    return wrapper
 
 
 class Xee(object):
@@ -20,7 +56,8 @@ class Xee(object):
         SDK for Xee platform v3.0
     """
 
-    def __init__(self, client_id, client_secret, redirect_uri, env='cloud'):
+    def __init__(self, client_id, client_secret, redirect_uri, env='cloud', transport=None,
+                 cache=None, retry=None, hedge=None, hooks=None, host=None, **transport_options):
         """
         Initialize a new Xee SDK.
 
@@ -36,12 +73,236 @@ class Xee(object):
                             The environment you want for the requests.
                             Can be 'cloud' or 'sandbox'.
                             Default is 'cloud'.
+        transport       :   Transport, optional
+                            The HTTP transport to send the requests with.
+                            Default is a new pooled Transport to the env host.
+        cache           :   ResponseCache, optional
+                            The cache of the responses (see xee.cache for the policies).
+                            Default is no cache.
+        retry           :   RetryPolicy or dict, optional
+                            The retry policy of the GET requests, a dict gives the
+                            RetryPolicy by endpoint (Xee method name, see xee.retry).
+                            Default is no retry.
+        hedge           :   HedgePolicy or dict, optional
+                            The hedging policy of the GET requests, a dict gives the
+                            HedgePolicy by endpoint (Xee method name, see xee.retry).
+                            Default is no hedging.
+        hooks           :   list, optional
+                            The callables receiving a RequestEvent after every get_* call
+                            (see add_hook and xee.instrumentation).
+                            Default is no hook.
+        host            :   str, optional
+                            The root (with the version) of the API, overrides env
+                            (a FakeXeeServer url for example).
+                            Default is https://{env}.xee.com/v3.
+        transport_options : optional
+                            Options of the default Transport (pool_maxsize,
+                            connect_timeout, read_timeout, keep_alive, warm_up...).
 
         """
         self.client_id = client_id
         self.client_secret = client_secret
         self.redirect_uri = redirect_uri
-        self.host = 'https://{env}.xee.com/v3'.format(env=env)
+        self.host = host or 'https://{env}.xee.com/v3'.format(env=env)
+        if transport is None:
+            transport = xee_transport.Transport(self.host, **transport_options)
+        self.transport = transport
+        self.cache = cache
+        self.retry = retry
+        self.hedge = hedge
+        self.hooks = list(hooks or [])
+        self._local = threading.local()
+        self._polled = collections.OrderedDict()
+        self._polled_lock = threading.Lock()
+
+    def _get(self, endpoint, route, access_token, raw=False):
+        if not self.hooks:
+            return self._load(endpoint, route, access_token, raw)
+        self.transport.reset_timing()
+        self._local.sent = False
+        started = timeit.default_timer()
+        try:
+            return self._load(endpoint, route, access_token, raw)
+        finally:
+            # Answered by the cache only if it never called the loader in this thread
+            cached = self.cache is not None and not raw and not self._local.sent
+            self._local.request = (endpoint, route, timeit.default_timer() - started,
+                                   self.transport.last_timing(), cached)
+
+    def _load(self, endpoint, route, access_token, raw=False):
+        retry = self.retry.get(endpoint) if isinstance(self.retry, dict) else self.retry
+        hedge = self.hedge.get(endpoint) if isinstance(self.hedge, dict) else self.hedge
+        if raw:
+            # Raw bodies are handed over as is, never cached
+            return self.transport.get(route, access_token, retry=retry, hedge=hedge,
+                                      endpoint=endpoint, raw=True)
+        if retry is None and hedge is None:
+            send = self.transport.get
+        else:
+            def send(loaded_route, loaded_token):
+                return self.transport.get(loaded_route, loaded_token, retry=retry, hedge=hedge,
+                                          endpoint=endpoint)
+        if self.cache is None:
+            return send(route, access_token)
+
+        def loader(loaded_route, loaded_token):
+            self._local.sent = True
+            response = send(loaded_route, loaded_token)
+            return response, self.transport.last_size()
+
+        return self.cache.fetch(endpoint, route, access_token, loader)
+
+    def add_hook(self, hook):
+        """
+        Receive the instrumentation of every get_* call.
+
+        Parameters
+        ----------
+        hook    :   callable
+                    Called with a RequestEvent (endpoint, route, status code, time to first
+                    byte, network, total, decoding and parsing times, response bytes, number
+                    of records...) after every call. Its errors are ignored.
+
+        """
+        self.hooks.append(hook)
+
+    def _emit(self, started_at, elapsed, result, err):
+        request = self._local.request
+        if request is None:
+            # Nothing was requested in this thread (windows fetched by workers...)
+            return
+        self._local.request = None
+        endpoint, route, get_time, timing, cached = request
+        if timing is None:
+            # Answered by the cache, or failed before any response (connection error...)
+            timing = xee_instrumentation.RequestTiming(None, 0.0, 0.0, 0, 0.0)
+        if isinstance(result, (list, xee_columnar.SignalFrame, xee_columnar.LocationTrack)):
+            records = len(result)
+        elif isinstance(result, bytes):
+            # Raw body, not decoded
+            records = 0
+        else:
+            records = 0 if result is None else 1
+        event = xee_instrumentation.RequestEvent(
+            endpoint, route, started_at, timing.status_code, timing.ttfb, timing.network_time,
+            elapsed, timing.response_bytes, timing.decode_time, max(0.0, elapsed - get_time),
+            records, cached, err)
+        for hook in self.hooks:
+            try:
+                hook(event)
+            except Exception:  # pylint: disable=broad-except
+                # A broken hook must not break the calls
+                pass
+
+    def batch(self, max_workers=10):
+        """
+        Create a batch executor to run many calls with a bounded concurrency.
+
+        Parameters
+        ----------
+        max_workers :   int, optional
+                        The maximum number of calls running at the same time.
+                        Default is 10.
+
+        Returns
+        -------
+        Batch
+            The batch executor (see Batch.get_status_many, Batch.map...).
+
+        """
+        return xee_batch.Batch(self, max_workers)
+
+    def map(self, method, args_list, max_workers=10, **options):
+        """
+        Run an endpoint method for every arguments on a worker pool.
+
+        Parameters
+        ----------
+        method      :   str or callable
+                        The name of the method to call (for example 'get_status').
+        args_list   :   iterable
+                        The positional arguments of every call (a tuple per call).
+        max_workers :   int, optional
+                        The maximum number of calls running at the same time.
+                        Default is 10.
+        options     :   optional
+                        Keyword arguments given to every call.
+
+        Returns
+        -------
+        list
+            A list of (result, error) tuples, in the same order as args_list.
+
+        """
+        return self.batch(max_workers).map(method, args_list, **options)
+
+    def poll(self, method, *args, **options):
+        """
+        Call an endpoint method and tell if its result changed since the previous poll.
+
+        The transport sends the validators (ETag / Last-Modified) of the previous
+        response, on a 304 Not Modified the previously parsed result is returned.
+
+        Parameters
+        ----------
+        method          :   str
+                            The name of the method to call (for example 'get_status').
+        args            :   optional
+                            The positional arguments of the method.
+        options         :   optional
+                            The keyword arguments of the method.
+
+        Returns
+        -------
+        tuple
+            A tuple containing the result, Changed, Error.
+            Changed is False when the result is the same object as the previous poll.
+            The error is None if everything went fine.
+
+        """
+        key = (method, repr(args), repr(sorted(options.items())))
+        self.transport.reset_changed()
+        result, err = getattr(self, method)(*args, **options)
+        if err is not None:
+            return None, True, err
+        with self._polled_lock:
+            if not self.transport.last_changed() and key in self._polled:
+                return self._polled[key], False, None
+            self._polled.pop(key, None)
+            self._polled[key] = result
+            while len(self._polled) > POLLED_MAX_ENTRIES:
+                self._polled.popitem(last=False)
+        return result, True, None
+
+    def watch_status(self, car_ids, access_token, interval=10, **options):
+        """
+        Poll the status of many cars and only yield what changed.
+
+        The cars are polled concurrently, each one with its own interval: shortened while
+        the car moves, lengthened while it is parked (see StatusWatcher).
+
+        Parameters
+        ----------
+        car_ids         :   list
+                            The ids of the cars to watch.
+        access_token    :   str
+                            the access token of the user.
+        interval        :   float, optional
+                            The usual number of seconds between two polls of a car.
+                            Default is 10.
+        options         :   optional
+                            min_interval, max_interval, backoff, max_workers
+                            (see StatusWatcher).
+
+        Returns
+        -------
+        StatusWatcher
+            An iterable yielding a StatusChange (car_id, changed signals, location and
+            accelerometer, full status, error) when a status changes or a poll fails.
+            Call its stop method to end the iteration.
+
+        """
+        return xee_watch.StatusWatcher(self, car_ids, access_token, interval, **options)
 
     def get_authentication_url(self, state=None):
         """
@@ -83,9 +344,9 @@ class Xee(object):
         """
         route = '{host}/auth/access_token'.format(host=self.host)
         payload = {'grant_type': 'authorization_code', 'code': code}
-        request = requests.post(route, data=payload, auth=(self.client_id, self.client_secret))
+        request = self.transport.post(route, payload, (self.client_id, self.client_secret))
         if request.status_code == 200:
-            response = request.json()
+            response = self.transport.decode(request.content)
             return xee_entities.parse_token(response), None
         else:
             return None, Exception(request.text)
@@ -108,13 +369,14 @@ class Xee(object):
         """
         route = '{host}/auth/access_token'.format(host=self.host)
         payload = {'grant_type': 'refresh_token', 'refresh_token': refresh_token}
-        request = requests.post(route, data=payload, auth=(self.client_id, self.client_secret))
+        request = self.transport.post(route, payload, (self.client_id, self.client_secret))
         if request.status_code == 200:
-            response = request.json()
+            response = self.transport.decode(request.content)
             return xee_entities.parse_token(response), None
         else:
             return None, Exception(request.text)
 
+    @_instrumented
     def get_user(self, access_token):
         """
         Fetch info about the connected user.
@@ -133,11 +395,12 @@ class Xee(object):
         """
         route = '{host}/users/me'.format(host=self.host)
         try:
-            response = xee_utils.do_get_request(route, access_token)
+            response = self._get('get_user', route, access_token)
             return xee_entities.parse_user(response), None
         except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
             return None, err
 
+    @_instrumented
     def get_cars(self, access_token):
         """
         Fetch the cars of the connected user.
@@ -156,13 +419,14 @@ class Xee(object):
         """
         route = '{host}/users/me/cars'.format(host=self.host)
         try:
-            response = xee_utils.do_get_request(route, access_token)
+            response = self._get('get_cars', route, access_token)
             return [xee_entities.parse_car(car) for car in response], None
         except ValueError:
             return [], None
         except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
             return None, err
 
+    @_instrumented
     def get_car(self, car_id, access_token):
         """
         Fetch a specific car info.
@@ -183,12 +447,13 @@ class Xee(object):
         """
         route = '{host}/cars/{car_id}'.format(host=self.host, car_id=car_id)
         try:
-            response = xee_utils.do_get_request(route, access_token)
+            response = self._get('get_car', route, access_token)
             return xee_entities.parse_car(response), None
         except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
             return None, err
 
-    def get_status(self, car_id, access_token):
+    @_instrumented
+    def get_status(self, car_id, access_token, lazy=False):
         """
         Fetch the status of a car.
 
@@ -198,6 +463,9 @@ class Xee(object):
                             the id of the car you are looking for the status.
         access_token    :   str
                             the access token of the user.
+        lazy            :   bool, optional
+                            Return lazy entities, decoding their fields on first access.
+                            Default is False.
 
         Returns
         -------
@@ -208,11 +476,12 @@ class Xee(object):
         """
         route = '{host}/cars/{car_id}/status'.format(host=self.host, car_id=car_id)
         try:
-            response = xee_utils.do_get_request(route, access_token)
-            return xee_entities.parse_status(response), None
+            response = self._get('get_status', route, access_token)
+            return xee_entities.parse_status(response, lazy), None
         except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
             return None, err
 
+    @_instrumented
     def get_signals(self, car_id, access_token, **options):
         """
         Fetch a list of signals for a specific car within a period.
@@ -236,40 +505,64 @@ class Xee(object):
                             The list if signals names you want to filter the result.
                             For example ['Odometer', 'FuelLevel'].
                             Default value is all the signals available.
+        window          :   timedelta, optional
+                            Split the period in windows of this duration, fetched
+                            concurrently and merged in time order (requires begin).
+                            Default is a single request.
+        max_workers     :   int, optional
+                            The maximum number of windows fetched at the same time.
+                            Default is 4.
+        target_size     :   int, optional
+                            Adapt the window duration to get about this number of
+                            records per request (window is the first one).
+                            Default is a fixed window.
+        split_names     :   bool, optional
+                            With window, also send a request per signal name.
+                            Default is False.
+        as_columns      :   bool, optional
+                            Return a columnar SignalFrame instead of a list.
+                            Default is False.
+        lazy            :   bool, optional
+                            Return lazy entities, decoding their fields on first access.
+                            Default is False.
+        raw             :   bool, optional
+                            Return the raw JSON bytes of the response, neither decoded,
+                            parsed nor cached (not with window).
+                            Default is False.
 
         Returns
         -------
         tuple
-            A tuple containing [Signals], Error.
+            A tuple containing [Signals] (or SignalFrame, or bytes), Error.
             The error is None if everything went fine.
 
         """
+        as_columns = options.get('as_columns', False)
+        if options.get('window', None) is not None:
+            signals, err = self._get_windowed(
+                self.get_signals, car_id, access_token, options,
+                lambda signal: (signal.name, signal.date, signal.value),
+                lambda signal: signal.date)
+            if as_columns and err is None:
+                return xee_columnar.SignalFrame.from_signals(signals), None
+            return signals, err
         route = '{host}/cars/{car_id}/signals'.format(host=self.host, car_id=car_id)
-        params = {}
-        o_limit = options.get('limit', None)
-        if o_limit is not None:
-            if o_limit > 0:
-                params['limit'] = o_limit
-            else:
-                raise ValueError(
-                    "limit must be a non 0 positive integer, " + str(o_limit) + " given")
-        if options.get('begin', None) is not None:
-            params['begin'] = isodate.datetime_isoformat(options['begin'])
-        if options.get('end', None) is not None:
-            params['end'] = isodate.datetime_isoformat(options['end'])
-        if options.get('names', None) is not None:
-            params['name'] = ','.join(options['names'])
-        if bool(params):
-            route = '?'.join([route, url_parser.urlencode(params)])
+        route = xee_utils.add_params(route, xee_utils.signals_params(options))
         try:
-            response = xee_utils.do_get_request(route, access_token)
-            return [xee_entities.parse_signal(signal) for signal in response], None
+            response = self._get('get_signals', route, access_token, options.get('raw', False))
+            if options.get('raw', False):
+                return response, None
+            if as_columns:
+                return xee_columnar.SignalFrame.from_dicts(response), None
+            return [xee_entities.parse_signal(signal, options.get('lazy', False))
+                    for signal in response], None
         except ValueError:
             # Happens when the signals list is empty
-            return [], None
+            return (xee_columnar.SignalFrame() if as_columns else []), None
         except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
             return None, err
 
+    @_instrumented
     def get_locations(self, car_id, access_token, **options):
         """
         Fetch a list of locations for a specific car within a period.
@@ -289,34 +582,119 @@ class Xee(object):
         limit           :   int, optional
                             The maximum number of locations you want back.
                             Default value is no limit.
+        window          :   timedelta, optional
+                            Split the period in windows of this duration, fetched
+                            concurrently and merged in time order (requires begin).
+                            Default is a single request.
+        max_workers     :   int, optional
+                            The maximum number of windows fetched at the same time.
+                            Default is 4.
+        target_size     :   int, optional
+                            Adapt the window duration to get about this number of
+                            records per request (window is the first one).
+                            Default is a fixed window.
+        as_track        :   bool, optional
+                            Return a packed LocationTrack instead of a list.
+                            Default is False.
+        lazy            :   bool, optional
+                            Return lazy entities, decoding their fields on first access.
+                            Default is False.
+        raw             :   bool, optional
+                            Return the raw JSON bytes of the response, neither decoded,
+                            parsed nor cached (not with window).
+                            Default is False.
 
         Returns
         -------
         tuple
-            A tuple containing [Locations], Error.
+            A tuple containing [Locations] (or LocationTrack, or bytes), Error.
             The error is None if everything went fine.
 
         """
+        as_track = options.get('as_track', False)
+        if options.get('window', None) is not None:
+            locations, err = self._get_windowed(
+                self.get_locations, car_id, access_token, options,
+                lambda location: (location.date, location.latitude, location.longitude),
+                lambda location: location.date)
+            if as_track and err is None:
+                return xee_columnar.LocationTrack.from_locations(locations), None
+            return locations, err
         route = '{host}/cars/{car_id}/locations'.format(host=self.host, car_id=car_id)
-        params = {}
-        if options.get('limit', None) is not None:
-            params['limit'] = options['limit']
-        if options.get('begin', None) is not None:
-            params['begin'] = isodate.datetime_isoformat(options['begin'])
-        if options.get('end', None) is not None:
-            params['end'] = isodate.datetime_isoformat(options['end'])
-        if bool(params):
-            route = '?'.join([route, url_parser.urlencode(params)])
+        route = xee_utils.add_params(route, xee_utils.locations_params(options))
         try:
-            response = xee_utils.do_get_request(route, access_token)
-            return [xee_entities.parse_location(location) for location in response], None
+            response = self._get('get_locations', route, access_token, options.get('raw', False))
+            if options.get('raw', False):
+                return response, None
+            if as_track:
+                return xee_columnar.LocationTrack.from_dicts(response), None
+            return [xee_entities.parse_location(location, options.get('lazy', False))
+                    for location in response], None
         except ValueError:
             # Happens when the locations list is empty
-            return [], None
+            return (xee_columnar.LocationTrack() if as_track else []), None
         except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
             return None, err
 
-    def get_trips(self, car_id, access_token, begin=None, end=None):
+    def iter_signals(self, car_id, access_token, **options):
+        """
+        Stream the signals of a specific car within a period, with a flat memory.
+
+        Parameters
+        ----------
+        car_id          :   str
+                            the id of the car you are looking for the signals.
+        access_token    :   str
+                            the access token of the user.
+        options         :   optional
+                            begin, end, limit and names, see get_signals.
+
+        Returns
+        -------
+        tuple
+            A tuple containing a generator of Signals, Error.
+            The signals are decoded while the body is downloaded.
+            The error is None if everything went fine.
+
+        """
+        route = '{host}/cars/{car_id}/signals'.format(host=self.host, car_id=car_id)
+        route = xee_utils.add_params(route, xee_utils.signals_params(options))
+        return self._iter(route, access_token, xee_entities.parse_signal)
+
+    def iter_locations(self, car_id, access_token, **options):
+        """
+        Stream the locations of a specific car within a period, with a flat memory.
+
+        Parameters
+        ----------
+        car_id          :   str
+                            the id of the car you are looking for the locations.
+        access_token    :   str
+                            the access token of the user.
+        options         :   optional
+                            begin, end and limit, see get_locations.
+
+        Returns
+        -------
+        tuple
+            A tuple containing a generator of Locations, Error.
+            The locations are decoded while the body is downloaded.
+            The error is None if everything went fine.
+
+        """
+        route = '{host}/cars/{car_id}/locations'.format(host=self.host, car_id=car_id)
+        route = xee_utils.add_params(route, xee_utils.locations_params(options))
+        return self._iter(route, access_token, xee_entities.parse_location)
+
+    def _iter(self, route, access_token, parser):
+        try:
+            items = self.transport.stream(route, access_token)
+        except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
+            return None, err
+        return (parser(item) for item in items), None
+
+    @_instrumented
+    def get_trips(self, car_id, access_token, begin=None, end=None, **options):
         """
         Fetch a list of trips for a specific car within a period.
 
@@ -332,31 +710,88 @@ class Xee(object):
         end             :   datetime, optional
                             The last datetime of the interval you want the trips.
                             Default value is current moment.
+        window          :   timedelta, optional
+                            Split the period in windows of this duration, fetched
+                            concurrently and merged in time order (requires begin).
+                            Default is a single request.
+        max_workers     :   int, optional
+                            The maximum number of windows fetched at the same time.
+                            Default is 4.
+        target_size     :   int, optional
+                            Adapt the window duration to get about this number of
+                            records per request (window is the first one).
+                            Default is a fixed window.
+        lazy            :   bool, optional
+                            Return lazy entities, decoding their fields on first access.
+                            Default is False.
+        include         :   list, optional
+                            Load these sub-resources of every trip concurrently and return
+                            TripBundles: 'signals', 'locations', 'stats', 'mileage' and / or
+                            'duration' (see Batch.get_trip_bundle_many).
+                            Default is the trips alone.
+        include_workers :   int, optional
+                            The maximum number of sub-resources loaded at the same time.
+                            Default is 10.
 
         Returns
         -------
         tuple
-            A tuple containing [Trip], Error.
+            A tuple containing [Trip] (or [TripBundle] with include), Error.
             The error is None if everything went fine.
 
         """
+        if options.get('include', None):
+            include = options.pop('include')
+            trips, err = self.get_trips(car_id, access_token, begin, end, **options)
+            if err is not None:
+                return None, err
+            bundles = self.batch(options.get('include_workers', 10)).get_trip_bundle_many(
+                trips, access_token, include)
+            return bundles, None
+        if options.get('window', None) is not None:
+            options = dict(options, begin=begin, end=end)
+            return self._get_windowed(self.get_trips, car_id, access_token, options,
+                                      lambda trip: trip.id, lambda trip: trip.begin_date)
         route = '{host}/cars/{car_id}/trips'.format(host=self.host, car_id=car_id)
-        params = {}
-        if begin is not None:
-            params['begin'] = isodate.datetime_isoformat(begin)
-        if end is not None:
-            params['end'] = isodate.datetime_isoformat(end)
-        if bool(params):
-            route = '?'.join([route, url_parser.urlencode(params)])
+        route = xee_utils.add_params(route, xee_utils.period_params(begin, end))
         try:
-            response = xee_utils.do_get_request(route, access_token)
-            return [xee_entities.parse_trip(trip) for trip in response], None
+            response = self._get('get_trips', route, access_token)
+            return [xee_entities.parse_trip(trip, options.get('lazy', False))
+                    for trip in response], None
         except ValueError:
             # Happens when the trips list is empty
             return [], None
         except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
             return None, err
 
+    @staticmethod
+    def _get_windowed(method, car_id, access_token, options, key, sort_key):
+        begin = options.get('begin', None)
+        if begin is None:
+            raise ValueError("begin is required to split the period in windows")
+        if options.get('limit', None) is not None:
+            raise ValueError("limit can not be used with window")
+        if options.get('raw', False):
+            raise ValueError("raw can not be used with window")
+        end = options.get('end', None)
+        if end is None:
+            end = datetime.datetime.now(begin.tzinfo)
+
+        def fetch(window_begin, window_end, names):
+            window_options = {'begin': window_begin, 'end': window_end}
+            if names is not None:
+                window_options['names'] = names
+            if options.get('lazy', False):
+                window_options['lazy'] = True
+            return method(car_id, access_token, **window_options)
+
+        return xee_windows.fetch_windowed(fetch, begin, end, options['window'], key, sort_key,
+                                          names=options.get('names', None),
+                                          split_names=options.get('split_names', False),
+                                          max_workers=options.get('max_workers', 4),
+                                          target_size=options.get('target_size', None))
+
+    @_instrumented
     def get_used_time(self, car_id, access_token, **options):
         """
         Fetch the used time value for a specific car within a period.
@@ -385,21 +820,14 @@ class Xee(object):
 
         """
         route = '{host}/cars/{car_id}/stats/usedtime'.format(host=self.host, car_id=car_id)
-        params = {}
-        if options.get('begin', None) is not None:
-            params['begin'] = isodate.datetime_isoformat(options.get('begin'))
-        if options.get('initial_value', None) is not None:
-            params['end'] = isodate.datetime_isoformat(options.get('end'))
-        if options.get('initial_value', None) is not None:
-            params['initialValue'] = int(options.get('initial_value'))
-        if bool(params):
-            route = '?'.join([route, url_parser.urlencode(params)])
+        route = xee_utils.add_params(route, xee_utils.stat_params(options, int))
         try:
-            response = xee_utils.do_get_request(route, access_token)
+            response = self._get('get_used_time', route, access_token)
             return xee_entities.parse_used_time(response), None
         except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
             return None, err
 
+    @_instrumented
     def get_mileage(self, car_id, access_token, **options):
         """
          Fetch the mileage value for a specific car within a period.
@@ -428,22 +856,15 @@ class Xee(object):
 
          """
         route = '{host}/cars/{car_id}/stats/mileage'.format(host=self.host, car_id=car_id)
-        params = {}
-        if options.get('begin', None) is not None:
-            params['begin'] = isodate.datetime_isoformat(options.get('begin'))
-        if options.get('initial_value', None) is not None:
-            params['end'] = isodate.datetime_isoformat(options.get('end'))
-        if options.get('initial_value', None) is not None:
-            params['initialValue'] = float(options.get('initial_value'))
-        if bool(params):
-            route = '?'.join([route, url_parser.urlencode(params)])
+        route = xee_utils.add_params(route, xee_utils.stat_params(options, float))
         try:
-            response = xee_utils.do_get_request(route, access_token)
+            response = self._get('get_mileage', route, access_token)
             return xee_entities.parse_mileage(response), None
         except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
             return None, err
 
-    def get_trip(self, trip_id, access_token):
+    @_instrumented
+    def get_trip(self, trip_id, access_token, lazy=False):
         """
         Fetch a specific trip from a car.
 
@@ -453,6 +874,9 @@ class Xee(object):
                             the id of the trip you are looking for.
         access_token    :   str
                             the access token of the user.
+        lazy            :   bool, optional
+                            Return lazy entities, decoding their fields on first access.
+                            Default is False.
 
         Returns
         -------
@@ -463,12 +887,13 @@ class Xee(object):
         """
         route = '{host}/trips/{trip_id}'.format(host=self.host, trip_id=trip_id)
         try:
-            response = xee_utils.do_get_request(route, access_token)
-            return xee_entities.parse_trip(response), None
+            response = self._get('get_trip', route, access_token)
+            return xee_entities.parse_trip(response, lazy), None
         except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
             return None, err
 
-    def get_trip_signals(self, trip_id, access_token, names=None):
+    @_instrumented
+    def get_trip_signals(self, trip_id, access_token, names=None, as_columns=False, lazy=False):
         """
         Fetch a list of signals for a specific car during a trip.
 
@@ -482,31 +907,36 @@ class Xee(object):
                             The list if signals names you want to filter the result.
                             For example ['Odometer', 'FuelLevel'].
                             Default value is all the signals available.
+        as_columns      :   bool, optional
+                            Return a columnar SignalFrame instead of a list.
+                            Default is False.
+        lazy            :   bool, optional
+                            Return lazy entities, decoding their fields on first access.
+                            Default is False.
 
         Returns
         -------
         tuple
-            A tuple containing [Signals], Error.
+            A tuple containing [Signals] (or SignalFrame), Error.
             The error is None if everything went fine.
 
         """
         route = '{host}/trips/{trip_id}/signals'.format(host=self.host, trip_id=trip_id)
-        params = {}
-        if names is not None:
-            params['name'] = ','.join(names)
-        if bool(params):
-            route = '{route}?{params}'.format(route=route, params=url_parser.urlencode(params))
+        route = xee_utils.add_params(route, xee_utils.names_params(names))
         try:
-            response = xee_utils.do_get_request(route, access_token)
-            signals = [xee_entities.parse_signal(signal) for signal in response]
+            response = self._get('get_trip_signals', route, access_token)
+            if as_columns:
+                return xee_columnar.SignalFrame.from_dicts(response), None
+            signals = [xee_entities.parse_signal(signal, lazy) for signal in response]
             return signals, None
         except ValueError:
             # Happens when the signals list is empty
-            return [], None
+            return (xee_columnar.SignalFrame() if as_columns else []), None
         except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
             return None, err
 
-    def get_trip_locations(self, trip_id, access_token):
+    @_instrumented
+    def get_trip_locations(self, trip_id, access_token, as_track=False, lazy=False):
         """
         Fetch a list of locations for a specific car during a trip.
 
@@ -516,25 +946,80 @@ class Xee(object):
                             the id of the trip you are looking for the signals.
         access_token    :   str
                             the access token of the user.
+        as_track        :   bool, optional
+                            Return a packed LocationTrack instead of a list.
+                            Default is False.
+        lazy            :   bool, optional
+                            Return lazy entities, decoding their fields on first access.
+                            Default is False.
 
         Returns
         -------
         tuple
-            A tuple containing [Locations], Error.
+            A tuple containing [Locations] (or LocationTrack), Error.
             The error is None if everything went fine.
 
         """
         route = '{host}/trips/{trip_id}/locations'.format(host=self.host, trip_id=trip_id)
         try:
-            response = xee_utils.do_get_request(route, access_token)
-            locations = [xee_entities.parse_location(location) for location in response]
+            response = self._get('get_trip_locations', route, access_token)
+            if as_track:
+                return xee_columnar.LocationTrack.from_dicts(response), None
+            locations = [xee_entities.parse_location(location, lazy) for location in response]
             return locations, None
         except ValueError:
             # Happens when the locations list is empty
-            return [], None
+            return (xee_columnar.LocationTrack() if as_track else []), None
         except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
             return None, err
 
+    def iter_trip_signals(self, trip_id, access_token, names=None):
+        """
+        Stream the signals of a specific car during a trip, with a flat memory.
+
+        Parameters
+        ----------
+        trip_id         :   str
+                            the id of the trip you are looking for the signals.
+        access_token    :   str
+                            the access token of the user.
+        names           :   list, optional
+                            The list if signals names you want to filter the result.
+                            Default value is all the signals available.
+
+        Returns
+        -------
+        tuple
+            A tuple containing a generator of Signals, Error.
+            The error is None if everything went fine.
+
+        """
+        route = '{host}/trips/{trip_id}/signals'.format(host=self.host, trip_id=trip_id)
+        route = xee_utils.add_params(route, xee_utils.names_params(names))
+        return self._iter(route, access_token, xee_entities.parse_signal)
+
+    def iter_trip_locations(self, trip_id, access_token):
+        """
+        Stream the locations of a specific car during a trip, with a flat memory.
+
+        Parameters
+        ----------
+        trip_id         :   str
+                            the id of the trip you are looking for the locations.
+        access_token    :   str
+                            the access token of the user.
+
+        Returns
+        -------
+        tuple
+            A tuple containing a generator of Locations, Error.
+            The error is None if everything went fine.
+
+        """
+        route = '{host}/trips/{trip_id}/locations'.format(host=self.host, trip_id=trip_id)
+        return self._iter(route, access_token, xee_entities.parse_location)
+
+    @_instrumented
     def get_trip_stats(self, trip_id, access_token):
         """
         Fetch a list of stats for a specific trip.
@@ -555,7 +1040,7 @@ class Xee(object):
         """
         route = '{host}/trips/{trip_id}/stats'.format(host=self.host, trip_id=trip_id)
         try:
-            response = xee_utils.do_get_request(route, access_token)
+            response = self._get('get_trip_stats', route, access_token)
             stats = [xee_entities.parse_trip_stat(stat) for stat in response]
             return stats, None
         except ValueError:
@@ -564,6 +1049,7 @@ class Xee(object):
         except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
             return None, err
 
+    @_instrumented
     def get_trip_mileage(self, trip_id, access_token):
         """
         Fetch trip mileage stat.
@@ -584,12 +1070,13 @@ class Xee(object):
         """
         route = '{host}/trips/{trip_id}/stats/mileage'.format(host=self.host, trip_id=trip_id)
         try:
-            response = xee_utils.do_get_request(route, access_token)
+            response = self._get('get_trip_mileage', route, access_token)
             mileage = xee_entities.parse_trip_stat(response)
             return mileage, None
         except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
             return None, err
 
+    @_instrumented
     def get_trip_duration(self, trip_id, access_token):
         """
         Fetch trip duration stat.
@@ -610,7 +1097,7 @@ class Xee(object):
         """
         route = '{host}/trips/{trip_id}/stats/usedtime'.format(host=self.host, trip_id=trip_id)
         try:
-            response = xee_utils.do_get_request(route, access_token)
+            response = self._get('get_trip_duration', route, access_token)
             used_time = xee_entities.parse_trip_stat(response)
             return used_time, None
         except (xee_exceptions.APIException, xee_exceptions.ParseException) as err:
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# coding: utf8
+"""This script contains the simplification of the trajectories (lists of locations)"""
+
+import array
+import heapq
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import xee.columnar as xee_columnar
+
+# Shorter segments are faster in plain Python than with the NumPy call overhead
+_VECTORIZED_SPAN = 32
+
+
+def _columns(locations, timed):
+    # (locations, timestamps, latitudes, longitudes), the timestamps only if timed
+    if isinstance(locations, xee_columnar.LocationTrack):
+        return (locations, locations.column('timestamps') if timed else None,
+                locations.column('latitudes'), locations.column('longitudes'))
+    locations = list(locations)
+    timestamps = None
+    if timed:
+        timestamps = [xee_columnar.to_timestamp(location.date) for location in locations]
+    return (locations, timestamps, [location.latitude for location in locations],
+            [location.longitude for location in locations])
+
+
+def _project(latitudes, longitudes):
+    # Local equirectangular projection, in metres: accurate at the scale of a trip
+    if numpy is not None:
+        latitudes = numpy.radians(numpy.asarray(latitudes, dtype=numpy.float64))
+        longitudes = numpy.radians(numpy.asarray(longitudes, dtype=numpy.float64))
+        scale = math.cos(float(latitudes.mean()))
+        return (longitudes * (scale * xee_columnar.EARTH_RADIUS),
+                latitudes * xee_columnar.EARTH_RADIUS)
+    scale = math.cos(math.radians(math.fsum(latitudes) / len(latitudes)))
+    return ([math.radians(longitude) * scale * xee_columnar.EARTH_RADIUS
+             for longitude in longitudes],
+            [math.radians(latitude) * xee_columnar.EARTH_RADIUS for latitude in latitudes])
+
+
+def _select(locations, kept):
+    if isinstance(locations, xee_columnar.LocationTrack):
+        columns = {}
+        for field in xee_columnar.LocationTrack.FIELDS:
+            column = locations.column(field)
+            columns[field] = array.array(column.typecode, [column[index] for index in kept])
+        return xee_columnar.LocationTrack(columns)
+    return [locations[index] for index in kept]
+
+
+def _farthest_numpy(xs, ys, timestamps, first, last):
+    x_first, y_first, dx, dy = xs[first], ys[first], xs[last] - xs[first], ys[last] - ys[first]
+    x_points, y_points = xs[first + 1:last], ys[first + 1:last]
+    if timestamps is not None:
+        # Synchronized: the point is compared to where it would be at its own time
+        duration = timestamps[last] - timestamps[first]
+        ratios = (timestamps[first + 1:last] - timestamps[first]) / duration if duration > 0 \
+            else numpy.zeros(len(x_points))
+    else:
+        length = dx * dx + dy * dy
+        ratios = ((x_points - x_first) * dx + (y_points - y_first) * dy) / length if length > 0 \
+            else numpy.zeros(len(x_points))
+        ratios = numpy.clip(ratios, 0.0, 1.0)
+    distances = (x_points - x_first - ratios * dx) ** 2 + (y_points - y_first - ratios * dy) ** 2
+    index = int(distances.argmax())
+    return first + 1 + index, float(distances[index])
+
+
+def _farthest(xs, ys, timestamps, first, last):
+    x_first, y_first, dx, dy = xs[first], ys[first], xs[last] - xs[first], ys[last] - ys[first]
+    length = dx * dx + dy * dy
+    duration = 0.0 if timestamps is None else timestamps[last] - timestamps[first]
+    farthest, farthest_distance = first + 1, -1.0
+    for index in range(first + 1, last):
+        x_point, y_point = xs[index] - x_first, ys[index] - y_first
+        if timestamps is not None:
+            ratio = (timestamps[index] - timestamps[first]) / duration if duration > 0 else 0.0
+        elif length > 0:
+            ratio = min(1.0, max(0.0, (x_point * dx + y_point * dy) / length))
+        else:
+            ratio = 0.0
+        x_point -= ratio * dx
+        y_point -= ratio * dy
+        distance = x_point * x_point + y_point * y_point
+        if distance > farthest_distance:
+            farthest, farthest_distance = index, distance
+    return farthest, farthest_distance
+
+
+def douglas_peucker(locations, tolerance, synchronized=False):
+    """
+    Simplify a trajectory with the Douglas-Peucker algorithm.
+
+    Iterative (no recursion limit), the distances of the long segments are computed
+    at once with NumPy when installed.
+
+    Parameters
+    ----------
+    locations       :   list or LocationTrack
+                        The locations, in time order.
+    tolerance       :   float
+                        The maximum distance (in metres) between a removed location and
+                        the simplified trajectory.
+    synchronized    :   bool, optional
+                        Preserve the time: measure the synchronized euclidean distance,
+                        between a location and the point of the segment at the same
+                        date (TD-TR), so the speeds stay right.
+                        Default is the distance to the segment.
+
+    Returns
+    -------
+    list or LocationTrack
+        The kept locations, of the same type as the given ones (first and last kept).
+
+    """
+    locations, timestamps, latitudes, longitudes = _columns(locations, synchronized)
+    count = len(latitudes)
+    if count < 3:
+        return _select(locations, range(count))
+    xs, ys = _project(latitudes, longitudes)
+    arrays = None
+    if numpy is not None:
+        if timestamps is not None:
+            timestamps = numpy.asarray(timestamps, dtype=numpy.float64)
+        arrays = (xs, ys, timestamps)
+        xs, ys = xs.tolist(), ys.tolist()
+        timestamps = None if timestamps is None else timestamps.tolist()
+    kept = bytearray(count)
+    kept[0] = kept[-1] = 1
+    squared_tolerance = tolerance * tolerance
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        if arrays is not None and last - first > _VECTORIZED_SPAN:
+            index, distance = _farthest_numpy(arrays[0], arrays[1], arrays[2], first, last)
+        else:
+            index, distance = _farthest(xs, ys, timestamps, first, last)
+        if distance > squared_tolerance:
+            kept[index] = 1
+            stack.append((index, last))
+            stack.append((first, index))
+    return _select(locations, [index for index in range(count) if kept[index]])
+
+
+def _area(xs, ys, previous, index, following):
+    return abs((xs[previous] - xs[following]) * (ys[index] - ys[previous])
+               - (xs[previous] - xs[index]) * (ys[following] - ys[previous])) / 2.0
+
+
+def visvalingam_whyatt(locations, min_area=None, max_points=None):
+    """
+    Simplify a trajectory with the Visvalingam-Whyatt algorithm.
+
+    The location of the smallest effective area (the triangle with its neighbours) is
+    removed first, a heap keeps the whole simplification in O(n log n).
+
+    Parameters
+    ----------
+    locations   :   list or LocationTrack
+                    The locations, in time order.
+    min_area    :   float, optional
+                    Remove the locations of an effective area under this one
+                    (in square metres).
+    max_points  :   int, optional
+                    Keep at most this number of locations (at least 2).
+
+    Returns
+    -------
+    list or LocationTrack
+        The kept locations, of the same type as the given ones (first and last kept).
+
+    Raises
+    ------
+    ValueError
+        If neither min_area nor max_points is given.
+
+    """
+    if min_area is None and max_points is None:
+        raise ValueError("min_area or max_points is required")
+    locations, _, latitudes, longitudes = _columns(locations, False)
+    count = len(latitudes)
+    if count < 3:
+        return _select(locations, range(count))
+    xs, ys = _project(latitudes, longitudes)
+    if numpy is not None:
+        xs, ys = xs.tolist(), ys.tolist()
+    max_points = count if max_points is None else max(2, max_points)
+    min_area = -1.0 if min_area is None else min_area
+    previous = list(range(-1, count - 1))
+    following = list(range(1, count + 1))
+    areas = [float('inf')] * count
+    for index in range(1, count - 1):
+        areas[index] = _area(xs, ys, index - 1, index, index + 1)
+    heap = [(areas[index], index) for index in range(1, count - 1)]
+    heapq.heapify(heap)
+    remaining = count
+    while heap:
+        area, index = heapq.heappop(heap)
+        if area != areas[index]:
+            # Outdated by the removal of a neighbour
+            continue
+        if area >= min_area and remaining <= max_points:
+            break
+        areas[index] = None
+        remaining -= 1
+        before, after = previous[index], following[index]
+        following[before], previous[after] = after, before
+        for neighbour in (before, after):
+            if 0 < neighbour < count - 1:
+                # An area never gets under the one removed (Visvalingam's rule)
+                areas[neighbour] = max(area, _area(xs, ys, previous[neighbour], neighbour,
+                                                   following[neighbour]))
+                heapq.heappush(heap, (areas[neighbour], neighbour))
+    return _select(locations, [index for index in range(count) if areas[index] is not None])
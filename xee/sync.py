@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# coding: utf8
+"""This script contains the incremental sync of the signals, locations and trips"""
+
+import datetime
+import json
+import os
+import tempfile
+import threading
+
+import xee.columnar as xee_columnar
+
+# os.replace is atomic on every platform, os.rename only on POSIX (python 2)
+_replace = getattr(os, 'replace', os.rename)
+
+
+class MemoryStateStore(object):
+    """
+        Volatile store of the sync cursors (for tests and short lived processes).
+
+        Any object with the same get / set methods can be given to IncrementalSync.
+    """
+
+    def __init__(self):
+        self._cursors = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Get a cursor.
+
+        Parameters
+        ----------
+        key :   str
+                The key of the cursor (car and resource).
+
+        Returns
+        -------
+        dict
+            The cursor, None if the key was never synced.
+
+        """
+        with self._lock:
+            return self._cursors.get(key)
+
+    def set(self, key, cursor):
+        """
+        Save a cursor.
+
+        Parameters
+        ----------
+        key     :   str
+                    The key of the cursor (car and resource).
+        cursor  :   dict
+                    The cursor, JSON serializable.
+
+        """
+        with self._lock:
+            self._cursors[key] = cursor
+
+
+class FileStateStore(MemoryStateStore):
+    """
+        Store of the sync cursors in a JSON file.
+
+        Every set rewrites the file atomically (temporary file, then rename), a crash never
+        leaves a partially written state.
+    """
+
+    def __init__(self, path):
+        """
+        Initialize a new store.
+
+        Parameters
+        ----------
+        path    :   str
+                    The JSON file, created on the first set.
+
+        """
+        super(FileStateStore, self).__init__()
+        self.path = path
+        if os.path.exists(path):
+            with open(path) as state_file:
+                self._cursors = json.load(state_file)
+
+    def set(self, key, cursor):
+        with self._lock:
+            cursors = dict(self._cursors)
+            cursors[key] = cursor
+            directory = os.path.dirname(os.path.abspath(self.path))
+            descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(descriptor, 'w') as state_file:
+                    json.dump(cursors, state_file)
+                _replace(temporary_path, self.path)
+            except Exception:
+                os.remove(temporary_path)
+                raise
+            self._cursors = cursors
+
+
+class IncrementalSync(object):
+    """
+        Fetch only the signals, locations and trips newer than the previous sync.
+
+        A cursor per car and resource keeps the latest date handed over (the high-water mark)
+        and the records seen in the overlap. Every sync asks from the cursor minus the overlap
+        (to catch the records uploaded late), drops the records already handed over, gives
+        the new ones to the handler then advances the cursor. If the handler raises, the
+        cursor stays and the next sync hands the same records over again.
+    """
+
+    def __init__(self, xee, store, overlap=datetime.timedelta(minutes=5),
+                 lookback=datetime.timedelta(days=30)):
+        """
+        Initialize a new incremental sync.
+
+        Parameters
+        ----------
+        xee         :   Xee
+                        The SDK to fetch the data with.
+        store       :   object
+                        The store of the cursors (MemoryStateStore, FileStateStore, or any
+                        object with get(key) and set(key, cursor) methods).
+        overlap     :   timedelta, optional
+                        The period before the cursor fetched again.
+                        Default is 5 minutes.
+        lookback    :   timedelta, optional
+                        The period fetched by the first sync of a car.
+                        Default is 30 days.
+
+        """
+        self.xee = xee
+        self.store = store
+        self.overlap = overlap
+        self.lookback = lookback
+
+    @staticmethod
+    def _key(car_id, resource):
+        return '{car_id}/{resource}'.format(car_id=car_id, resource=resource)
+
+    def _sync(self, key, fetch, record_key, record_date, handler):
+        cursor = self.store.get(key)
+        end = datetime.datetime.now(xee_columnar.EPOCH.tzinfo)
+        overlap = self.overlap.total_seconds()
+        if cursor is None:
+            high = xee_columnar.to_timestamp(end - self.lookback)
+            seen = set()
+        else:
+            high = cursor['date']
+            seen = set(tuple(seen_key) for seen_key in cursor['seen'])
+        records, err = fetch(xee_columnar.from_timestamp(high - overlap), end)
+        if err is not None:
+            return None, err
+        new_records = []
+        for record in records:
+            seen_key = (xee_columnar.to_timestamp(record_date(record)), record_key(record))
+            if seen_key not in seen:
+                seen.add(seen_key)
+                new_records.append(record)
+                high = max(high, seen_key[0])
+        if handler is not None:
+            handler(new_records)
+        # The next sync starts at high - overlap, only the keys it can see again are kept
+        self.store.set(key, {
+            'date': high,
+            'seen': sorted(list(seen_key) for seen_key in seen if seen_key[0] >= high - overlap)
+        })
+        return new_records, None
+
+    def sync_signals(self, car_id, access_token, handler=None, names=None, **options):
+        """
+        Fetch the signals of a car received since the previous sync.
+
+        Parameters
+        ----------
+        car_id          :   str
+                            the id of the car you are syncing the signals.
+        access_token    :   str
+                            the access token of the user.
+        handler         :   callable, optional
+                            Called with the list of new Signals before the cursor advances.
+                            Default is advancing the cursor right away.
+        names           :   list, optional
+                            The list if signals names you want to sync (a separate cursor).
+                            Default value is all the signals available.
+        options         :   optional
+                            Options of Xee.get_signals (window, max_workers...).
+
+        Returns
+        -------
+        tuple
+            A tuple containing [Signal], Error.
+            The error is None if everything went fine.
+
+        """
+        resource = 'signals'
+        if names:
+            resource += ':' + ','.join(sorted(names))
+
+        def fetch(begin, end):
+            return self.xee.get_signals(car_id, access_token, begin=begin, end=end, names=names,
+                                        **options)
+
+        return self._sync(self._key(car_id, resource), fetch, lambda signal: signal.name,
+                          lambda signal: signal.date, handler)
+
+    def sync_locations(self, car_id, access_token, handler=None, **options):
+        """
+        Fetch the locations of a car received since the previous sync.
+
+        Parameters
+        ----------
+        car_id          :   str
+                            the id of the car you are syncing the locations.
+        access_token    :   str
+                            the access token of the user.
+        handler         :   callable, optional
+                            Called with the list of new Locations before the cursor advances.
+                            Default is advancing the cursor right away.
+        options         :   optional
+                            Options of Xee.get_locations (window, max_workers...).
+
+        Returns
+        -------
+        tuple
+            A tuple containing [Location], Error.
+            The error is None if everything went fine.
+
+        """
+        def fetch(begin, end):
+            return self.xee.get_locations(car_id, access_token, begin=begin, end=end, **options)
+
+        return self._sync(self._key(car_id, 'locations'), fetch, lambda location: '',
+                          lambda location: location.date, handler)
+
+    def sync_trips(self, car_id, access_token, handler=None, **options):
+        """
+        Fetch the trips of a car started since the previous sync.
+
+        Parameters
+        ----------
+        car_id          :   str
+                            the id of the car you are syncing the trips.
+        access_token    :   str
+                            the access token of the user.
+        handler         :   callable, optional
+                            Called with the list of new Trips before the cursor advances.
+                            Default is advancing the cursor right away.
+        options         :   optional
+                            Options of Xee.get_trips (window, max_workers...).
+
+        Returns
+        -------
+        tuple
+            A tuple containing [Trip], Error.
+            The error is None if everything went fine.
+
+        """
+        def fetch(begin, end):
+            return self.xee.get_trips(car_id, access_token, begin=begin, end=end, **options)
+
+        return self._sync(self._key(car_id, 'trips'), fetch, lambda trip: trip.id,
+                          lambda trip: trip.begin_date, handler)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# coding: utf8
+"""This script contains the managed token session (proactive, single-flight refresh)"""
+
+import threading
+import time
+
+import xee.exceptions as xee_exceptions
+
+
+class TokenSession(object):
+    """
+        Keep a Token fresh and inject its access token in the Xee calls.
+
+        The token is refreshed shortly before it expires, only one refresh runs at a time
+        (the other callers wait for its result) and a call failing with an unexpected 401
+        is retried once with a refreshed token.
+
+        session = TokenSession(xee, token)
+        status, err = session.get_status(car_id)
+    """
+
+    def __init__(self, xee, token, refresh_margin=60, on_refresh=None, clock=time.time):
+        """
+        Initialize a new token session.
+
+        Parameters
+        ----------
+        xee             :   Xee
+                            The SDK to run the calls and the refreshes with.
+        token           :   Token
+                            The current token of the user.
+        refresh_margin  :   float, optional
+                            Refresh the token this number of seconds before it expires.
+                            Default is 60.
+        on_refresh      :   callable, optional
+                            Called with the new Token after every refresh (to persist it).
+        clock           :   callable, optional
+                            The clock returning the current time in seconds.
+                            Default is time.time.
+
+        """
+        self.xee = xee
+        self.refresh_margin = refresh_margin
+        self.on_refresh = on_refresh
+        self.clock = clock
+        self._token = token
+        self._condition = threading.Condition()
+        self._refreshing = False
+        self._last_error = None
+
+    @property
+    def token(self):
+        """
+        The current token (without refreshing it).
+        """
+        return self._token
+
+    def get_token(self):
+        """
+        Get a valid token, refreshing it if it expires soon.
+
+        Returns
+        -------
+        tuple
+            A tuple containing Token, Error.
+            The error is None if everything went fine.
+
+        """
+        token = self._token
+        if token.expires_at is not None \
+                and self.clock() < token.expires_at - self.refresh_margin:
+            return token, None
+        return self.refresh(token)
+
+    def refresh(self, stale_token=None):
+        """
+        Refresh the token, a single refresh runs at a time.
+
+        Parameters
+        ----------
+        stale_token :   Token, optional
+                        The token the caller found invalid. If another caller already
+                        replaced it, the new token is returned without refreshing again.
+                        Default is the current token.
+
+        Returns
+        -------
+        tuple
+            A tuple containing Token, Error.
+            The error is None if everything went fine.
+
+        """
+        with self._condition:
+            if stale_token is not None and self._token is not stale_token:
+                return self._token, None
+            if self._refreshing:
+                # Single flight: wait for the running refresh and share its result
+                while self._refreshing:
+                    self._condition.wait()
+                if self._last_error is not None:
+                    return None, self._last_error
+                return self._token, None
+            self._refreshing = True
+            refresh_token = self._token.refresh_token
+        token, err = None, None
+        try:
+            token, err = self.xee.get_token_from_refresh_token(refresh_token)
+        except Exception as error:  # pylint: disable=broad-except
+            err = error
+        finally:
+            with self._condition:
+                if err is None:
+                    self._token = token
+                self._last_error = err
+                self._refreshing = False
+                self._condition.notify_all()
+        if err is not None:
+            return None, err
+        if self.on_refresh is not None:
+            self.on_refresh(token)
+        return token, None
+
+    def call(self, method, *args, **options):
+        """
+        Call a Xee method with the access token of the session.
+
+        The access token is given after the positional arguments, as every
+        endpoint method expects it (get_status(car_id, access_token)...).
+
+        Parameters
+        ----------
+        method  :   str
+                    The name of the method to call (for example 'get_status').
+        args    :   optional
+                    The positional arguments of the method, without the access token.
+        options :   optional
+                    The keyword arguments of the method.
+
+        Returns
+        -------
+        tuple
+            The (result, error) tuple of the method.
+
+        """
+        token, err = self.get_token()
+        if err is not None:
+            return None, err
+        result, err = getattr(self.xee, method)(*(args + (token.access_token,)), **options)
+        if isinstance(err, xee_exceptions.AuthenticationException):
+            # Revoked or expired early, refresh (once for everybody) and retry once
+            token, refresh_err = self.refresh(token)
+            if refresh_err is not None:
+                return None, err
+            result, err = getattr(self.xee, method)(*(args + (token.access_token,)), **options)
+        return result, err
+
+    def __getattr__(self, name):
+        if name.startswith('get_') or name.startswith('iter_'):
+            return lambda *args, **options: self.call(name, *args, **options)
+        raise AttributeError(name)
@@ -0,0 +1,534 @@
+#!/usr/bin/env python
+# coding: utf8
+"""This script contains the HTTP transport shared by every call of the SDK"""
+
+import collections
+import threading
+import timeit
+
+import concurrent.futures
+import requests
+import requests.adapters
+
+import xee.decoding as xee_decoding
+import xee.exceptions as xee_exceptions
+import xee.instrumentation as xee_instrumentation
+import xee.ratelimit as xee_ratelimit
+import xee.utils as xee_utils
+
+
+class Transport(object):
+    """
+        Connection-pooled, keep-alive HTTP transport for the Xee APIs.
+
+        A single requests.Session is shared by every thread, its connection pool
+        (urllib3) is thread safe and lets concurrent calls reuse open connections
+        instead of doing a new TCP + TLS handshake for every request.
+    """
+
+    def __init__(self, host, pool_connections=1, pool_maxsize=10, connect_timeout=None,
+                 read_timeout=None, keep_alive=True, warm_up=False, conditional=True,
+                 max_validators=4096, rate_limiter=None, coalesce=True, json_decoder='auto',
+                 max_validated_size=65536, max_validator_bytes=4194304, hedge_workers=10):
+        """
+        Initialize a new transport.
+
+        Parameters
+        ----------
+        host                :   str
+                                The host (with the API version) the requests are sent to.
+        pool_connections    :   int, optional
+                                The number of hosts to keep a connection pool for.
+                                Default is 1.
+        pool_maxsize        :   int, optional
+                                The maximum number of connections kept open per host.
+                                Default is 10.
+        connect_timeout     :   float, optional
+                                The timeout (in seconds) to establish a connection.
+                                Default is no timeout.
+        read_timeout        :   float, optional
+                                The timeout (in seconds) to wait for the response.
+                                Default is no timeout.
+        keep_alive          :   bool, optional
+                                Keep the connections open between requests.
+                                Default is True.
+        warm_up             :   bool or int, optional
+                                Open connections to the host at construction.
+                                True opens one connection, an int opens that many.
+                                Default is False.
+        conditional         :   bool, optional
+                                Remember the ETag / Last-Modified validators per route and
+                                token, send them back and reuse the previous response on a
+                                304 Not Modified.
+                                Default is True.
+        max_validators      :   int, optional
+                                The maximum number of routes the validators are kept for.
+                                Default is 4096.
+        max_validated_size  :   int, optional
+                                The largest body (in bytes) a response is remembered for,
+                                the big signals / locations bodies are not kept decoded.
+                                Default is 64 KiB (status, car, user... fit).
+        max_validator_bytes :   int, optional
+                                The maximum total size (in bytes, of the bodies) of the
+                                remembered responses.
+                                Default is 4 MiB.
+        rate_limiter        :   RateLimiter, optional
+                                Throttle the requests (per client and per access token)
+                                and follow the 429 / Retry-After of the server.
+                                Default is no throttling.
+        coalesce            :   bool, optional
+                                Send a single request for the concurrent identical GET
+                                (same route and token), every caller gets its response.
+                                Default is True.
+        json_decoder        :   str or callable, optional
+                                The decoder of the JSON bodies ('auto', 'orjson', 'simdjson',
+                                'ujson', 'json' or a function decoding bytes).
+                                Default is 'auto', the fastest installed one.
+        hedge_workers       :   int, optional
+                                The number of threads sending the duplicate requests of the
+                                hedged calls (the first attempts do not use them).
+                                Default is 10.
+
+        """
+        self.host = host
+        self.pool_maxsize = pool_maxsize
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_connections,
+                                                pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+        self.conditional = conditional
+        self.rate_limiter = rate_limiter
+        self.coalesce = coalesce
+        self.decode = xee_decoding.get_decoder(json_decoder)
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+        self.max_validators = max_validators
+        self.max_validated_size = max_validated_size
+        self.max_validator_bytes = max_validator_bytes
+        self._validators = collections.OrderedDict()
+        self._validator_bytes = 0
+        self._validators_lock = threading.Lock()
+        self._local = threading.local()
+        self.hedge_workers = hedge_workers
+        self._hedge_executor = None
+        self._hedge_lock = threading.Lock()
+        if warm_up:
+            self.warm_up(1 if warm_up is True else int(warm_up))
+
+    def warm_up(self, connections=1):
+        """
+        Open connections to the host so the first calls skip the handshakes.
+
+        The HEAD requests are kept in flight together (their responses are closed once
+        every request is sent), so each one takes a connection of its own instead of
+        reusing the previous one.
+
+        Parameters
+        ----------
+        connections :   int, optional
+                        The number of connections to open (bounded by the pool size).
+                        Default is 1.
+
+        Returns
+        -------
+        int
+            The number of connections open in the pool (new or already open).
+
+        """
+        connections = max(1, min(int(connections), self.pool_maxsize))
+        responses = []
+        try:
+            for _ in range(connections):
+                try:
+                    responses.append(self.session.head(self.host, timeout=self.timeout,
+                                                       stream=True))
+                except requests.RequestException:
+                    break
+        finally:
+            for response in responses:
+                # Reading the (empty) body gives the connection back to the pool, open
+                response.content  # pylint: disable=pointless-statement
+        return len(responses)
+
+    def get(self, route, bearer, retry=None, hedge=None, endpoint=None, raw=False):
+        """
+        Do a GET request to a route with a Authorization header.
+
+        Parameters
+        ----------
+        route       :   str
+                        The route to call (fully).
+        bearer      :   str
+                        The bearer to use for authentication.
+        retry       :   RetryPolicy, optional
+                        Retry the connection errors, timeouts and server errors.
+                        Default is no retry.
+        hedge       :   HedgePolicy, optional
+                        Send a duplicate request if the response is slow.
+                        Default is no hedging.
+        endpoint    :   str, optional
+                        The endpoint (Xee method name) the latencies are recorded for.
+        raw         :   bool, optional
+                        Return the raw bytes of the body, without decoding it (nor
+                        sending the conditional validators).
+                        Default is False.
+
+        Returns
+        -------
+        dict or bytes
+            The response (mostly JSON response) of the API, or its raw body.
+
+        Raises
+        ------
+        APIException
+            If the API responded with a known error (400, 401, 403, 404, 416, 500)
+
+        Exception
+            If the API responded with an "unknown" error
+
+        """
+        if not self.coalesce:
+            return self._get(route, bearer, retry, hedge, endpoint, raw)
+        key = (route, bearer, raw)
+        with self._in_flight_lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+        if not leader:
+            # Single flight: wait for the identical request already sent
+            call.done.wait()
+            self._local.changed = call.changed
+            self._local.timing = call.timing
+            self._local.size = call.size
+            if call.error is not None:
+                raise call.error
+            return call.response
+        try:
+            call.response = self._get(route, bearer, retry, hedge, endpoint, raw)
+            call.changed = self.last_changed()
+            call.size = self.last_size()
+            return call.response
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            call.timing = self.last_timing()
+            with self._in_flight_lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    def _get(self, route, bearer, retry, hedge, endpoint, raw=False):
+        self._local.timing = None
+        headers = {'Authorization': 'Bearer ' + bearer}
+        key = (route, bearer)
+        validators = None
+        conditional = self.conditional and not raw
+        if conditional:
+            with self._validators_lock:
+                validators = self._validators.get(key)
+            if validators is not None:
+                etag, last_modified, _, _ = validators
+                if etag is not None:
+                    headers['If-None-Match'] = etag
+                if last_modified is not None:
+                    headers['If-Modified-Since'] = last_modified
+        started_at = timeit.default_timer()
+        if retry is None and hedge is None:
+            request = self._send('GET', route, bearer, headers=headers)
+        else:
+            request = self._send_retried(route, bearer, retry, hedge, endpoint, headers)
+        ttfb = request.elapsed.total_seconds()
+        content = request.content
+        downloaded_at = timeit.default_timer()
+        self._local.timing = xee_instrumentation.RequestTiming(
+            request.status_code, ttfb, downloaded_at - started_at, len(content), 0.0)
+        self._check_throttled(request)
+        if request.status_code == 304 and validators is not None:
+            # Not modified, the previous response is reused without decoding anything
+            self._local.changed = False
+            self._local.size = validators[3]
+            return validators[2]
+        try:
+            response = xee_utils.check_body(request.status_code, content, self.decode, raw)
+        finally:
+            self._local.timing = self._local.timing._replace(
+                decode_time=timeit.default_timer() - downloaded_at)
+        self._local.changed = True
+        self._local.size = len(content)
+        if conditional:
+            self._remember(key, request, response, len(content))
+        return response
+
+    def _remember(self, key, request, response, size):
+        etag = request.headers.get('ETag')
+        last_modified = request.headers.get('Last-Modified')
+        with self._validators_lock:
+            previous = self._validators.pop(key, None)
+            if previous is not None:
+                self._validator_bytes -= previous[3]
+            if (etag is None and last_modified is None) or size > self.max_validated_size:
+                return
+            self._validators[key] = (etag, last_modified, response, size)
+            self._validator_bytes += size
+            while len(self._validators) > self.max_validators \
+                    or self._validator_bytes > self.max_validator_bytes:
+                _, evicted = self._validators.popitem(last=False)
+                self._validator_bytes -= evicted[3]
+
+    def last_changed(self):
+        """
+        Tell if the last GET of the current thread got a new response.
+
+        Returns
+        -------
+        bool
+            False if the last GET was answered by a 304 Not Modified
+            (or was not sent at all since reset_changed), True otherwise.
+
+        """
+        return getattr(self._local, 'changed', True)
+
+    def last_size(self):
+        """
+        Get the size of the raw body of the last GET of the current thread.
+
+        Returns
+        -------
+        int
+            The size (in bytes) of the body the response was decoded from, the
+            remembered one if the GET was answered by a 304 Not Modified.
+
+        """
+        return getattr(self._local, 'size', 0)
+
+    def last_timing(self):
+        """
+        Get the timings of the last GET of the current thread.
+
+        Returns
+        -------
+        RequestTiming
+            The status code, time to first byte, network time (with the body download),
+            response size and JSON decoding time (seconds and bytes),
+            None if no GET was sent since reset_timing.
+
+        """
+        return getattr(self._local, 'timing', None)
+
+    def reset_timing(self):
+        """
+        Forget the timings of the last GET of the current thread (see last_timing).
+        """
+        self._local.timing = None
+
+    def reset_changed(self):
+        """
+        Mark the current thread as having no new response (see last_changed).
+        """
+        self._local.changed = False
+
+    def stream(self, route, bearer, chunk_size=65536):
+        """
+        Do a GET request to a route returning a JSON array and stream its items.
+
+        The status is checked before returning, the body is downloaded and decoded
+        while the items are consumed.
+
+        Parameters
+        ----------
+        route       :   str
+                        The route to call (fully).
+        bearer      :   str
+                        The bearer to use for authentication.
+        chunk_size  :   int, optional
+                        The size (in bytes) of the chunks read from the network.
+                        Default is 65536.
+
+        Returns
+        -------
+        generator
+            Yields the decoded items of the array.
+
+        Raises
+        ------
+        APIException
+            If the API responded with a known error (400, 401, 403, 404, 416, 500)
+
+        Exception
+            If the API responded with an "unknown" error
+
+        """
+        request = self._send('GET', route, bearer, stream=True,
+                             headers={'Authorization': 'Bearer ' + bearer})
+        self._check_throttled(request)
+        if request.status_code != 200:
+            try:
+                xee_utils.check_body(request.status_code, request.content, self.decode)
+            finally:
+                request.close()
+        return self._iter_items(request, chunk_size)
+
+    @staticmethod
+    def _iter_items(request, chunk_size):
+        try:
+            for item in xee_utils.iter_json_array(request.iter_content(chunk_size)):
+                yield item
+        finally:
+            request.close()
+
+    def post(self, route, data, auth):
+        """
+        Do a POST request to a route with a form payload.
+
+        Parameters
+        ----------
+        route   :     str
+                      The route to call (fully).
+        data    :     dict
+                      The form payload of the request.
+        auth    :     tuple
+                      The (user, password) basic authentication.
+
+        Returns
+        -------
+        requests.Response
+            The raw response of the API.
+
+        """
+        return self._send('POST', route, None, data=data, auth=auth)
+
+    def _send(self, method, route, bearer, **kwargs):
+        if self.rate_limiter is None:
+            return self.session.request(method, route, timeout=self.timeout, **kwargs)
+        retries = 0
+        while True:
+            self.rate_limiter.acquire(bearer)
+            request = self.session.request(method, route, timeout=self.timeout, **kwargs)
+            if request.status_code != 429:
+                self.rate_limiter.success()
+                return request
+            self.rate_limiter.backoff(
+                xee_ratelimit.parse_retry_after(request.headers.get('Retry-After')))
+            if retries >= self.rate_limiter.max_retries:
+                return request
+            request.close()
+            retries += 1
+
+    def _send_retried(self, route, bearer, retry, hedge, endpoint, headers):
+        if retry is not None:
+            retry.started()
+        attempt = 0
+        while True:
+            try:
+                if hedge is None:
+                    request = self._send('GET', route, bearer, headers=headers)
+                else:
+                    request = self._send_hedged(route, bearer, hedge, endpoint, headers)
+            except requests.RequestException:
+                # Connection errors and timeouts
+                if retry is None or not retry.should_retry(attempt):
+                    raise
+                delay = retry.delay(attempt)
+            else:
+                if retry is None or request.status_code not in retry.statuses \
+                        or not retry.should_retry(attempt):
+                    return request
+                retry_after = xee_ratelimit.parse_retry_after(request.headers.get('Retry-After'))
+                delay = max(retry.delay(attempt), min(retry_after or 0, retry.max_backoff))
+                request.close()
+            retry.sleep(delay)
+            attempt += 1
+
+    def _send_hedged(self, route, bearer, hedge, endpoint, headers):
+        delay = hedge.delay(endpoint)
+
+        def send():
+            started_at = hedge.clock()
+            request = self._send('GET', route, bearer, headers=headers)
+            hedge.record(endpoint, hedge.clock() - started_at)
+            return request
+
+        if delay is None:
+            return send()
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = concurrent.futures.ThreadPoolExecutor(self.hedge_workers)
+            executor = self._hedge_executor
+        # The first attempt gets a thread of its own, as the calling thread waits for the
+        # fastest response: only the duplicates share (and wait for) the executor
+        first = concurrent.futures.Future()
+        first.set_running_or_notify_cancel()
+        thread = threading.Thread(target=_run, args=(first, send))
+        thread.daemon = True
+        thread.start()
+        futures = [first]
+        pending = set(futures)
+        while True:
+            timeout = delay if len(futures) <= hedge.max_hedges else None
+            done, pending = concurrent.futures.wait(
+                pending, timeout, concurrent.futures.FIRST_COMPLETED)
+            winner = next((future for future in done if future.exception() is None), None)
+            if winner is not None:
+                break
+            if not pending and (done or len(futures) > hedge.max_hedges):
+                # Every attempt failed, the last error is raised
+                return futures[-1].result()
+            if len(futures) <= hedge.max_hedges:
+                future = executor.submit(send)
+                futures.append(future)
+                pending.add(future)
+        for future in futures:
+            # The duplicates still waiting for a thread are not sent at all
+            if future is not winner and not future.cancel():
+                future.add_done_callback(_close_loser)
+        return winner.result()
+
+    @staticmethod
+    def _check_throttled(request):
+        if request.status_code == 429:
+            request.close()
+            raise xee_exceptions.APIException(
+                'TOO_MANY_REQUESTS', 'Rate limit exceeded',
+                'Lower the rate of the client or retry later')
+
+    def close(self):
+        """
+        Close every pooled connection.
+        """
+        with self._hedge_lock:
+            if self._hedge_executor is not None:
+                self._hedge_executor.shutdown(wait=False)
+                self._hedge_executor = None
+        self.session.close()
+
+
+class _Call(object):
+    """
+        A GET request in flight, shared by the identical calls.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.changed = True
+        self.size = 0
+        self.timing = None
+        self.error = None
+
+
+def _run(future, function):
+    try:
+        future.set_result(function())
+    except BaseException as error:  # pylint: disable=broad-except
+        future.set_exception(error)
+
+
+def _close_loser(future):
+    # The slowest responses of a hedged request are dropped
+    if future.exception() is None:
+        future.result().close()
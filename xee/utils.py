@@ -2,12 +2,25 @@
 # coding: utf8
 """This script contains the helpers for the 3rd version of the API"""
 
+try:
+    import urllib.parse as url_parser
+except ImportError:
+    import urllib as url_parser
+
+import codecs
+import json
+import numbers
+
+import isodate
 import requests
 
+import xee.decoding as xee_decoding
 import xee.exceptions as xee_exceptions
 
+ERROR_STATUSES = (400, 401, 403, 404, 416, 500)
+
 
-def do_get_request(route, bearer):
+def do_get_request(route, bearer, session=None, timeout=None, decoder='auto'):
     """
     Do a request to a route with a Authorization header.
 
@@ -17,6 +30,15 @@ def do_get_request(route, bearer):
                   The route to call (fully).
     bearer  :     str
                   The bearer to use for authentication.
+    session :     requests.Session, optional
+                  The session to send the request with (pooled connections).
+                  Default is a one-shot request.
+    timeout :     float or tuple, optional
+                  The (connect, read) timeout of the request.
+                  Default is no timeout.
+    decoder :     str or callable, optional
+                  The JSON decoder of the body, see xee.decoding.get_decoder.
+                  Default is the fastest installed one.
 
     Returns
     -------
@@ -32,14 +54,318 @@ def do_get_request(route, bearer):
         If the API responded with an "unknown" error
 
     """
-    request = requests.get(route, headers={'Authorization': 'Bearer ' + bearer})
-    response = request.json()
-    if request.status_code == 200:
+    sender = requests if session is None else session
+    request = sender.get(route, headers={'Authorization': 'Bearer ' + bearer}, timeout=timeout)
+    return check_body(request.status_code, request.content, xee_decoding.get_decoder(decoder))
+
+
+def check_body(status_code, body, decode, raw=False):
+    """
+    Decode the raw body of a response and raise the matching error.
+
+    The body of an "unknown" error is never decoded, the one of a known error only to
+    build the APIException.
+
+    Parameters
+    ----------
+    status_code :   int
+                    The HTTP status code of the response.
+    body        :   bytes
+                    The raw body of the response.
+    decode      :   callable
+                    The JSON decoder, see xee.decoding.get_decoder.
+    raw         :   bool, optional
+                    Return the body of a 200 as is, without decoding it.
+                    Default is False.
+
+    Returns
+    -------
+    dict or list or bytes
+        The decoded response (or the raw body), if the status code is 200.
+
+    Raises
+    ------
+    APIException
+        If the API responded with a known error (400, 401, 403, 404, 416, 500)
+
+    Exception
+        If the API responded with an "unknown" error
+
+    """
+    if status_code == 200:
+        return body if raw else decode(body)
+    if status_code in ERROR_STATUSES:
+        return check_response(status_code, decode(body))
+    raise Exception(body.decode('utf-8', 'replace'))
+
+
+def check_response(status_code, response):
+    """
+    Check the status of a decoded response and raise the matching error.
+
+    Parameters
+    ----------
+    status_code :   int
+                    The HTTP status code of the response.
+    response    :   dict or list
+                    The decoded body of the response.
+
+    Returns
+    -------
+    dict
+        The response, if the status code is 200.
+
+    Raises
+    ------
+    APIException
+        If the API responded with a known error (400, 401, 403, 404, 416, 500)
+
+    AuthenticationException
+        If the API responded with a 401 (a subclass of APIException)
+
+    Exception
+        If the API responded with an "unknown" error
+
+    """
+    if status_code == 200:
         return response
     else:
         first_error = response[0]
-        if request.status_code in [400, 401, 403, 404, 416, 500]:
+        if status_code == 401:
+            raise xee_exceptions.AuthenticationException(str(first_error['type']),
+                                                         str(first_error['message']),
+                                                         str(first_error['tip']))
+        if status_code in ERROR_STATUSES:
             raise xee_exceptions.APIException(str(first_error['type']), str(first_error['message']),
                                               str(first_error['tip']))
         else:
             raise Exception(response)
+
+
+def add_params(route, params):
+    """
+    Append query parameters to a route.
+
+    Parameters
+    ----------
+    route   :   str
+                The route to call (fully).
+    params  :   dict
+                The query parameters, can be empty.
+
+    Returns
+    -------
+    str
+        The route with its query string.
+
+    """
+    if bool(params):
+        route = '?'.join([route, url_parser.urlencode(params)])
+    return route
+
+
+def period_params(begin=None, end=None):
+    """
+    Build the query parameters of a period.
+
+    Parameters
+    ----------
+    begin   :   datetime, optional
+                The first datetime of the period.
+    end     :   datetime, optional
+                The last datetime of the period.
+
+    Returns
+    -------
+    dict
+        The query parameters.
+
+    """
+    params = {}
+    if begin is not None:
+        params['begin'] = isodate.datetime_isoformat(begin)
+    if end is not None:
+        params['end'] = isodate.datetime_isoformat(end)
+    return params
+
+
+def names_params(names=None):
+    """
+    Build the query parameters of a signals names filter.
+
+    Parameters
+    ----------
+    names   :   list, optional
+                The signals names to filter on.
+
+    Returns
+    -------
+    dict
+        The query parameters.
+
+    """
+    params = {}
+    if names is not None:
+        params['name'] = ','.join(names)
+    return params
+
+
+def signals_params(options):
+    """
+    Build the query parameters of a signals request.
+
+    Parameters
+    ----------
+    options :   dict
+                The options of the request (begin, end, limit, names).
+
+    Returns
+    -------
+    dict
+        The query parameters.
+
+    Raises
+    ------
+    ValueError
+        If the limit is not a positive integer.
+
+    """
+    params = {}
+    o_limit = options.get('limit', None)
+    if o_limit is not None:
+        if o_limit > 0:
+            params['limit'] = o_limit
+        else:
+            raise ValueError(
+                "limit must be a non 0 positive integer, " + str(o_limit) + " given")
+    params.update(period_params(options.get('begin', None), options.get('end', None)))
+    params.update(names_params(options.get('names', None)))
+    return params
+
+
+def locations_params(options):
+    """
+    Build the query parameters of a locations request.
+
+    Parameters
+    ----------
+    options :   dict
+                The options of the request (begin, end, limit).
+
+    Returns
+    -------
+    dict
+        The query parameters.
+
+    """
+    params = {}
+    if options.get('limit', None) is not None:
+        params['limit'] = options['limit']
+    params.update(period_params(options.get('begin', None), options.get('end', None)))
+    return params
+
+
+def stat_params(options, cast):
+    """
+    Build the query parameters of a stat request.
+
+    Parameters
+    ----------
+    options :   dict
+                The options of the request (begin, end, initial_value).
+    cast    :   type
+                The type of the initial value (int or float).
+
+    Returns
+    -------
+    dict
+        The query parameters.
+
+    """
+    params = period_params(options.get('begin', None), options.get('end', None))
+    if options.get('initial_value', None) is not None:
+        params['initialValue'] = cast(options.get('initial_value'))
+    return params
+
+
+def iter_json_array(chunks):
+    """
+    Decode a JSON array incrementally, yielding its items one at a time.
+
+    Parameters
+    ----------
+    chunks  :   iterable
+                The body of the response, as bytes (utf-8) or str chunks.
+
+    Returns
+    -------
+    generator
+        Yields the decoded items of the array, the memory stays flat
+        whatever the size of the body.
+
+    Raises
+    ------
+    ValueError
+        If the body is not a JSON array.
+
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    started = False
+    ended = False
+    chunks = iter(chunks)
+    while not ended:
+        chunk = next(chunks, None)
+        if chunk is None:
+            buffer += text_decoder.decode(b'', final=True)
+        elif isinstance(chunk, bytes):
+            buffer += text_decoder.decode(chunk)
+        else:
+            buffer += chunk
+        index = 0
+        while True:
+            index = _skip_whitespace(buffer, index)
+            if index == len(buffer):
+                break
+            if not started:
+                if buffer[index] != '[':
+                    raise ValueError("Expected a JSON array, got " + repr(buffer[index:index + 20]))
+                started = True
+                index += 1
+                continue
+            if buffer[index] == ',':
+                index += 1
+                continue
+            if buffer[index] == ']':
+                ended = True
+                break
+            try:
+                item, end = decoder.raw_decode(buffer, index)
+            except ValueError:
+                if chunk is None:
+                    raise
+                # The item is not complete yet, wait for the next chunk
+                break
+            if chunk is not None and (end == len(buffer) or _cut_number(item, buffer[end])):
+                # A number could be cut by the chunk (after its '.' or 'e' too),
+                # wait for the delimiter
+                break
+            index = end
+            yield item
+        buffer = buffer[index:]
+        if chunk is None and not ended:
+            if started:
+                raise ValueError("Unterminated JSON array")
+            return
+
+
+def _cut_number(item, following):
+    return isinstance(item, numbers.Number) and not isinstance(item, bool) \
+        and following in '0123456789+-.eE'
+
+
+def _skip_whitespace(text, index):
+    while index < len(text) and text[index] in ' \t\n\r':
+        index += 1
+    return index
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# coding: utf8
+"""This script contains the status watcher of a fleet"""
+
+import collections
+import heapq
+import threading
+import time
+
+import concurrent.futures
+
+try:
+    monotonic = time.monotonic
+except AttributeError:
+    # Python 2, no monotonic clock in the standard library
+    monotonic = time.time
+
+# A change of one of these signals (to a non 0 value) means the car is moving
+MOTION_SIGNALS = ('VehiSpeed', 'EngineSpeed', 'Odometer')
+
+StatusChange = collections.namedtuple(
+    'StatusChange',
+    [
+        'car_id',
+        'signals',
+        'location',
+        'accelerometer',
+        'status',
+        'error'
+    ])
+
+
+def diff_status(previous, current):
+    """
+    Compare two statuses of a car.
+
+    Parameters
+    ----------
+    previous    :   Status
+                    The previous status, None for the first one.
+    current     :   Status
+                    The new status.
+
+    Returns
+    -------
+    tuple
+        A tuple containing [Signal], Location, Accelerometer: the signals whose value
+        changed (or appeared), the location if it changed (None otherwise) and the
+        accelerometer if it changed (None otherwise).
+
+    """
+    if previous is None:
+        return list(current.signals or []), current.location, current.accelerometer
+    previous_values = dict((signal.name, signal.value) for signal in previous.signals or [])
+    signals = [signal for signal in current.signals or []
+               if signal.name not in previous_values
+               or previous_values[signal.name] != signal.value]
+    location = current.location
+    if location is not None and previous.location is not None \
+            and location[:5] == previous.location[:5]:
+        location = None
+    accelerometer = current.accelerometer
+    if accelerometer is not None and previous.accelerometer is not None \
+            and accelerometer[:3] == previous.accelerometer[:3]:
+        accelerometer = None
+    return signals, location, accelerometer
+
+
+def _is_moving(signals, location, previous):
+    if location is not None and previous is not None and previous.location is not None \
+            and location[:2] != previous.location[:2]:
+        return True
+    return any(signal.name in MOTION_SIGNALS and signal.value for signal in signals)
+
+
+class StatusWatcher(object):
+    """
+        Poll the status of many cars and yield only what changed.
+
+        Every car has its own polling interval: reset to min_interval when the car moves,
+        to interval when something else changes, multiplied by backoff (up to max_interval)
+        when nothing changes or the call fails.
+
+        for change in StatusWatcher(xee, car_ids, access_token):
+            print(change.car_id, change.signals)
+    """
+
+    def __init__(self, xee, car_ids, access_token, interval=10, min_interval=None,
+                 max_interval=None, backoff=2.0, max_workers=10, clock=monotonic):
+        """
+        Initialize a new watcher.
+
+        Parameters
+        ----------
+        xee             :   Xee
+                            The SDK to poll the statuses with.
+        car_ids         :   list
+                            The ids of the cars to watch.
+        access_token    :   str
+                            the access token of the user.
+        interval        :   float, optional
+                            The usual number of seconds between two polls of a car.
+                            Default is 10.
+        min_interval    :   float, optional
+                            The number of seconds between two polls of a moving car.
+                            Default is interval.
+        max_interval    :   float, optional
+                            The maximum number of seconds between two polls of a parked car.
+                            Default is 10 times interval.
+        backoff         :   float, optional
+                            The factor applied to the interval of a car that did not change.
+                            Default is 2.
+        max_workers     :   int, optional
+                            The maximum number of statuses fetched at the same time.
+                            Default is 10.
+        clock           :   callable, optional
+                            The clock the polls are scheduled with, in seconds.
+                            Default is time.monotonic (time.time on Python 2).
+
+        """
+        self.xee = xee
+        self.car_ids = list(car_ids)
+        self.access_token = access_token
+        self.interval = interval
+        self.min_interval = min_interval if min_interval is not None else interval
+        self.max_interval = max_interval if max_interval is not None else interval * 10
+        self.backoff = backoff
+        self.max_workers = max_workers
+        self.clock = clock
+        self.statuses = {}
+        self.intervals = dict((car_id, interval) for car_id in self.car_ids)
+        self._stopped = threading.Event()
+
+    def stop(self):
+        """
+        Stop watching, the iteration ends after the polls in flight.
+        """
+        self._stopped.set()
+
+    def _poll(self, car_id):
+        try:
+            # A cache hit sends nothing, the flag must not be the one of another car
+            self.xee.transport.reset_changed()
+            status, err = self.xee.get_status(car_id, self.access_token)
+            # A 304 Not Modified means nothing changed, no need to compare
+            return status, err, self.xee.transport.last_changed()
+        except Exception as err:  # pylint: disable=broad-except
+            return None, err, True
+
+    def _update(self, car_id, status, err, changed):
+        """
+        Compute the change of a car and its next interval.
+        """
+        interval = self.intervals[car_id]
+        if err is not None:
+            self.intervals[car_id] = min(self.max_interval, interval * self.backoff)
+            return StatusChange(car_id, [], None, None, None, err)
+        previous = self.statuses.get(car_id)
+        if not changed and previous is not None:
+            self.intervals[car_id] = min(self.max_interval, interval * self.backoff)
+            return None
+        signals, location, accelerometer = diff_status(previous, status)
+        self.statuses[car_id] = status
+        if _is_moving(signals, location, previous):
+            self.intervals[car_id] = self.min_interval
+        elif signals or location is not None or accelerometer is not None:
+            self.intervals[car_id] = self.interval
+        else:
+            self.intervals[car_id] = min(self.max_interval, interval * self.backoff)
+            return None
+        return StatusChange(car_id, signals, location, accelerometer, status, None)
+
+    def __iter__(self):
+        now = self.clock()
+        schedule = [(now, index, car_id) for index, car_id in enumerate(self.car_ids)]
+        heapq.heapify(schedule)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while schedule and not self._stopped.is_set():
+                now = self.clock()
+                if schedule[0][0] > now:
+                    self._stopped.wait(schedule[0][0] - now)
+                    continue
+                due = []
+                while schedule and schedule[0][0] <= now:
+                    due.append(heapq.heappop(schedule))
+                futures = dict((executor.submit(self._poll, car_id), (index, car_id))
+                               for _, index, car_id in due)
+                for future in concurrent.futures.as_completed(futures):
+                    index, car_id = futures[future]
+                    change = self._update(car_id, *future.result())
+                    heapq.heappush(schedule,
+                                   (self.clock() + self.intervals[car_id], index, car_id))
+                    if change is not None:
+                        yield change
+
+    def run(self, callback):
+        """
+        Watch until stop is called, calling a function for every change.
+
+        Parameters
+        ----------
+        callback    :   callable
+                        Called with every StatusChange.
+
+        """
+        for change in self:
+            callback(change)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# coding: utf8
+"""This script contains the time-window splitting of the period requests"""
+
+import concurrent.futures
+import datetime
+
+# Never shrink an adaptive window below this duration
+MIN_WINDOW = datetime.timedelta(minutes=1)
+
+
+def split_period(begin, end, window):
+    """
+    Split a period in consecutive sub-windows.
+
+    Parameters
+    ----------
+    begin   :   datetime
+                The first datetime of the period.
+    end     :   datetime
+                The last datetime of the period.
+    window  :   timedelta
+                The duration of every sub-window (the last one can be shorter).
+
+    Returns
+    -------
+    list
+        A list of (begin, end) tuples covering [begin, end).
+
+    """
+    if window <= datetime.timedelta(0):
+        raise ValueError("window must be a positive duration, " + str(window) + " given")
+    windows = []
+    cursor = begin
+    while cursor < end:
+        window_end = min(cursor + window, end)
+        windows.append((cursor, window_end))
+        cursor = window_end
+    return windows
+
+
+def _merge(chunks, key, sort_key):
+    # Windows share their edges, the records on an edge come back twice
+    seen = set()
+    merged = []
+    for chunk in chunks:
+        for item in chunk:
+            item_key = key(item)
+            if item_key not in seen:
+                seen.add(item_key)
+                merged.append(item)
+    merged.sort(key=sort_key)
+    return merged
+
+
+def fetch_windowed(fetch, begin, end, window, key, sort_key, names=None, split_names=False,
+                   max_workers=4, target_size=None):
+    """
+    Fetch a period by sub-windows, concurrently, and merge the results in time order.
+
+    Parameters
+    ----------
+    fetch       :   callable
+                    fetch(begin, end, names) returning a (list, error) tuple.
+    begin       :   datetime
+                    The first datetime of the period.
+    end         :   datetime
+                    The last datetime of the period.
+    window      :   timedelta
+                    The duration of the sub-windows (the first one when adaptive).
+    key         :   callable
+                    Returns the identity of a record, used to drop the duplicates.
+    sort_key    :   callable
+                    Returns the date of a record, used to merge in time order.
+    names       :   list, optional
+                    The signals names filter.
+    split_names :   bool, optional
+                    Send a request per name (and per window) instead of a single filter.
+                    Default is False.
+    max_workers :   int, optional
+                    The maximum number of requests running at the same time.
+                    Default is 4.
+    target_size :   int, optional
+                    Adapt the window duration to get about this number of records
+                    per request, based on the density of the windows already fetched.
+                    Default is a fixed window.
+
+    Returns
+    -------
+    tuple
+        A tuple containing [records], Error.
+        The error is the first error met, None if everything went fine.
+
+    """
+    if split_names and names:
+        names_groups = [[name] for name in names]
+    else:
+        names_groups = [names]
+
+    def run(executor, windows):
+        tasks = [(window_begin, window_end, names_group)
+                 for window_begin, window_end in windows
+                 for names_group in names_groups]
+        chunks = []
+        for result, err in executor.map(lambda task: fetch(*task), tasks):
+            if err is not None:
+                return None, err
+            chunks.append(result)
+        return chunks, None
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if target_size is None:
+            chunks, err = run(executor, split_period(begin, end, window))
+            if err is not None:
+                return None, err
+            return _merge(chunks, key, sort_key), None
+
+        # Adaptive: probe a first window alone, then size the next rounds of windows
+        # with the density (records per second) measured on the fetched ones
+        all_chunks = []
+        cursor = begin
+        window_size = window
+        round_size = 1
+        while cursor < end:
+            windows = []
+            for _ in range(round_size):
+                if cursor >= end:
+                    break
+                windows.append((cursor, min(cursor + window_size, end)))
+                cursor = windows[-1][1]
+            chunks, err = run(executor, windows)
+            if err is not None:
+                return None, err
+            all_chunks.extend(chunks)
+            count = sum(len(chunk) for chunk in chunks)
+            seconds = sum((window_end - window_begin).total_seconds()
+                          for window_begin, window_end in windows)
+            if count > 0:
+                # Every names group is a request, aim at target_size records per request
+                per_request = float(count) / len(names_groups)
+                window_size = datetime.timedelta(seconds=seconds * target_size / per_request)
+            else:
+                window_size = window_size * 2
+            window_size = max(window_size, MIN_WINDOW)
+            round_size = max_workers
+        return _merge(all_chunks, key, sort_key), None